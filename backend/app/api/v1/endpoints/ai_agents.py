@@ -2,15 +2,119 @@
 AI Agent management endpoints.
 """
 
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
-
+import json
+import math
+import time
+from dataclasses import asdict
+from typing import List, Optional, Dict, Any, AsyncGenerator, AsyncIterator, Tuple
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
 from app.services.ai_service import ai_service, DocumentContext
+from app.services.document_service import document_service
+from app.services.execution_queue import (
+    ExecutionNotFoundError,
+    execution_queue,
+    execution_worker,
+)
+from app.services.llm_providers import ProviderError, StreamEvent
+from app.services.project_service import ProjectNotFoundError, project_service
+from app.services.rate_limiting import RateLimitExceeded
+from app.services.search_service import extract_text
 
 router = APIRouter()
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def rate_limited(error: RateLimitExceeded) -> HTTPException:
+    """Turn a rejected AI call into a 429 telling the client when to retry."""
+    headers = None
+    if error.retry_after is not None:
+        headers = {"Retry-After": str(math.ceil(error.retry_after))}
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(error),
+        headers=headers
+    )
+
+
+async def sse_response(
+    events: AsyncGenerator[StreamEvent, None]
+) -> StreamingResponse:
+    """
+    Stream provider events to the client as Server-Sent Events.
+    
+    Emits ``delta`` events with text, then one ``done`` event with token
+    usage and timings, or an ``error`` event if the provider fails. If the
+    client disconnects, the response task is cancelled and the provider
+    stream is closed, which aborts the upstream request.
+    
+    The first event is awaited before the response starts, so a call the
+    rate limiter rejects becomes a 429 rather than an ``error`` event.
+    """
+    started = time.perf_counter()
+    first: Optional[StreamEvent] = None
+    error: Optional[ProviderError] = None
+    try:
+        first = await events.__anext__()
+    except RateLimitExceeded as e:
+        raise rate_limited(e)
+    except ProviderError as e:
+        error = e
+    except StopAsyncIteration:
+        pass
+    
+    async def resumed():
+        if error is not None:
+            raise error
+        if first is not None:
+            yield first
+            async for event in events:
+                yield event
+    
+    async def body():
+        first_token_at = None
+        try:
+            async for event in resumed():
+                if not event.done:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    yield _sse("delta", {"text": event.text})
+                    continue
+                finished_at = time.perf_counter()
+                yield _sse("done", {
+                    "usage": asdict(event.usage),
+                    "stop_reason": event.stop_reason,
+                    "cached": event.cached,
+                    "coalesced": event.coalesced,
+                    "time_to_first_token_ms": round(
+                        ((first_token_at or finished_at) - started) * 1000, 1
+                    ),
+                    "duration_ms": round((finished_at - started) * 1000, 1),
+                })
+        except ProviderError as e:
+            yield _sse("error", {"message": str(e)})
+        finally:
+            with anyio.CancelScope(shield=True):
+                await events.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 class AIAgentCreate(BaseModel):
     """AI Agent creation model."""
     name: str
@@ -48,6 +152,8 @@ class AgentExecutionRequest(BaseModel):
     agent_id: str
     context: dict
     parameters: dict = {}
+    organization_id: Optional[str] = None  # defaults to context.organization_id
+    priority: int = Field(0, ge=-100, le=100)
 
 
 class AgentExecutionResponse(BaseModel):
@@ -153,26 +259,66 @@ async def delete_ai_agent(agent_id: str):
     )
 
 
-@router.post("/execute", response_model=AgentExecutionResponse)
-async def execute_ai_agent(request: AgentExecutionRequest):
+@router.post(
+    "/execute",
+    response_model=AgentExecutionResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def execute_ai_agent(
+    request: AgentExecutionRequest,
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Execute an AI agent.
+    Queue an AI agent execution.
+    
+    The agent runs on a background worker; poll
+    ``/executions/{execution_id}`` for its status and result.
     
     Args:
         request: Agent execution request
         
     Returns:
-        AgentExecutionResponse: Execution result
+        AgentExecutionResponse: Queued execution
     """
-    # TODO: Implement AI agent execution
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="AI agent execution not yet implemented"
+    if request.agent_id not in ai_service.agents:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown agent: {request.agent_id}"
+        )
+    
+    organization_id = (
+        request.organization_id or request.context.get("organization_id")
+    )
+    try:
+        execution = await execution_queue.enqueue(
+            db,
+            agent_id=request.agent_id,
+            context=request.context,
+            parameters=request.parameters,
+            organization_id=organization_id,
+            priority=request.priority,
+            created_by=None,  # no authentication yet
+        )
+    except DBAPIError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown organization: {organization_id}"
+        )
+    execution_worker.notify()
+    
+    return AgentExecutionResponse(
+        execution_id=execution["id"],
+        result={},
+        status=execution["status"],
+        created_at=execution["created_at"]
     )
 
 
 @router.get("/executions/{execution_id}")
-async def get_execution_status(execution_id: str):
+async def get_execution_status(
+    execution_id: str,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Get execution status.
     
@@ -180,13 +326,29 @@ async def get_execution_status(execution_id: str):
         execution_id: Execution ID
         
     Returns:
-        dict: Execution status and result
+        dict: Execution status (``queued``, ``running``, ``succeeded`` or
+        ``failed``), attempts, timestamps, and the result or last error
     """
-    # TODO: Implement execution status retrieval
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Execution status not yet implemented"
-    )
+    try:
+        execution = await execution_queue.get(db, execution_id)
+    except (ExecutionNotFoundError, DBAPIError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execution not found"
+        )
+    
+    return {
+        "execution_id": execution["id"],
+        "agent_id": execution["agent_id"],
+        "status": execution["status"],
+        "result": execution["result"],
+        "error": execution["error"],
+        "attempts": execution["attempts"],
+        "max_attempts": execution["max_attempts"],
+        "created_at": execution["created_at"],
+        "started_at": execution["started_at"],
+        "finished_at": execution["finished_at"]
+    }
 
 
 @router.get("/capabilities/")
@@ -208,6 +370,41 @@ async def list_agent_capabilities():
     return {"capabilities": capabilities}
 
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get AI result cache statistics.
+    
+    Returns:
+        Dict: Hit/miss counters, hit rate and tokens saved by cache hits
+    """
+    return ai_service.cache_stats()
+
+
+@router.get("/pool/stats")
+async def get_pool_stats():
+    """
+    Get provider HTTP connection pool statistics.
+    
+    Returns:
+        Dict: Pool limits, open/idle/active connections, requests in flight
+        and utilisation (active connections / max connections)
+    """
+    return ai_service.pool_stats()
+
+
+@router.get("/rate-limits/stats")
+async def get_rate_limit_stats():
+    """
+    Get AI call admission statistics.
+    
+    Returns:
+        Dict: Admitted, delayed and rejected calls, provider 429s, bucket
+        levels and each provider's adaptive concurrency limit
+    """
+    return ai_service.rate_limit_stats()
+
+
 @router.get("/available")
 async def list_available_agents():
     """
@@ -283,6 +480,8 @@ async def analyze_document(request: DocumentAnalysisRequest):
         )
         
         return result
+    except RateLimitExceeded as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -290,11 +489,237 @@ async def analyze_document(request: DocumentAnalysisRequest):
         )
 
 
+@router.post("/analyze-document/stream")
+async def analyze_document_stream(request: DocumentAnalysisRequest):
+    """
+    Analyze a document using AI, streaming the analysis as it is generated.
+    
+    Args:
+        request: Document analysis request
+        
+    Returns:
+        StreamingResponse: ``text/event-stream`` of ``delta`` events and a
+        final ``done`` event with usage stats
+    """
+    document_context = DocumentContext(
+        document_id=request.document_id,
+        title=request.title,
+        content=request.content,
+        project_id=request.project_id,
+        organization_id=request.organization_id
+    )
+    return await sse_response(
+        ai_service.stream_analysis(document_context, request.analysis_type)
+    )
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Batch document analysis request model."""
+    documents: List[DocumentAnalysisRequest] = Field(
+        default_factory=list, max_length=settings.ANALYSIS_BATCH_MAX_DOCUMENTS
+    )
+    project_id: Optional[str] = None  # analyze the project's documents too
+    document_type: Optional[str] = None  # only the project's documents of a type
+    analysis_type: str = "comprehensive"  # for the project's documents
+    provider_batch: bool = False  # submit to the provider's batch API
+
+
+async def _listed_documents(
+    requests: List[DocumentAnalysisRequest]
+) -> AsyncIterator[Tuple[DocumentContext, str]]:
+    for request in requests:
+        document_context = DocumentContext(
+            document_id=request.document_id,
+            title=request.title,
+            content=request.content,
+            project_id=request.project_id,
+            organization_id=request.organization_id
+        )
+        yield document_context, request.analysis_type
+
+
+async def _project_documents(
+    project_id: str,
+    document_type: Optional[str],
+    analysis_type: str,
+    page_size: int = 100
+) -> AsyncIterator[Tuple[DocumentContext, str]]:
+    # A page per short-lived session, so no connection is held while the
+    # documents are being analyzed
+    cursor = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            page, cursor = await document_service.list_documents(
+                db,
+                project_id=project_id,
+                type=document_type,
+                cursor=cursor,
+                limit=page_size
+            )
+        for document in page:
+            document_context = DocumentContext(
+                document_id=document["id"],
+                title=document["title"],
+                content=extract_text(document["content"]),
+                project_id=document["project_id"],
+                organization_id=document["organization_id"]
+            )
+            yield document_context, analysis_type
+        if cursor is None:
+            return
+
+
+async def _batch_documents(
+    request: BatchAnalysisRequest
+) -> AsyncIterator[Tuple[DocumentContext, str]]:
+    async for item in _listed_documents(request.documents):
+        yield item
+    if request.project_id is not None:
+        documents = _project_documents(
+            request.project_id, request.document_type, request.analysis_type
+        )
+        async for item in documents:
+            yield item
+
+
+@router.post("/analyze-documents/batch")
+async def analyze_documents_batch(request: BatchAnalysisRequest):
+    """
+    Analyze many documents: those listed, and every document in a project.
+    
+    Documents with identical title, content and analysis type are analyzed
+    once. Results stream back as newline-delimited JSON, one line per
+    document in the order the analyses finish, followed by a ``summary``
+    line. With ``provider_batch`` the documents are instead submitted to
+    the provider's batch API (cheaper, finishes within hours) and the
+    response holds a ``batch_id`` for ``GET /analyze-documents/batch/{id}``.
+    
+    Args:
+        request: Batch analysis request
+        
+    Returns:
+        StreamingResponse: ``application/x-ndjson`` analysis results, or
+        (202) the submitted provider batch
+    """
+    if not request.documents and request.project_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Provide documents or a project_id"
+        )
+    if request.project_id is not None:
+        try:
+            # A session of its own: a Depends(get_db) session would stay
+            # checked out until the whole stream has been sent
+            async with AsyncSessionLocal() as db:
+                await project_service.get_project(db, request.project_id)
+        except (ProjectNotFoundError, DBAPIError):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Project {request.project_id} not found"
+            )
+    
+    if request.provider_batch:
+        try:
+            batch = await ai_service.submit_analysis_batch(_batch_documents(request))
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(e)
+            )
+        except ProviderError as e:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Batch submission failed: {str(e)}"
+            )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=batch)
+    
+    async def stream():
+        summary = {"documents": 0, "analyzed": 0, "duplicates": 0, "errors": 0}
+        usage = {
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cached_input_tokens": 0
+        }
+        results = ai_service.analyze_documents(_batch_documents(request))
+        async for result in results:
+            summary["documents"] += 1
+            if "error" in result:
+                summary["errors"] += 1
+            elif "duplicate_of" in result:
+                summary["duplicates"] += 1
+            else:
+                summary["analyzed"] += 1
+                for key in usage:
+                    usage[key] += result["usage"][key]
+            yield json.dumps(result).encode() + b"\n"
+        yield json.dumps({"summary": {**summary, "usage": usage}}).encode() + b"\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get("/analyze-documents/batch/{batch_id}")
+async def get_analysis_batch(batch_id: str):
+    """
+    Get a provider batch's progress, and its results once it has ended.
+    
+    Args:
+        batch_id: ID returned when the batch was submitted
+        
+    Returns:
+        Dict: Status and request counts; when ended, ``results`` with each
+        request's analysis (or error) and the documents it covers
+    """
+    try:
+        return await ai_service.get_analysis_batch(batch_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ProviderError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Batch lookup failed: {str(e)}"
+        )
+
+
+class KnowledgeSearchRequest(BaseModel):
+    """Semantic knowledge search request model."""
+    query: str
+    organization_id: str
+    project_id: Optional[str] = None
+    limit: int = Field(5, ge=1, le=50)
+
+
+@router.post("/search-knowledge")
+async def search_knowledge(request: KnowledgeSearchRequest):
+    """
+    Find documents related in meaning to a query.
+    
+    Args:
+        request: Knowledge search request
+        
+    Returns:
+        Dict: Matching documents with similarity scores
+    """
+    try:
+        results = await ai_service.search_knowledge(
+            organization_id=request.organization_id,
+            query=request.query,
+            limit=request.limit,
+            project_id=request.project_id
+        )
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Knowledge search failed: {str(e)}"
+        )
+
+
 class ContentGenerationRequest(BaseModel):
     """Content generation request model."""
     prompt: str
     context: Optional[Dict[str, Any]] = None
     template_type: Optional[str] = None
+    organization_id: Optional[str] = None  # rate limited per organization
 
 
 @router.post("/generate-content")
@@ -312,10 +737,13 @@ async def generate_content(request: ContentGenerationRequest):
         result = await ai_service.generate_content(
             prompt=request.prompt,
             context=request.context,
-            template_type=request.template_type
+            template_type=request.template_type,
+            organization_id=request.organization_id
         )
         
         return result
+    except RateLimitExceeded as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -323,10 +751,33 @@ async def generate_content(request: ContentGenerationRequest):
         )
 
 
+@router.post("/generate-content/stream")
+async def generate_content_stream(request: ContentGenerationRequest):
+    """
+    Generate content using AI, streaming it as it is produced.
+    
+    Args:
+        request: Content generation request
+        
+    Returns:
+        StreamingResponse: ``text/event-stream`` of ``delta`` events and a
+        final ``done`` event with usage stats
+    """
+    return await sse_response(
+        ai_service.stream_content(
+            prompt=request.prompt,
+            context=request.context,
+            template_type=request.template_type,
+            organization_id=request.organization_id
+        )
+    )
+
+
 class MemoryBankUpdateRequest(BaseModel):
     """Memory Bank update request model."""
     current_context: Dict[str, Any]
     requested_updates: List[str]
+    organization_id: Optional[str] = None  # rate limited per organization
 
 
 @router.post("/memory-bank/suggest-updates")
@@ -343,10 +794,13 @@ async def suggest_memory_bank_updates(request: MemoryBankUpdateRequest):
     try:
         result = await ai_service.update_memory_bank(
             current_context=request.current_context,
-            requested_updates=request.requested_updates
+            requested_updates=request.requested_updates,
+            organization_id=request.organization_id
         )
         
         return result
+    except RateLimitExceeded as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -2,17 +2,89 @@
 Document management endpoints.
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple, Union
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.http_cache import (
+    has_conditions,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    parse_etags,
+    validator_headers,
+)
+from app.core.responses import raw_json, trusted_response
+from app.services.document_service import (
+    DocumentNotFoundError,
+    InvalidCursorError,
+    ParentNotFoundError,
+    VersionConflictError,
+    decode_cursor,
+    document_service,
+    document_to_dict,
+)
+from app.services.json_patch import JsonPatchError
+from app.services.search_service import search_service
+from app.services.version_store import VersionNotFoundError, version_store
 
 router = APIRouter()
 
 
+def document_etag(version: int) -> str:
+    """Strong ETag of a document version (versions bump on every write)."""
+    return f'"v{version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[List[int]]:
+    """
+    Versions acceptable under an ``If-Match`` header.
+    
+    Returns:
+        None when any version is acceptable (no header or ``*``), otherwise
+        the versions named by the header's document ETags (possibly empty)
+    """
+    tags = parse_etags(if_match)
+    if not tags or "*" in tags:
+        return None
+    versions = []
+    for tag in tags:
+        # Weak tags never match under If-Match (strong comparison)
+        if tag.startswith('"v') and tag.endswith('"') and tag[2:-1].isdigit():
+            versions.append(int(tag[2:-1]))
+    return versions
+
+
+def list_etag(view: str, items: List[dict]) -> str:
+    """ETag of a listing page, from the identity and version of its items."""
+    return make_etag(view, *(f"{item['id']}:{item['version']}" for item in items))
+
+
+def with_raw_content(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a document dict whose stored JSON content is written out as is."""
+    return {**data, "content": raw_json(data["content"])}
+
+
 class DocumentCreate(BaseModel):
     """Document creation model."""
     title: str
-    content: dict  # ProseMirror document
+    content: Optional[dict] = None  # ProseMirror document; None to use template
+    organization_id: str
     project_id: Optional[str] = None  # None for team-wide documents
     type: str = "custom"  # memory_bank, custom, template
     template_id: Optional[str] = None
@@ -24,6 +96,35 @@ class DocumentUpdate(BaseModel):
     content: dict  # ProseMirror document
 
 
+class JsonPatchOperation(BaseModel):
+    """RFC 6902 JSON Patch operation."""
+    model_config = ConfigDict(populate_by_name=True)
+
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(None, alias="from")
+
+    @model_validator(mode="after")
+    def check_members(self) -> "JsonPatchOperation":
+        # "value" may be null, so check it was sent rather than its value
+        if (
+            self.op in ("add", "replace", "test")
+            and "value" not in self.model_fields_set
+        ):
+            raise ValueError(f"{self.op} operation requires 'value'")
+        if self.op in ("move", "copy") and self.from_ is None:
+            raise ValueError(f"{self.op} operation requires 'from'")
+        return self
+
+
+class DocumentPatch(BaseModel):
+    """Incremental document update model."""
+    base_version: int  # version the operations were computed against
+    operations: List[JsonPatchOperation]
+    title: Optional[str] = None
+
+
 class DocumentResponse(BaseModel):
     """Document response model."""
     id: str
@@ -32,93 +133,464 @@ class DocumentResponse(BaseModel):
     title: str
     content: dict
     type: str
+    version: int
+    template_id: Optional[str]
+    created_by: Optional[str]
+    created_at: str
+    updated_at: str
+
+
+class DocumentSummary(BaseModel):
+    """Document list item without content."""
+    id: str
+    organization_id: str
+    project_id: Optional[str]
+    title: str
+    type: str
+    version: int
     template_id: Optional[str]
-    created_by: str
+    created_by: Optional[str]
+    created_at: str
+    updated_at: str
+
+
+class DocumentVersionResponse(BaseModel):
+    """Document version metadata."""
+    version: int
+    is_snapshot: bool
+    title: str
+    content_hash: str
+    content_size: int
+    created_by: Optional[str]
     created_at: str
+
+
+class DocumentSearchResult(BaseModel):
+    """Ranked document search hit."""
+    id: str
+    organization_id: str
+    project_id: Optional[str]
+    title: str
+    type: str
+    version: int
     updated_at: str
+    rank: float
+
+
+class DocumentSearchResponse(BaseModel):
+    """One page of search results."""
+    results: List[DocumentSearchResult]
+    next_offset: Optional[int] = None
+
+
+class BulkImportResult(BaseModel):
+    """Outcome of one NDJSON line of a bulk import."""
+    line: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
 
+class BulkImportStats(BaseModel):
+    """Bulk import throughput."""
+    received: int
+    created: int
+    failed: int
+    seconds: float
+    documents_per_second: float
 
-@router.get("/", response_model=List[DocumentResponse])
+
+class BulkImportResponse(BaseModel):
+    """Bulk import results, in line order."""
+    results: List[BulkImportResult]
+    stats: BulkImportStats
+
+
+class DocumentPage(BaseModel):
+    """One keyset-paginated page of documents."""
+    items: List[Union[DocumentResponse, DocumentSummary]]
+    next_cursor: Optional[str] = None
+
+
+@router.get("/", response_model=DocumentPage)
 async def list_documents(
+    request: Request,
+    response: Response,
     organization_id: str = None,
     project_id: str = None,
-    type: str = None
+    type: str = None,
+    cursor: str = None,
+    limit: int = Query(50, ge=1, le=500),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     List documents with optional filters.
     
+    Results are ordered by most recently updated and paginated by keyset
+    on ``(updated_at, id)``; pass ``next_cursor`` back as ``cursor`` to get
+    the following page. ``view=summary`` omits document content.
+    ``format=ndjson`` streams every matching document (after ``cursor``)
+    as newline-delimited JSON instead of returning a single page.
+    
+    JSON pages carry an ETag; a matching ``If-None-Match`` gets 304, and
+    for full pages the check runs on the summary projection so unchanged
+    content is never loaded.
+    
     Args:
         organization_id: Filter by organization
         project_id: Filter by project (None for team-wide documents)
         type: Filter by document type
+        cursor: Opaque cursor from a previous page
+        limit: Page size
+        view: "full" or "summary"
+        format: "json" or "ndjson"
         
     Returns:
-        List[DocumentResponse]: List of documents
+        DocumentPage: Page of documents and the next cursor
     """
-    # TODO: Implement document listing
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Document listing not yet implemented"
+    try:
+        if cursor is not None:
+            decode_cursor(cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    filters = dict(
+        organization_id=organization_id,
+        project_id=project_id,
+        type=type,
+        cursor=cursor,
+        summary=view == "summary",
+    )
+
+    if format == "ndjson":
+        async def stream():
+            # The request-scoped session may close before streaming ends
+            async with AsyncSessionLocal() as stream_db:
+                lines = document_service.stream_documents(stream_db, **filters)
+                async for line in lines:
+                    yield line
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    if view == "full" and "if-none-match" in request.headers:
+        summary_filters = {**filters, "summary": True}
+        items, _ = await document_service.list_documents(
+            db, limit=limit, **summary_filters
+        )
+        etag = list_etag(view, items)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
+    items, next_cursor = await document_service.list_documents(
+        db, limit=limit, raw_content=True, **filters
+    )
+    etag = list_etag(view, items)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+    if view == "full":
+        items = [with_raw_content(item) for item in items]
+    return trusted_response(
+        {"items": items, "next_cursor": next_cursor}, DocumentPage, response
+    )
+
+
+@router.get("/search", response_model=DocumentSearchResponse)
+async def search_documents(
+    q: str = Query(..., min_length=1),
+    organization_id: str = Query(...),
+    project_id: str = None,
+    type: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Full-text search across an organization's documents.
+    
+    Matches titles and body text (titles rank higher) and returns results
+    ordered by relevance, without document content.
+    
+    Args:
+        q: Search query; supports "quoted phrases", -exclusions and "or"
+        organization_id: Organization to search in
+        project_id: Optional project filter
+        type: Optional document type filter
+        limit: Page size
+        offset: Number of results to skip
+        
+    Returns:
+        DocumentSearchResponse: Ranked results and the offset of the next page
+    """
+    results, has_more = await search_service.search(
+        db,
+        q,
+        organization_id=organization_id,
+        project_id=project_id,
+        type=type,
+        limit=limit,
+        offset=offset,
+    )
+    return DocumentSearchResponse(
+        results=results, next_offset=offset + limit if has_more else None
     )
 
 
 @router.post("/", response_model=DocumentResponse)
-async def create_document(document: DocumentCreate):
+async def create_document(
+    document: DocumentCreate,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Create a new document.
     
+    If ``content`` is omitted the document is created from ``template_id``
+    and shares the template's stored content until it is first edited.
+    
     Args:
         document: Document creation data
         
     Returns:
         DocumentResponse: Created document
     """
-    # TODO: Implement document creation
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Document creation not yet implemented"
+    if document.content is None and document.template_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Either content or template_id is required"
+        )
+
+    try:
+        created, content = await document_service.create_document(
+            db,
+            organization_id=document.organization_id,
+            title=document.title,
+            content=document.content,
+            project_id=document.project_id,
+            type=document.type,
+            template_id=document.template_id,
+            created_by=None,  # no authentication yet
+        )
+    except (DocumentNotFoundError, ParentNotFoundError) as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return trusted_response(document_to_dict(created, content), DocumentResponse)
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    """Yield ``(line number, line)`` for non-blank lines of a streamed body."""
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+def _validation_message(error: ValidationError) -> str:
+    messages = []
+    for e in error.errors(include_url=False):
+        location = ".".join(str(part) for part in e["loc"])
+        messages.append(f"{location}: {e['msg']}" if location else e["msg"])
+    return "; ".join(messages)
+
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def import_documents(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Bulk-create documents from a newline-delimited JSON body.
+    
+    Each line is a ``DocumentCreate`` object. The body is read as a stream,
+    validated and written in transactions of ``BULK_IMPORT_CHUNK_SIZE``
+    documents using multi-row inserts. Invalid or rejected lines are
+    reported individually and do not stop the rest of the import.
+    
+    Returns:
+        BulkImportResponse: Per-line results and throughput stats
+    """
+    started = time.perf_counter()
+    results: List[BulkImportResult] = []
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+
+    async def write_chunk():
+        outcomes = await document_service.import_documents(
+            db,
+            [fields for _, fields in chunk],
+            created_by=None,  # no authentication yet
+        )
+        for (line, _), outcome in zip(chunk, outcomes):
+            results.append(BulkImportResult(line=line, **outcome))
+        chunk.clear()
+
+    async for line, raw in _ndjson_lines(request):
+        try:
+            item = DocumentCreate.model_validate_json(raw)
+        except ValidationError as e:
+            results.append(BulkImportResult(line=line, error=_validation_message(e)))
+            continue
+        chunk.append((line, item.model_dump()))
+        if len(chunk) >= settings.BULK_IMPORT_CHUNK_SIZE:
+            await write_chunk()
+    if chunk:
+        await write_chunk()
+
+    results.sort(key=lambda result: result.line)
+    created = sum(1 for result in results if result.id is not None)
+    seconds = time.perf_counter() - started
+    return BulkImportResponse(
+        results=results,
+        stats=BulkImportStats(
+            received=len(results),
+            created=created,
+            failed=len(results) - created,
+            seconds=round(seconds, 3),
+            documents_per_second=round(created / seconds, 1) if seconds else 0.0,
+        ),
     )
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-async def get_document(document_id: str):
+async def get_document(
+    document_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Get document by ID.
     
+    Honors ``If-None-Match`` and ``If-Modified-Since``: when the client's
+    copy is current, 304 is returned without loading the content.
+    
     Args:
         document_id: Document ID
         
     Returns:
         DocumentResponse: Document details
     """
-    # TODO: Implement document retrieval
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Document retrieval not yet implemented"
+    try:
+        if has_conditions(request):
+            validators = await document_service.get_document_validators(
+                db, document_id
+            )
+            etag = document_etag(validators["version"])
+            last_modified = datetime.fromisoformat(validators["updated_at"])
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+
+        data = await document_service.get_document_dict(
+            db, document_id, raw_content=True
+        )
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    response.headers.update(
+        validator_headers(
+            document_etag(data["version"]),
+            datetime.fromisoformat(data["updated_at"]),
+        )
     )
+    return trusted_response(with_raw_content(data), DocumentResponse, response)
 
 
 @router.put("/{document_id}", response_model=DocumentResponse)
-async def update_document(document_id: str, document: DocumentUpdate):
+async def update_document(
+    document_id: str,
+    document: DocumentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Update document.
     
+    Send the document's ETag in ``If-Match`` to update only if nobody else
+    has changed it since; otherwise 412 is returned with the current version.
+    
     Args:
         document_id: Document ID
         document: Document update data
+        if_match: Optional ETag(s) the document must currently have
+        
+    Returns:
+        DocumentResponse: Updated document
+    """
+    try:
+        updated = await document_service.update_document(
+            db,
+            document_id,
+            title=document.title,
+            content=document.content,
+            expected_versions=parse_if_match(if_match),
+        )
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail={"message": str(e), "current_version": e.current_version},
+            headers={"ETag": document_etag(e.current_version)},
+        )
+    response.headers.update(validator_headers(document_etag(updated.version)))
+    return trusted_response(
+        document_to_dict(updated, document.content), DocumentResponse, response
+    )
+
+
+@router.patch("/{document_id}", response_model=DocumentResponse)
+async def patch_document(
+    document_id: str,
+    patch: DocumentPatch,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Incrementally update a document with JSON Patch operations.
+    
+    The operations are applied server-side to ``base_version``. If the
+    document has moved on since then, 409 is returned with the current
+    version so the client can rebase and retry.
+    
+    Args:
+        document_id: Document ID
+        patch: Base version, JSON Patch operations and optional new title
         
     Returns:
         DocumentResponse: Updated document
     """
-    # TODO: Implement document update
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Document update not yet implemented"
+    operations = [
+        op.model_dump(by_alias=True, exclude_unset=True) for op in patch.operations
+    ]
+    try:
+        updated, content = await document_service.patch_document(
+            db,
+            document_id,
+            base_version=patch.base_version,
+            operations=operations,
+            title=patch.title,
+        )
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "current_version": e.current_version}
+        )
+    except JsonPatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    response.headers.update(validator_headers(document_etag(updated.version)))
+    return trusted_response(
+        document_to_dict(updated, content), DocumentResponse, response
     )
 
 
 @router.delete("/{document_id}")
-async def delete_document(document_id: str):
+async def delete_document(document_id: str, db: AsyncSession = Depends(get_db)):
     """
     Delete document.
     
@@ -128,18 +600,25 @@ async def delete_document(document_id: str):
     Returns:
         dict: Success message
     """
-    # TODO: Implement document deletion
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Document deletion not yet implemented"
-    )
+    try:
+        await document_service.delete_document(db, document_id)
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return {"message": "Document deleted successfully"}
 
 
 @router.post("/{document_id}/duplicate", response_model=DocumentResponse)
-async def duplicate_document(document_id: str, title: str):
+async def duplicate_document(
+    document_id: str,
+    title: str,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Duplicate an existing document.
     
+    The copy shares the source's stored content until either is edited,
+    so duplicating costs a metadata row rather than a copy of the body.
+    
     Args:
         document_id: Source document ID
         title: Title for the new document
@@ -147,26 +626,66 @@ async def duplicate_document(document_id: str, title: str):
     Returns:
         DocumentResponse: Duplicated document
     """
-    # TODO: Implement document duplication
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Document duplication not yet implemented"
-    )
+    try:
+        created, content = await document_service.duplicate_document(
+            db, document_id, title
+        )
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return trusted_response(document_to_dict(created, content), DocumentResponse)
 
 
-@router.get("/{document_id}/history")
-async def get_document_history(document_id: str):
+@router.get("/{document_id}/history", response_model=List[DocumentVersionResponse])
+async def get_document_history(
+    document_id: str,
+    before_version: int = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Get document version history.
     
+    Only version metadata is returned; use the version endpoint to fetch
+    the content of a specific version.
+    
+    Args:
+        document_id: Document ID
+        before_version: Only list versions older than this one
+        limit: Maximum number of versions to return
+        
+    Returns:
+        List[DocumentVersionResponse]: Document version history, newest first
+    """
+    try:
+        # An empty page must not hide a mistyped document ID
+        await document_service.get_document_validators(db, document_id)
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return await version_store.list_versions(
+        db, document_id, before_version=before_version, limit=limit
+    )
+
+
+@router.get("/{document_id}/versions/{version}")
+async def get_document_version(
+    document_id: str,
+    version: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the content of a document at a specific version.
+    
     Args:
         document_id: Document ID
+        version: Version number
         
     Returns:
-        List: Document version history
+        dict: Version number and reconstructed content
     """
-    # TODO: Implement document history
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Document history not yet implemented"
+    try:
+        content = await version_store.get_content(db, document_id, version)
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return trusted_response(
+        {"document_id": document_id, "version": version, "content": content}
     )
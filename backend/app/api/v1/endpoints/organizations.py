@@ -2,9 +2,24 @@
 Organization management endpoints.
 """
 
+from datetime import datetime
 from typing import List
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.http_cache import (
+    is_not_modified,
+    make_etag,
+    not_modified,
+    validator_headers,
+)
+from app.services.organization_service import (
+    OrganizationNotFoundError,
+    organization_service,
+)
 
 router = APIRouter()
 
@@ -60,7 +75,10 @@ async def list_organizations():
 
 
 @router.post("/", response_model=OrganizationResponse)
-async def create_organization(organization: OrganizationCreate):
+async def create_organization(
+    organization: OrganizationCreate,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Create a new organization.
     
@@ -70,33 +88,56 @@ async def create_organization(organization: OrganizationCreate):
     Returns:
         OrganizationResponse: Created organization
     """
-    # TODO: Implement organization creation
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Organization creation not yet implemented"
-    )
+    try:
+        return await organization_service.create_organization(
+            db, name=organization.name, slug=organization.slug
+        )
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Organization slug {organization.slug!r} is already taken"
+        )
 
 
 @router.get("/{organization_id}", response_model=OrganizationResponse)
-async def get_organization(organization_id: str):
+async def get_organization(
+    organization_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Get organization by ID.
     
+    Honors ``If-None-Match`` and ``If-Modified-Since`` with 304 responses.
+    
     Args:
         organization_id: Organization ID
         
     Returns:
         OrganizationResponse: Organization details
     """
-    # TODO: Implement organization retrieval
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Organization retrieval not yet implemented"
-    )
+    try:
+        organization = await organization_service.get_organization(
+            db, organization_id
+        )
+    except OrganizationNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    etag = make_etag(organization["id"], organization["updated_at"])
+    last_modified = datetime.fromisoformat(organization["updated_at"])
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    return organization
 
 
 @router.put("/{organization_id}", response_model=OrganizationResponse)
-async def update_organization(organization_id: str, organization: OrganizationUpdate):
+async def update_organization(
+    organization_id: str,
+    organization: OrganizationUpdate,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Update organization.
     
@@ -107,15 +148,19 @@ async def update_organization(organization_id: str, organization: OrganizationUp
     Returns:
         OrganizationResponse: Updated organization
     """
-    # TODO: Implement organization update
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Organization update not yet implemented"
-    )
+    try:
+        return await organization_service.update_organization(
+            db, organization_id, name=organization.name
+        )
+    except OrganizationNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @router.delete("/{organization_id}")
-async def delete_organization(organization_id: str):
+async def delete_organization(
+    organization_id: str,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Delete organization.
     
@@ -125,11 +170,11 @@ async def delete_organization(organization_id: str):
     Returns:
         dict: Success message
     """
-    # TODO: Implement organization deletion
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Organization deletion not yet implemented"
-    )
+    try:
+        await organization_service.delete_organization(db, organization_id)
+    except OrganizationNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return {"message": "Organization deleted successfully"}
 
 
 @router.get("/{organization_id}/members", response_model=List[MemberResponse])
@@ -2,9 +2,21 @@
 Project management endpoints.
 """
 
-from typing import List
-from fastapi import APIRouter, HTTPException, status
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.http_cache import (
+    is_not_modified,
+    make_etag,
+    not_modified,
+    validator_headers,
+)
+from app.services.organization_service import OrganizationNotFoundError
+from app.services.project_service import ProjectNotFoundError, project_service
 
 router = APIRouter()
 
@@ -28,13 +40,18 @@ class ProjectResponse(BaseModel):
     organization_id: str
     name: str
     description: str
-    created_by: str
+    created_by: Optional[str]
     created_at: str
     updated_at: str
 
 
 @router.get("/", response_model=List[ProjectResponse])
-async def list_projects(organization_id: str = None):
+async def list_projects(
+    request: Request,
+    response: Response,
+    organization_id: str = None,
+    db: AsyncSession = Depends(get_db),
+):
     """
     List projects for current user or organization.
     
@@ -44,15 +61,19 @@ async def list_projects(organization_id: str = None):
     Returns:
         List[ProjectResponse]: List of projects
     """
-    # TODO: Implement project listing
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Project listing not yet implemented"
-    )
+    projects = await project_service.list_projects(db, organization_id)
+    etag = make_etag(*(f"{p['id']}:{p['updated_at']}" for p in projects))
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+    return projects
 
 
 @router.post("/", response_model=ProjectResponse)
-async def create_project(project: ProjectCreate):
+async def create_project(
+    project: ProjectCreate,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Create a new project.
     
@@ -62,33 +83,55 @@ async def create_project(project: ProjectCreate):
     Returns:
         ProjectResponse: Created project
     """
-    # TODO: Implement project creation
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Project creation not yet implemented"
-    )
+    try:
+        return await project_service.create_project(
+            db,
+            organization_id=project.organization_id,
+            name=project.name,
+            description=project.description,
+            created_by=None,  # no authentication yet
+        )
+    except OrganizationNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: str):
+async def get_project(
+    project_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Get project by ID.
     
+    Honors ``If-None-Match`` and ``If-Modified-Since`` with 304 responses.
+    
     Args:
         project_id: Project ID
         
     Returns:
         ProjectResponse: Project details
     """
-    # TODO: Implement project retrieval
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Project retrieval not yet implemented"
-    )
+    try:
+        project = await project_service.get_project(db, project_id)
+    except ProjectNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    etag = make_etag(project["id"], project["updated_at"])
+    last_modified = datetime.fromisoformat(project["updated_at"])
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    return project
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
-async def update_project(project_id: str, project: ProjectUpdate):
+async def update_project(
+    project_id: str,
+    project: ProjectUpdate,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Update project.
     
@@ -99,15 +142,16 @@ async def update_project(project_id: str, project: ProjectUpdate):
     Returns:
         ProjectResponse: Updated project
     """
-    # TODO: Implement project update
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Project update not yet implemented"
-    )
+    try:
+        return await project_service.update_project(
+            db, project_id, name=project.name, description=project.description
+        )
+    except ProjectNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @router.delete("/{project_id}")
-async def delete_project(project_id: str):
+async def delete_project(project_id: str, db: AsyncSession = Depends(get_db)):
     """
     Delete project.
     
@@ -117,8 +161,8 @@ async def delete_project(project_id: str):
     Returns:
         dict: Success message
     """
-    # TODO: Implement project deletion
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Project deletion not yet implemented"
-    )
+    try:
+        await project_service.delete_project(db, project_id)
+    except ProjectNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return {"message": "Project deleted successfully"}
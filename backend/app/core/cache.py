@@ -0,0 +1,495 @@
+"""
+Two-tier read-through cache: in-process LRU in front of Redis.
+
+Entries are invalidated by tag (e.g. ``document:<id>``). Each tag has a
+version counter in Redis; a Redis entry records the tag versions it was
+built from and is treated as a miss once any of them has moved on.
+Invalidations are also published on a pub/sub channel so every worker
+drops matching local entries immediately; the short local TTL bounds
+staleness if a message is missed.
+
+Concurrent misses for the same key are coalesced in process, and across
+processes through a short Redis lock, so a hot key expiring triggers one
+load rather than one per request.
+
+If Redis is unavailable, the cache degrades to local-only for a short
+back-off period and errors are counted rather than raised. Invalidations
+that could not reach Redis are replayed before the worker uses its Redis
+tier again, so entries written before the outage cannot be served stale.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import CACHE_EVENTS, CACHE_OPERATION_SECONDS
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+# Skip Redis for this long after an error instead of failing every request
+REDIS_BACKOFF_SECONDS = 5.0
+
+
+@dataclass
+class CacheStats:
+    """Cache hit/miss counters."""
+
+    local_hits: int = 0
+    remote_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    invalidations: int = 0
+    errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.local_hits + self.remote_hits + self.misses
+        return (self.local_hits + self.remote_hits) / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+@dataclass
+class _LocalEntry:
+    value: Any
+    size: int
+    expires_at: float
+    tags: List[str]
+
+
+class TwoTierCache:
+    """Read-through cache with an in-process LRU tier and a Redis tier."""
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        namespace: str = "cache",
+        ttl: int = settings.CACHE_TTL_SECONDS,
+        local_ttl: float = settings.CACHE_LOCAL_TTL_SECONDS,
+        local_max_bytes: int = settings.CACHE_LOCAL_MAX_BYTES,
+        lock_timeout: float = settings.CACHE_LOCK_TIMEOUT_SECONDS,
+    ):
+        self.redis = redis
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_max_bytes = local_max_bytes
+        self.lock_timeout = lock_timeout
+        self.stats = CacheStats()
+
+        self._local: "OrderedDict[str, _LocalEntry]" = OrderedDict()
+        self._local_bytes = 0
+        self._tag_keys: Dict[str, Set[str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._redis_down_until = 0.0
+        self._invalidation_sequence = 0
+        self._unpublished: Set[str] = set()  # invalidations Redis has not seen
+        self._republisher: Optional[asyncio.Task] = None
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        tags: Iterable[str] = (),
+        value_tags: Optional[Callable[[Any], Iterable[str]]] = None,
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Return the cached value for ``key``, loading and caching it on a miss.
+
+        Cached values are shared between callers and must not be mutated.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value on a miss
+            tags: Tags known before loading (e.g. derived from the key)
+            value_tags: Function returning further tags from the loaded value
+            ttl: Redis TTL in seconds (defaults to the cache TTL)
+
+        Returns:
+            The cached or freshly loaded value. Exceptions from ``loader``
+            propagate and nothing is cached. If the caller loading a value
+            is cancelled, a caller waiting for it loads it instead.
+        """
+        with CACHE_OPERATION_SECONDS.labels(self.namespace, "get_or_load").time():
+            while True:
+                entry = self._local_get(key)
+                if entry is not None:
+                    self._count("local_hits")
+                    return entry.value
+
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    break
+                self._count("coalesced")
+                try:
+                    return await asyncio.shield(inflight)
+                except asyncio.CancelledError:
+                    # The loader's caller was cancelled, not this one: the
+                    # loader may use that caller's resources, so load anew
+                    if inflight.cancelled() and not asyncio.current_task().cancelling():
+                        continue
+                    raise
+
+            future = asyncio.get_running_loop().create_future()
+            # Mark failures as retrieved so unawaited futures don't log warnings
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = future
+            try:
+                value = await self._load_through(
+                    key, loader, list(tags), value_tags, ttl
+                )
+                future.set_result(value)
+                return value
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Return the cached value for ``key``, or None on a miss.
+
+        For callers that produce values incrementally (e.g. streams) and
+        store them with ``set``; prefer ``get_or_load`` otherwise.
+        """
+        with CACHE_OPERATION_SECONDS.labels(self.namespace, "get").time():
+            entry = self._local_get(key)
+            if entry is not None:
+                self._count("local_hits")
+                return entry.value
+            if await self._redis_ready():
+                try:
+                    cached = await self._remote_get(key)
+                except (RedisError, OSError) as e:
+                    self._redis_failed()
+                    logger.warning("Cache read failed for %s: %s", key, e)
+                else:
+                    if cached is not None:
+                        self._count("remote_hits")
+                        value, encoded_size, entry_tags = cached
+                        self._local_set(key, value, encoded_size, entry_tags)
+                        return value
+            self._count("misses")
+            return None
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Store a value produced outside ``get_or_load``."""
+        with CACHE_OPERATION_SECONDS.labels(self.namespace, "set").time():
+            tags = list(tags)
+            encoded = json.dumps(value, separators=(",", ":"))
+            self._local_set(key, value, len(encoded), tags)
+            if await self._redis_ready():
+                versions = await self._safe_tag_versions(key, tags)
+                if versions is not None:
+                    await self._remote_set(key, encoded, versions, ttl)
+
+    async def invalidate(self, *tags: str) -> None:
+        """Invalidate every entry carrying any of ``tags``, in all workers."""
+        self._count("invalidations")
+        self._local_invalidate(tags)
+        if self.redis is None or not tags:
+            return
+        self._unpublished.update(tags)
+        await self._publish_invalidations()
+
+    async def start(self) -> None:
+        """Start listening for invalidations published by other workers."""
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        """Stop the background tasks and close the Redis connection."""
+        for task in (self._listener, self._republisher):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, RedisError, OSError):
+                    pass
+        self._listener = self._republisher = None
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    def clear_local(self) -> None:
+        """Drop every entry from the in-process tier."""
+        self._invalidation_sequence += 1
+        self._local.clear()
+        self._tag_keys.clear()
+        self._local_bytes = 0
+
+    async def _load_through(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        tags: List[str],
+        value_tags: Optional[Callable[[Any], Iterable[str]]],
+        ttl: Optional[int],
+    ) -> Any:
+        lock: Optional[Tuple[str, str]] = None
+        versions: Dict[str, int] = {}
+        use_redis = await self._redis_ready()
+        if use_redis:
+            try:
+                cached = await self._remote_get(key)
+                if cached is None:
+                    lock, cached = await self._acquire_or_wait(key)
+                if cached is not None:
+                    self._count("remote_hits")
+                    value, encoded_size, entry_tags = cached
+                    self._local_set(key, value, encoded_size, entry_tags)
+                    return value
+                # Read static tag versions before loading, so a write that
+                # lands mid-load leaves this entry already stale
+                versions = await self._tag_versions(tags)
+            except (RedisError, OSError) as e:
+                self._redis_failed()
+                use_redis = False
+                logger.warning("Cache read failed for %s: %s", key, e)
+
+        self._count("misses")
+        sequence = self._invalidation_sequence
+        try:
+            value = await loader()
+            if value_tags is not None:
+                extra = [tag for tag in value_tags(value) if tag not in tags]
+                tags = tags + extra
+            encoded = json.dumps(value, separators=(",", ":"))
+            # Don't cache locally what an invalidation during the load made stale
+            if sequence == self._invalidation_sequence:
+                self._local_set(key, value, len(encoded), tags)
+
+            if use_redis:
+                if value_tags is not None:
+                    extra_versions = await self._safe_tag_versions(key, extra)
+                    if extra_versions is None:
+                        return value
+                    versions.update(extra_versions)
+                await self._remote_set(key, encoded, versions, ttl)
+        finally:
+            if lock is not None:
+                await self._release(*lock)
+        return value
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    async def _redis_ready(self) -> bool:
+        """Whether to use Redis, replaying any invalidations it missed first."""
+        if not self._redis_available():
+            return False
+        return not self._unpublished or await self._publish_invalidations()
+
+    async def _publish_invalidations(self) -> bool:
+        """
+        Bump the versions of unpublished tags and tell the other workers.
+
+        Until this succeeds, Redis entries built from those tags still look
+        current, so the Redis tier is not used.
+        """
+        tags = sorted(self._unpublished)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag))
+                pipe.publish(INVALIDATION_CHANNEL, json.dumps(tags))
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._redis_failed()
+            if self._republisher is None or self._republisher.done():
+                logger.warning("Cache invalidation failed for %s: %s", tuple(tags), e)
+                # Other workers only learn of them once they are published
+                self._republisher = asyncio.create_task(self._republish())
+            else:
+                logger.debug("Cache invalidation failed for %s: %s", tuple(tags), e)
+            return False
+        self._unpublished.difference_update(tags)
+        return True
+
+    async def _republish(self) -> None:
+        while self._unpublished:
+            await asyncio.sleep(REDIS_BACKOFF_SECONDS)
+            await self._publish_invalidations()
+
+    def _count(self, event: str) -> None:
+        setattr(self.stats, event, getattr(self.stats, event) + 1)
+        CACHE_EVENTS.labels(self.namespace, event).inc()
+
+    def _redis_failed(self) -> None:
+        self._count("errors")
+        self._redis_down_until = time.monotonic() + REDIS_BACKOFF_SECONDS
+
+    async def _remote_get(self, key: str) -> Optional[tuple]:
+        raw = await self.redis.get(self._key(key))
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        if entry["t"]:
+            current = await self._tag_versions(entry["t"].keys())
+            if current != entry["t"]:
+                return None
+        return entry["v"], len(raw), list(entry["t"])
+
+    async def _remote_set(
+        self, key: str, encoded: str, versions: Dict[str, int], ttl: Optional[int]
+    ) -> None:
+        try:
+            payload = f'{{"t":{json.dumps(versions)},"v":{encoded}}}'
+            await self.redis.set(self._key(key), payload, ex=ttl or self.ttl)
+        except (RedisError, OSError) as e:
+            self._redis_failed()
+            logger.warning("Cache write failed for %s: %s", key, e)
+
+    async def _safe_tag_versions(
+        self, key: str, tags: Iterable[str]
+    ) -> Optional[Dict[str, int]]:
+        try:
+            return await self._tag_versions(tags)
+        except (RedisError, OSError) as e:
+            self._redis_failed()
+            logger.warning("Cache write failed for %s: %s", key, e)
+            return None
+
+    async def _acquire_or_wait(self, key: str) -> tuple:
+        """
+        Take the per-key load lock, or wait for its holder to fill the cache.
+
+        Returns:
+            ``((lock_key, token), None)`` if this caller should load, or
+            ``(None, cached)`` if another process loaded the value meanwhile.
+        """
+        lock_key = self._key(f"lock:{key}")
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            acquired = await self.redis.set(
+                lock_key, token, nx=True, px=int(self.lock_timeout * 1000)
+            )
+            if acquired:
+                return (lock_key, token), None
+            await asyncio.sleep(0.025)
+            cached = await self._remote_get(key)
+            if cached is not None:
+                return None, cached
+            if time.monotonic() >= deadline:
+                # Holder is slow or gone; load without the lock
+                return None, None
+
+    async def _tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        tags = list(tags)
+        if not tags:
+            return {}
+        values = await self.redis.mget([self._tag_key(tag) for tag in tags])
+        return {tag: int(value or 0) for tag, value in zip(tags, values)}
+
+    async def _release(self, lock_key: str, token: str) -> None:
+        """Delete the load lock, unless it expired and another process took it."""
+        try:
+            if await self.redis.get(lock_key) == token.encode():
+                await self.redis.delete(lock_key)
+        except (RedisError, OSError):
+            self._count("errors")
+
+    async def _listen(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    delay = 1.0
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            self._local_invalidate(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as e:
+                self._count("errors")
+                # Warn once per outage rather than on every reconnect attempt
+                log = logger.warning if delay == 1.0 else logger.debug
+                log("Cache invalidation listener error: %s", e)
+                # Anything published while disconnected was missed
+                self.clear_local()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _local_get(self, key: str) -> Optional[_LocalEntry]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._local_remove(key)
+            return None
+        self._local.move_to_end(key)
+        return entry
+
+    def _local_set(self, key: str, value: Any, size: int, tags: List[str]) -> None:
+        if size > self.local_max_bytes // 4:
+            return  # Too large to keep in process; Redis still has it
+        self._local_remove(key)
+        self._local[key] = _LocalEntry(
+            value, size, time.monotonic() + self.local_ttl, tags
+        )
+        self._local_bytes += size
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while self._local_bytes > self.local_max_bytes:
+            self._local_remove(next(iter(self._local)))
+
+    def _local_remove(self, key: str) -> None:
+        entry = self._local.pop(key, None)
+        if entry is None:
+            return
+        self._local_bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def _local_invalidate(self, tags: Iterable[str]) -> None:
+        self._invalidation_sequence += 1
+        for tag in tags:
+            for key in list(self._tag_keys.get(tag, ())):
+                self._local_remove(key)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.namespace}:tag:{tag}"
+
+
+def create_cache(namespace: str = "cache", **options: Any) -> TwoTierCache:
+    """Create a cache backed by ``settings.REDIS_URL`` (local-only if disabled)."""
+    redis = None
+    if settings.CACHE_ENABLED:
+        redis = Redis.from_url(settings.REDIS_URL, socket_timeout=1.0)
+    return TwoTierCache(redis, namespace=namespace, **options)
+
+
+# Global cache instance
+cache = create_cache()
@@ -49,13 +49,35 @@ class Settings(BaseSettings):
             return v
         return PostgresDsn.build(
             scheme="postgresql",
-            user=values.get("POSTGRES_USER"),
+            username=values.get("POSTGRES_USER"),
             password=values.get("POSTGRES_PASSWORD"),
             host=values.get("POSTGRES_SERVER"),
-            port=values.get("POSTGRES_PORT"),
-            path=f"/{values.get('POSTGRES_DB') or ''}",
+            port=int(values.get("POSTGRES_PORT")),
+            path=values.get("POSTGRES_DB") or "",
         )
-    
+
+    # Async connection pool (per worker)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+
+    # Document version history
+    VERSION_SNAPSHOT_INTERVAL: int = 20  # max deltas replayed per read
+    VERSION_MAX_DELTA_RATIO: float = 0.5  # snapshot when delta is this large
+
+    # Bulk import
+    BULK_IMPORT_CHUNK_SIZE: int = 500  # documents per transaction
+
+    # Full-text search
+    SEARCH_LANGUAGE: str = "english"  # PostgreSQL text search configuration
+    SEARCH_MAX_TEXT_CHARS: int = 500_000  # tsvector input is capped at 1MB
+
+    # Semantic search
+    EMBEDDING_MODEL: str = "hashing"  # see app.services.embeddings
+    EMBEDDING_DIM: int = 512
+    EMBEDDING_MAX_CHARS: int = 50_000
+    VECTOR_INDEX_NPROBE: int = 8
+
     # Supabase
     SUPABASE_URL: str = "http://localhost:54321"
     SUPABASE_ANON_KEY: str = ""
@@ -63,11 +85,79 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
+
+    # Read-through cache (in-process LRU in front of Redis)
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_LOCAL_TTL_SECONDS: float = 5.0
+    CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_LOCK_TIMEOUT_SECONDS: float = 5.0
     
     # AI Services
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
     
+    # Shared HTTP pool for provider clients (see app.services.http_pool)
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP2: bool = True
+    LLM_HTTP_CONNECT_TIMEOUT: float = 5.0
+    LLM_HTTP_READ_TIMEOUT: float = 120.0  # max gap between streamed chunks
+    LLM_HTTP_WRITE_TIMEOUT: float = 30.0
+    LLM_HTTP_POOL_TIMEOUT: float = 10.0  # wait for a free connection
+    # Import the agents' provider SDKs in the background after startup, so
+    # the first AI request does not pay for it (they are imported lazily)
+    AI_PRELOAD_PROVIDER_SDKS: bool = True
+    
+    # Local stand-in provider for load tests (see app.services.llm_providers)
+    AI_PROVIDER_OVERRIDE: Optional[str] = None  # e.g. "fake": all built-in agents
+    FAKE_LLM_TIME_TO_FIRST_TOKEN_SECONDS: float = 0.5
+    FAKE_LLM_TOKENS_PER_SECOND: float = 50.0  # 0 streams without pauses
+    FAKE_LLM_OUTPUT_TOKENS: int = 200  # capped at the request's max_tokens
+    FAKE_LLM_ERROR_RATE: float = 0.0  # share of calls failing after the TTFT
+    FAKE_LLM_RATE_LIMIT_RATE: float = 0.0  # share of calls rejected with 429
+    FAKE_LLM_RETRY_AFTER_SECONDS: float = 1.0
+    FAKE_LLM_SEED: Optional[int] = None  # makes injected failures repeatable
+    
+    # AI result cache (keyed by a hash of the full request)
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    AI_CACHE_LOCAL_TTL_SECONDS: float = 3600.0
+    AI_CACHE_LOCAL_MAX_BYTES: int = 16 * 1024 * 1024
+    
+    # Share identical in-flight AI calls (see app.services.coalescing)
+    AI_COALESCE_ENABLED: bool = True
+    AI_COALESCE_LOCK_SECONDS: float = 30.0  # leader lease, renewed per event
+
+    # Provider call admission, per process (see app.services.rate_limiting)
+    AI_RATE_LIMIT_ENABLED: bool = True
+    AI_GLOBAL_REQUESTS_PER_MINUTE: int = 600
+    AI_GLOBAL_TOKENS_PER_MINUTE: int = 400_000
+    AI_ORG_REQUESTS_PER_MINUTE: int = 120
+    AI_ORG_TOKENS_PER_MINUTE: int = 100_000
+    AI_RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0  # longer waits are rejected
+    AI_CONCURRENCY_INITIAL: int = 16  # provider calls in flight, per provider
+    AI_CONCURRENCY_MIN: int = 2
+    AI_CONCURRENCY_MAX: int = 64
+    AI_LATENCY_TOLERANCE: float = 3.0  # first-token latency spike vs. baseline
+
+    # Long-document analysis (map-reduce over chunks, see app.services.chunking)
+    ANALYSIS_CHUNK_MAX_TOKENS: int = 3000
+    ANALYSIS_CHUNK_MIN_TOKENS: int = 500  # smaller sections merge with the next
+    ANALYSIS_CONCURRENCY: int = 4  # chunk analyses in flight per document
+    ANALYSIS_BATCH_CONCURRENCY: int = 8  # documents in flight per batch request
+    ANALYSIS_BATCH_MAX_DOCUMENTS: int = 1000  # documents listed in one request
+    
+    # Agent execution queue (see app.services.execution_queue)
+    EXECUTION_WORKER_IN_PROCESS: bool = True  # False when running app.worker
+    EXECUTION_CONCURRENCY: int = 8  # concurrent executions per worker
+    EXECUTION_MAX_PER_ORG: int = 2  # running executions per organization
+    EXECUTION_MAX_ATTEMPTS: int = 3
+    EXECUTION_RETRY_BASE_SECONDS: float = 2.0
+    EXECUTION_LEASE_SECONDS: int = 60
+    EXECUTION_POLL_SECONDS: float = 1.0
+    
     # File Storage
     UPLOAD_MAX_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_FILE_TYPES: List[str] = [
@@ -89,6 +179,23 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     
+    # Responses returned through app.core.responses.trusted_response skip
+    # FastAPI's response validation; turn this on (tests, staging) to check
+    # them against their response model anyway
+    VALIDATE_TRUSTED_RESPONSES: bool = False
+    
+    # Prometheus metrics (see app.core.metrics)
+    METRICS_ENABLED: bool = True  # request and query timing, served on /metrics
+    
+    # Request profiling (see app.core.profiling)
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0  # share of requests profiled at random
+    PROFILING_TOKEN: Optional[str] = None  # "X-Profile: <token>" profiles a request
+    PROFILING_DIR: str = "/tmp/profiles"
+    PROFILING_FORMAT: str = "speedscope"  # or "html"
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+    PROFILING_MAX_CONCURRENT: int = 2  # sampled profiles running at once
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
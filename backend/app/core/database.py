@@ -1,16 +1,47 @@
 """
 Database connection and session management for Supabase PostgreSQL.
+
+Request handlers use the asyncpg-backed ``AsyncSession`` provided by
+``get_db``. The synchronous engine is kept only for Alembic migrations and
+one-off scripts, which run outside the event loop.
 """
 
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.core.config import settings
 
-# Create SQLAlchemy engine
+
+def _async_database_url(url: str) -> str:
+    """Rewrite a PostgreSQL DSN to use the asyncpg driver."""
+    scheme, sep, rest = url.partition("://")
+    return f"postgresql+asyncpg{sep}{rest}" if scheme.startswith("postgres") else url
+
+
+# Async engine used by the API
+async_engine = create_async_engine(
+    _async_database_url(str(settings.DATABASE_URL)),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    echo=settings.DEBUG,
+)
+
+# Create AsyncSessionLocal class
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Sync engine for Alembic and scripts only
 engine = create_engine(
     str(settings.DATABASE_URL),
     pool_pre_ping=True,
@@ -25,10 +56,23 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency to get database session.
-    
+    Dependency to get an async database session.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_sync_db() -> Generator[Session, None, None]:
+    """
+    Get a synchronous database session for migrations and scripts.
+
+    Do not use this from request handlers; it blocks the event loop.
+
     Yields:
         Session: SQLAlchemy database session
     """
@@ -37,3 +81,9 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def close_db() -> None:
+    """Dispose of pooled connections on application shutdown."""
+    await async_engine.dispose()
+    engine.dispose()
@@ -0,0 +1,86 @@
+"""
+HTTP conditional request helpers (ETag, If-None-Match, If-Modified-Since, If-Match).
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, List, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: object) -> str:
+    """Build an opaque strong ETag from the values that identify a representation."""
+    digest = hashlib.sha1("\x1f".join(str(part) for part in parts).encode())
+    return f'"{digest.hexdigest()[:24]}"'
+
+
+def parse_etags(header: Optional[str]) -> List[str]:
+    """
+    Split an ``If-Match``/``If-None-Match`` header into entity tags.
+
+    Returns:
+        List of tags including their quotes and any ``W/`` prefix, or
+        ``["*"]`` for the wildcard
+    """
+    if not header:
+        return []
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def validator_headers(
+    etag: str, last_modified: Optional[datetime] = None
+) -> Dict[str, str]:
+    """Response headers advertising a representation's validators."""
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Whether a GET can be answered with 304 Not Modified.
+
+    ``If-None-Match`` uses weak comparison; ``If-Modified-Since`` is only
+    consulted when ``If-None-Match`` is absent (RFC 9110 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = parse_etags(if_none_match)
+        return "*" in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def has_conditions(request: Request) -> bool:
+    """Whether the request carries GET preconditions."""
+    headers = request.headers
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Empty 304 response carrying the current validators."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, last_modified),
+    )
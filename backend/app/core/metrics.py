@@ -0,0 +1,200 @@
+"""
+Prometheus metrics for the API.
+
+``MetricsMiddleware`` times every HTTP request by templated route path
+(``/api/v1/documents/{document_id}``, never the raw path, so label values
+stay bounded) and records response sizes and requests in flight. Database
+queries are timed through SQLAlchemy engine events (``instrument_engine``),
+cache operations by ``TwoTierCache`` and LLM calls by ``AIService``.
+
+Everything is exposed in the Prometheus text format by ``render_metrics``.
+Recording is a few dictionary lookups and lock-protected additions per
+event, so the metrics can stay on in production. When several worker
+processes serve the API, set ``PROMETHEUS_MULTIPROC_DIR`` to a shared empty
+directory so ``/metrics`` aggregates all of them.
+"""
+
+import os
+import time
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes",
+    "Response body size",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_OPERATION_SECONDS = Histogram(
+    "cache_operation_duration_seconds",
+    "Cache call time, including loading on a miss for get_or_load",
+    ["namespace", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_EVENTS = Counter(
+    "cache_events_total",
+    "Cache hits, misses, coalesced loads, invalidations and errors",
+    ["namespace", "event"],
+)
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from starting a provider call to its first text",
+    ["provider", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds",
+    "Provider call time, to the end of the stream",
+    ["provider", "model", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens billed by providers",
+    ["provider", "model", "kind"],
+)
+LLM_IN_PROGRESS = Gauge(
+    "llm_requests_in_progress",
+    "Provider calls in flight",
+    ["provider"],
+    multiprocess_mode="livesum",
+)
+STARTUP_SECONDS = Gauge(
+    "app_startup_seconds",
+    "Time this process took to become ready, by phase",
+    ["phase"],
+)
+
+
+def _route(scope: Scope) -> str:
+    # FastAPI stores the matched route in the scope while routing
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency, response size and concurrency."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in METHODS else "OTHER"
+        status = 500  # unless a response is started
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = _route(scope)
+            HTTP_REQUEST_SECONDS.labels(method, route, f"{status // 100}xx").observe(
+                elapsed
+            )
+            HTTP_RESPONSE_BYTES.labels(method, route).observe(size)
+
+
+def _operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Time every statement run through ``engine``.
+
+    For an ``AsyncEngine``, pass its ``sync_engine``; the events fire around
+    the awaited driver call, so the timings are real query latency.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany) -> None:
+        start = conn.info["query_start"].pop()
+        DB_QUERY_SECONDS.labels(_operation(statement)).observe(
+            time.perf_counter() - start
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context) -> None:
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            start = conn.info["query_start"].pop()
+            DB_QUERY_SECONDS.labels("ERROR").observe(time.perf_counter() - start)
+
+
+def record_llm_usage(provider: str, model: str, usage: Any) -> None:
+    """Count the tokens of one provider call (a ``Usage``)."""
+    for kind, tokens in (
+        ("input", usage.input_tokens),
+        ("output", usage.output_tokens),
+        ("cached_input", usage.cached_input_tokens),
+        ("cache_write_input", usage.cache_write_input_tokens),
+    ):
+        if tokens:
+            LLM_TOKENS.labels(provider, model, kind).inc(tokens)
+
+
+def render_metrics() -> bytes:
+    """Current metrics in the Prometheus text format (``CONTENT_TYPE_LATEST``)."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,132 @@
+"""
+On-demand profiling of individual requests.
+
+``ProfilingMiddleware`` runs a statistical profiler (pyinstrument) around a
+request when either
+
+- the request carries ``X-Profile: <PROFILING_TOKEN>``, or
+- it is picked by random sampling (``PROFILING_SAMPLE_RATE``).
+
+The profiler follows the request's async context, so time spent awaiting
+the database, Redis or an LLM provider shows up under the ``await`` that
+waited, and other requests running concurrently on the event loop do not.
+Each profile is written to ``PROFILING_DIR`` as speedscope JSON (open it
+at https://www.speedscope.app for a flamegraph) or pyinstrument HTML.
+Requests triggered by the header get an ``X-Profile-Id`` response header
+naming the file.
+
+The middleware is only installed when ``PROFILING_ENABLED`` is set, so a
+deployment that does not use it pays nothing. Once installed, requests
+that are not profiled cost one header lookup and one random draw.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import secrets
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+FORMATS = {"speedscope": "speedscope.json", "html": "html"}
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles sampled or explicitly requested requests."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = settings.PROFILING_SAMPLE_RATE,
+        token: Optional[str] = settings.PROFILING_TOKEN,
+        directory: str = settings.PROFILING_DIR,
+        interval: float = settings.PROFILING_INTERVAL_SECONDS,
+        output_format: str = settings.PROFILING_FORMAT,
+        max_concurrent: int = settings.PROFILING_MAX_CONCURRENT,
+    ):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown profile format: {output_format}")
+        self.app = app
+        self.sample_rate = sample_rate
+        self.token = token.encode() if token else None
+        self.directory = Path(directory)
+        self.interval = interval
+        self.output_format = output_format
+        self.max_concurrent = max_concurrent
+        self._active = 0
+
+    def _requested(self, scope: Scope) -> bool:
+        if self.token is None:
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return secrets.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = self._requested(scope)
+        if not requested and not (
+            self._active < self.max_concurrent and random.random() < self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        profile_id = uuid.uuid4().hex[:12]
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and requested:
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        self._active += 1
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session = profiler.stop()
+            self._active -= 1
+            elapsed = time.perf_counter() - start
+            # The response is complete; render off the event loop
+            await asyncio.to_thread(self._write, session, scope, profile_id, elapsed)
+
+    def _write(self, session, scope: Scope, profile_id: str, elapsed: float) -> None:
+        from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_")[:80] or "root"
+        name = (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{profile_id}-{scope['method']}-"
+            f"{slug}-{elapsed * 1000:.0f}ms.{FORMATS[self.output_format]}"
+        )
+        renderer = (
+            SpeedscopeRenderer()
+            if self.output_format == "speedscope"
+            else HTMLRenderer()
+        )
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / name).write_text(renderer.render(session))
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", name, e)
+            return
+        logger.info("Wrote request profile %s", self.directory / name)
@@ -0,0 +1,70 @@
+"""
+Fast JSON responses.
+
+The app renders JSON with orjson (``ORJSONResponse`` is its default
+response class). For a handler with a ``response_model`` that returns plain
+data, FastAPI still validates the data against the model and walks it with
+``jsonable_encoder`` before encoding it, which for large ProseMirror
+documents costs more than the rest of the request. ``trusted_response``
+skips both for data that is already in the response model's shape, and
+``raw_json`` embeds JSON text (such as a JSONB column read as text) in the
+output without decoding and re-encoding it.
+"""
+
+from functools import lru_cache
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.config import settings
+
+
+def raw_json(text: str) -> orjson.Fragment:
+    """Wrap valid JSON text so orjson writes it out unchanged."""
+    return orjson.Fragment(text)
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def trusted_response(
+    content: Any,
+    model: Any = None,
+    response: Optional[Response] = None,
+    status_code: int = 200,
+) -> ORJSONResponse:
+    """
+    Respond with data that already matches the route's response model.
+
+    Returning a response object bypasses FastAPI's validation and encoding
+    of the handler's result, so only pass data the app built itself from
+    validated input or stored rows. With ``VALIDATE_TRUSTED_RESPONSES`` set
+    the encoded body is still validated against ``model``.
+
+    Args:
+        content: Data orjson can encode; may contain ``raw_json`` fragments
+        model: The route's response model, for optional validation
+        response: The handler's injected ``Response``, whose headers and
+            status code (if set) are carried over
+        status_code: Status code when ``response`` does not set one
+
+    Returns:
+        ORJSONResponse: The encoded response
+    """
+    result = ORJSONResponse(content, status_code=status_code)
+    if response is not None:
+        if response.status_code:
+            result.status_code = response.status_code
+        result.headers.raw.extend(response.headers.raw)
+    if settings.VALIDATE_TRUSTED_RESPONSES and model is not None:
+        try:
+            _adapter(model).validate_json(result.body)
+        except ValidationError as e:
+            raise ResponseValidationError(e.errors(include_url=False), body=content)
+    return result
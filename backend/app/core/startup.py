@@ -0,0 +1,176 @@
+"""
+Startup timing report.
+
+``startup_timer`` records how long each module takes to import, from the
+moment this module is imported until the app is ready (``app.main`` imports
+it before anything else). When the lifespan startup has finished,
+``startup_timer.ready()`` logs how long startup took, split into imports
+and lifespan startup, with the packages and modules that were slowest to
+import, and publishes the phases as the ``app_startup_seconds`` gauge.
+
+Import times are measured per module excluding the modules it imports in
+turn (like the "self" column of ``python -X importtime``), so they add up
+to the total import time without double counting.
+
+This module must stay cheap to import and must not import the app.
+"""
+
+import importlib.abc
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPORT_TOP = 10
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process started (Linux only)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesized command name; starttime is #22
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module's loader for the duration of its import."""
+
+    def __init__(self, loader: Any, timer: "StartupTimer"):
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        self._timer._enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._exit(module.__name__)
+            # Leave the module with its real loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self._loader
+            module.__loader__ = self._loader
+
+
+class StartupTimer(importlib.abc.MetaPathFinder):
+    """Times module imports until ``ready`` is called."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.process_age = _process_age()  # at the time this module loaded
+        self.imports: Dict[str, float] = {}  # module -> own import seconds
+        self.lifespan_started: Optional[float] = None
+        self.report: Optional[Dict[str, Any]] = None
+        self._stack: List[Tuple[float, float]] = []  # (start, children seconds)
+        self._finding = False
+
+    def install(self) -> None:
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        if self._finding:
+            return None
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._finding = False
+
+    def _enter(self) -> None:
+        # Nested imports run while the outer module's finder call has returned
+        self._stack.append((time.perf_counter(), 0.0))
+
+    def _exit(self, name: str) -> None:
+        start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.imports[name] = elapsed - children
+        if self._stack:
+            outer_start, outer_children = self._stack[-1]
+            self._stack[-1] = (outer_start, outer_children + elapsed)
+
+    def lifespan_start(self) -> None:
+        """Mark the start of the lifespan startup (the end of importing)."""
+        self.lifespan_started = time.perf_counter()
+
+    def ready(self) -> Dict[str, Any]:
+        """Stop timing imports, then log and publish the startup report."""
+        self.uninstall()
+        now = time.perf_counter()
+        lifespan_started = self.lifespan_started or now
+        packages: Dict[str, float] = defaultdict(float)
+        for name, seconds in self.imports.items():
+            packages[name.split(".")[0]] += seconds
+        self.report = {
+            "seconds": round(now - self.started, 3),
+            "imports_seconds": round(lifespan_started - self.started, 3),
+            "lifespan_seconds": round(now - lifespan_started, 3),
+            # Includes interpreter and server startup before the app loaded
+            "since_process_start_seconds": (
+                round(self.process_age + now - self.started, 3)
+                if self.process_age is not None
+                else None
+            ),
+            "modules_imported": len(self.imports),
+            "slowest_packages": _top(packages),
+            "slowest_modules": _top(self.imports),
+        }
+        self._publish()
+        return self.report
+
+    def _publish(self) -> None:
+        from app.core.metrics import STARTUP_SECONDS
+
+        report = self.report
+        STARTUP_SECONDS.labels("imports").set(report["imports_seconds"])
+        STARTUP_SECONDS.labels("lifespan").set(report["lifespan_seconds"])
+        if report["since_process_start_seconds"] is not None:
+            STARTUP_SECONDS.labels("process").set(report["since_process_start_seconds"])
+        logger.info(
+            "Ready in %.3fs (imports %.3fs, lifespan %.3fs, %s since process "
+            "start); slowest imports: %s",
+            report["seconds"],
+            report["imports_seconds"],
+            report["lifespan_seconds"],
+            (
+                f"{report['since_process_start_seconds']:.3f}s"
+                if report["since_process_start_seconds"] is not None
+                else "unknown"
+            ),
+            ", ".join(f"{name} {ms}ms" for name, ms in report["slowest_packages"]),
+        )
+
+
+def _top(seconds: Dict[str, float]) -> List[Tuple[str, float]]:
+    ordered = sorted(seconds.items(), key=lambda item: item[1], reverse=True)
+    return [(name, round(value * 1000, 1)) for name, value in ordered[:REPORT_TOP]]
+
+
+# Global startup timer, timing imports from here on
+startup_timer = StartupTimer()
+startup_timer.install()
@@ -2,12 +2,46 @@
 FastAPI main application entry point for Knowledge Workspace Platform.
 """
 
-from fastapi import FastAPI
+# Imported first, to time the imports below (see app.core.startup)
+from app.core.startup import startup_timer
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1.api import api_router
+from app.core.cache import cache
 from app.core.config import settings
+from app.core.database import async_engine, close_db
+from app.core.metrics import (
+    CONTENT_TYPE_LATEST,
+    MetricsMiddleware,
+    instrument_engine,
+    render_metrics,
+)
+from app.core.profiling import ProfilingMiddleware
+from app.services.ai_service import ai_service
+from app.services.execution_queue import execution_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown hooks."""
+    startup_timer.lifespan_start()
+    await cache.start()
+    await ai_service.start()
+    if settings.EXECUTION_WORKER_IN_PROCESS:
+        await execution_worker.start()
+    startup_timer.ready()
+    yield
+    await execution_worker.stop()
+    await ai_service.aclose()
+    await cache.close()
+    await close_db()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -17,6 +51,8 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Security middleware
@@ -34,6 +70,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics (outermost, so the timings include the other middleware)
+if settings.METRICS_ENABLED:
+    instrument_engine(async_engine.sync_engine)
+    app.add_middleware(MetricsMiddleware)
+
+# Opt-in request profiling, by sampling or an "X-Profile" header
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -54,6 +99,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus metrics endpoint."""
+        # Passed as a header: the media type already names its charset
+        return Response(
+            render_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST}
+        )
+
+
 if __name__ == "__main__":
     import uvicorn
     
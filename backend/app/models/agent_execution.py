@@ -0,0 +1,60 @@
+"""
+Agent execution (job queue) database model.
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.core.database import Base
+
+
+class AgentExecution(Base):
+    """Queued, running or finished asynchronous agent execution."""
+
+    __tablename__ = "agent_executions"
+
+    id = Column(
+        UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    organization_id = Column(
+        UUID(as_uuid=False), ForeignKey("organizations.id", ondelete="CASCADE")
+    )
+    agent_id = Column(Text, nullable=False)
+    context = Column(JSONB, nullable=False)
+    parameters = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    priority = Column(Integer, nullable=False, server_default="0")  # higher first
+    status = Column(Text, nullable=False, server_default="queued")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    worker_id = Column(Text)
+    lease_expires_at = Column(DateTime(timezone=True))
+    result = Column(JSONB)
+    error = Column(Text)
+    created_by = Column(UUID(as_uuid=False))
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Claim scans only touch queued rows
+        Index(
+            "ix_agent_executions_queued",
+            "priority",
+            "created_at",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        # Lease expiry checks only touch running rows
+        Index(
+            "ix_agent_executions_running_lease",
+            "lease_expires_at",
+            postgresql_where=text("status = 'running'"),
+        ),
+    )
+
+    # Load server-generated id/timestamps via RETURNING after writes
+    __mapper_args__ = {"eager_defaults": True}
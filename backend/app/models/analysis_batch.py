@@ -0,0 +1,21 @@
+"""
+Provider analysis batch database model.
+"""
+
+from sqlalchemy import Column, DateTime, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.database import Base
+
+
+class AnalysisBatch(Base):
+    """Submitted provider batch and the documents each of its requests covers."""
+
+    __tablename__ = "analysis_batches"
+
+    id = Column(Text, primary_key=True)  # "<provider>:<provider batch id>"
+    # custom_id -> {"document_ids": [...], "cache_key": ...}
+    manifest = Column(JSONB, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,116 @@
+"""
+Document database model.
+"""
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Text,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.orm import deferred
+
+from app.core.database import Base
+from app.models import organization, project  # noqa: F401  (FK targets)
+
+
+class ContentBlob(Base):
+    """
+    Content-addressed, reference-counted ProseMirror document body.
+
+    Documents and version snapshots point at blobs by hash, so duplicates
+    and template instances share one body until they are edited.
+    """
+
+    __tablename__ = "content_blobs"
+
+    hash = Column(Text, primary_key=True)  # SHA-256 of canonical JSON
+    content = Column(JSONB, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, server_default="1")
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class Document(Base):
+    """Document table; the ProseMirror body lives in ``content_blobs``."""
+
+    __tablename__ = "documents"
+
+    id = Column(
+        UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    organization_id = Column(
+        UUID(as_uuid=False),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    project_id = Column(
+        UUID(as_uuid=False), ForeignKey("projects.id", ondelete="CASCADE")
+    )
+    title = Column(Text, nullable=False)
+    content_hash = Column(Text, ForeignKey("content_blobs.hash"), nullable=False)
+    version = Column(Integer, nullable=False, server_default="1")
+    type = Column(Text, nullable=False, server_default="custom")
+    template_id = Column(
+        UUID(as_uuid=False), ForeignKey("documents.id", ondelete="SET NULL")
+    )
+    created_by = Column(UUID(as_uuid=False))  # references auth users
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # Weighted title + body text for full-text search; never loaded by default
+    search_vector = deferred(Column(TSVECTOR))
+
+    __table_args__ = (
+        # Keyset pagination: ORDER BY updated_at DESC, id DESC within an org
+        Index(
+            "ix_documents_org_updated_at_id",
+            "organization_id",
+            updated_at.desc(),
+            id.desc(),
+        ),
+        Index("ix_documents_search_vector", search_vector, postgresql_using="gin"),
+    )
+    # Load server-generated id/timestamps via RETURNING after writes
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class DocumentVersion(Base):
+    """
+    Document version history entry.
+
+    Every ``VERSION_SNAPSHOT_INTERVAL`` versions store a full snapshot (a
+    reference to the content blob with ``content_hash``); the versions in
+    between store a JSON Patch against the previous version.
+    """
+
+    __tablename__ = "document_versions"
+
+    document_id = Column(
+        UUID(as_uuid=False),
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    version = Column(Integer, primary_key=True)
+    # Version of the snapshot this entry's delta chain starts from
+    base_version = Column(Integer, nullable=False)
+    is_snapshot = Column(Boolean, nullable=False)
+    payload = Column(JSONB)  # JSON Patch; None for snapshots
+    title = Column(Text, nullable=False)
+    content_hash = Column(Text, nullable=False)
+    content_size = Column(Integer, nullable=False)
+    created_by = Column(UUID(as_uuid=False))
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
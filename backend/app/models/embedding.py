@@ -0,0 +1,20 @@
+"""
+Document embedding cache model.
+"""
+
+from sqlalchemy import Column, DateTime, LargeBinary, Text, func
+
+from app.core.database import Base
+
+
+class DocumentEmbedding(Base):
+    """Embedding of a content blob's text, keyed by content hash and model."""
+
+    __tablename__ = "document_embeddings"
+
+    content_hash = Column(Text, primary_key=True)
+    model = Column(Text, primary_key=True)
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,30 @@
+"""
+Organization database model.
+"""
+
+from sqlalchemy import Column, DateTime, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.core.database import Base
+
+
+class Organization(Base):
+    """Organization (multi-tenant root) table."""
+
+    __tablename__ = "organizations"
+
+    id = Column(
+        UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    name = Column(Text, nullable=False)
+    slug = Column(Text, unique=True, nullable=False)
+    settings = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    # Load server-generated id/timestamps via RETURNING after writes
+    __mapper_args__ = {"eager_defaults": True}
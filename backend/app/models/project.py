@@ -0,0 +1,37 @@
+"""
+Project database model.
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.core.database import Base
+
+
+class Project(Base):
+    """Project table, scoped to an organization."""
+
+    __tablename__ = "projects"
+
+    id = Column(
+        UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    organization_id = Column(
+        UUID(as_uuid=False),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    name = Column(Text, nullable=False)
+    description = Column(Text, nullable=False, server_default="")
+    settings = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    created_by = Column(UUID(as_uuid=False))
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    # Load server-generated id/timestamps via RETURNING after writes
+    __mapper_args__ = {"eager_defaults": True}
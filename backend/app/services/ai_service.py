@@ -2,12 +2,44 @@
 AI service for agent management and execution.
 """
 
-from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import time
+from dataclasses import asdict
+from typing import (
+    Any, AsyncGenerator, AsyncIterator, Dict, List, Optional, Set, Tuple
+)
 from pydantic import BaseModel
-import openai
-import anthropic
 
+from app.core.cache import create_cache
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import (
+    LLM_IN_PROGRESS,
+    LLM_REQUEST_SECONDS,
+    LLM_TIME_TO_FIRST_TOKEN_SECONDS,
+    record_llm_usage,
+)
+from app.models.analysis_batch import AnalysisBatch
+from app.services.chunking import Chunk, chunk_text, estimate_tokens
+from app.services.coalescing import StreamCoalescer
+from app.services.content_hash import content_hash
+from app.services.http_pool import HTTPPool
+from app.services.llm_providers import (
+    BatchResult,
+    Completion,
+    CompletionRequest,
+    LLMProvider,
+    ProviderError,
+    ProviderRateLimitError,
+    StreamEvent,
+    Usage,
+    collect,
+    create_provider,
+    preload_sdks,
+)
+from app.services.rate_limiting import RateLimiter, RateLimitExceeded
+from app.services.semantic_search import semantic_search_service
 
 
 class DocumentContext(BaseModel):
@@ -30,12 +62,13 @@ class AIAgentConfig(BaseModel):
     """Configuration for AI agents."""
     name: str
     description: str
-    model_provider: str = "openai"  # openai, anthropic
+    model_provider: str = "openai"  # openai, anthropic, fake
     model_name: str = "gpt-4"
     capabilities: List[str] = []
     system_prompt: str = ""
     max_tokens: int = 1000
     temperature: float = 0.7
+    cache_nondeterministic: bool = False  # cache results even if temperature > 0
 
 
 class AIService:
@@ -43,8 +76,518 @@ class AIService:
     
     def __init__(self):
         self.agents: Dict[str, AIAgentConfig] = {}
+        self._providers: Dict[str, LLMProvider] = {}
+        self.http_pool = HTTPPool()
+        self.result_cache = create_cache(
+            "ai",
+            ttl=settings.AI_CACHE_TTL_SECONDS,
+            local_ttl=settings.AI_CACHE_LOCAL_TTL_SECONDS,
+            local_max_bytes=settings.AI_CACHE_LOCAL_MAX_BYTES
+        )
+        self.tokens_saved = Usage()
+        self.provider_usage = Usage()  # everything billed by providers
+        self.coalescer = StreamCoalescer(self.result_cache.redis)
+        self.rate_limiter = RateLimiter()
+        self._preload: Optional[asyncio.Task] = None
         self._initialize_default_agents()
     
+    def provider(self, name: str) -> LLMProvider:
+        """Get the long-lived client for a model provider."""
+        if name not in self._providers:
+            self._providers[name] = create_provider(
+                name, http_client=self.http_pool.client
+            )
+        return self._providers[name]
+    
+    async def start(self):
+        """
+        Prepare for the first request without delaying readiness.
+        
+        Provider SDKs are imported on first use; this imports the ones the
+        agents use in a background thread so that first AI request does not
+        pay for it.
+        """
+        if settings.AI_PRELOAD_PROVIDER_SDKS and self._preload is None:
+            names = {agent.model_provider for agent in self.agents.values()}
+            self._preload = asyncio.create_task(asyncio.to_thread(preload_sdks, names))
+    
+    async def aclose(self):
+        """Close provider clients, their connection pool and the result cache."""
+        if self._preload is not None:
+            # An import cannot be interrupted; let it finish
+            await asyncio.gather(self._preload, return_exceptions=True)
+            self._preload = None
+        for provider in self._providers.values():
+            await provider.aclose()
+        self._providers.clear()
+        await self.http_pool.aclose()
+        await self.result_cache.close()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Utilisation of the providers' shared HTTP connection pool."""
+        return {
+            **self.http_pool.stats(),
+            "providers": sorted(self._providers)
+        }
+    
+    def _cacheable(self, agent: AIAgentConfig, request: CompletionRequest) -> bool:
+        """Whether a request's result may be reused for identical requests."""
+        if not settings.AI_CACHE_ENABLED:
+            return False
+        return request.temperature == 0 or agent.cache_nondeterministic
+    
+    def _cache_key(self, agent: AIAgentConfig, request: CompletionRequest) -> str:
+        # The request carries the content, model, system prompt, temperature
+        # and every other parameter that can change the result
+        return "completion:" + content_hash(
+            {"provider": agent.model_provider, **asdict(request)}
+        )
+    
+    def _provider_stream(
+        self,
+        agent: AIAgentConfig,
+        request: CompletionRequest,
+        organization_id: Optional[str] = None
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """
+        Stream from the provider, sharing identical calls already in flight.
+        
+        Calls that reach the provider are rate limited and charged to
+        ``organization_id``; calls that join another one are not. With rate
+        limiting on, only calls for the same organization are shared, so a
+        caller never joins a call admitted, or rejected, on another
+        organization's quota.
+        """
+        provider = self.provider(agent.model_provider)
+        
+        def call(request: CompletionRequest) -> AsyncGenerator[StreamEvent, None]:
+            return self._metered(
+                agent.model_provider, request, provider.stream(request)
+            )
+        
+        def start() -> AsyncGenerator[StreamEvent, None]:
+            if not settings.AI_RATE_LIMIT_ENABLED:
+                return call(request)
+            return self.rate_limiter.stream(
+                agent.model_provider, organization_id, request, call
+            )
+        
+        if not settings.AI_COALESCE_ENABLED:
+            return start()
+        # Coalescing only shares concurrent calls, so unlike the result
+        # cache it also applies to nondeterministic requests
+        key = self._cache_key(agent, request)
+        if settings.AI_RATE_LIMIT_ENABLED:
+            key += f":{organization_id or ''}"
+        return self.coalescer.stream(key, start)
+    
+    async def _metered(
+        self,
+        provider: str,
+        request: CompletionRequest,
+        events: AsyncGenerator[StreamEvent, None]
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Time a provider call and add its usage to the totals."""
+        start = time.perf_counter()
+        first_token = True
+        outcome = "cancelled"
+        in_progress = LLM_IN_PROGRESS.labels(provider)
+        in_progress.inc()
+        try:
+            async for event in events:
+                if first_token and event.text:
+                    first_token = False
+                    LLM_TIME_TO_FIRST_TOKEN_SECONDS.labels(
+                        provider, request.model
+                    ).observe(time.perf_counter() - start)
+                if event.done:
+                    outcome = "ok"
+                    self.provider_usage += event.usage
+                    record_llm_usage(provider, request.model, event.usage)
+                yield event
+        except ProviderRateLimitError:
+            outcome = "rate_limited"
+            raise
+        except ProviderError:
+            outcome = "error"
+            raise
+        finally:
+            in_progress.dec()
+            LLM_REQUEST_SECONDS.labels(provider, request.model, outcome).observe(
+                time.perf_counter() - start
+            )
+            await events.aclose()
+    
+    def _record_hit(self, cached: Dict[str, Any]):
+        self.tokens_saved.input_tokens += cached["usage"]["input_tokens"]
+        self.tokens_saved.output_tokens += cached["usage"]["output_tokens"]
+    
+    async def _complete(
+        self,
+        agent: AIAgentConfig,
+        request: CompletionRequest,
+        organization_id: Optional[str] = None
+    ) -> Tuple[Completion, bool]:
+        """
+        Run a completion, reusing a cached result when allowed.
+        
+        Returns:
+            Tuple of the completion and whether it came from the cache (in
+            which case its usage is zero)
+        """
+        if not self._cacheable(agent, request):
+            return await collect(
+                self._provider_stream(agent, request, organization_id)
+            ), False
+        
+        key = self._cache_key(agent, request)
+        cached = await self.result_cache.get(key)
+        if cached is not None:
+            self._record_hit(cached)
+            return Completion(cached["text"], Usage(), cached["stop_reason"]), True
+        
+        completion = await collect(
+            self._provider_stream(agent, request, organization_id)
+        )
+        if not completion.coalesced:
+            # As in _cached_stream: only the caller that made the call
+            # caches it, so the entry carries the usage a hit saves
+            await self.result_cache.set(key, {
+                "text": completion.text,
+                "usage": asdict(completion.usage),
+                "stop_reason": completion.stop_reason
+            })
+        return completion, False
+    
+    def _stream(
+        self,
+        agent: AIAgentConfig,
+        request: CompletionRequest,
+        organization_id: Optional[str] = None
+    ) -> AsyncGenerator[StreamEvent, None]:
+        if not self._cacheable(agent, request):
+            return self._provider_stream(agent, request, organization_id)
+        return self._cached_stream(agent, request, organization_id)
+    
+    async def _cached_stream(
+        self,
+        agent: AIAgentConfig,
+        request: CompletionRequest,
+        organization_id: Optional[str] = None
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Replay a cached result, or stream from the provider and cache it."""
+        key = self._cache_key(agent, request)
+        cached = await self.result_cache.get(key)
+        if cached is not None:
+            self._record_hit(cached)
+            yield StreamEvent(text=cached["text"])
+            yield StreamEvent(done=True, stop_reason=cached["stop_reason"], cached=True)
+            return
+        
+        parts = []
+        events = self._provider_stream(agent, request, organization_id)
+        try:
+            async for event in events:
+                if event.done and not event.coalesced:
+                    # The caller that made the call caches it, with its usage
+                    await self.result_cache.set(key, {
+                        "text": "".join(parts),
+                        "usage": asdict(event.usage),
+                        "stop_reason": event.stop_reason
+                    })
+                else:
+                    parts.append(event.text)
+                yield event
+        finally:
+            await events.aclose()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Result cache hit rate, the tokens it has saved, coalescing counters,
+        and how much of the input billed by providers was a prompt-cache hit.
+        """
+        usage = self.provider_usage
+        return {
+            **self.result_cache.stats.to_dict(),
+            "tokens_saved": asdict(self.tokens_saved),
+            "coalescing": self.coalescer.stats.to_dict(),
+            "prompt_cache": {
+                "input_tokens": usage.input_tokens,
+                "cached_input_tokens": usage.cached_input_tokens,
+                "cache_write_input_tokens": usage.cache_write_input_tokens,
+                "uncached_input_tokens": usage.uncached_input_tokens,
+                "hit_rate": (
+                    usage.cached_input_tokens / usage.input_tokens
+                    if usage.input_tokens else 0.0
+                )
+            }
+        }
+    
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Admission counters, bucket levels and adaptive concurrency limits."""
+        return self.rate_limiter.snapshot()
+    
+    def _request(
+        self,
+        agent_id: str,
+        user_message: str,
+        context: str = ""
+    ) -> Tuple[AIAgentConfig, CompletionRequest]:
+        """
+        Build a completion request for one of the configured agents.
+        
+        Args:
+            agent_id: Agent to run
+            user_message: The part of the prompt that changes between calls
+            context: Material shared by related calls; it follows the system
+                prompt in the provider-cached prefix
+        """
+        agent = self.agents[agent_id]
+        request = CompletionRequest(
+            model=agent.model_name,
+            system=agent.system_prompt,
+            messages=[{"role": "user", "content": user_message}],
+            max_tokens=agent.max_tokens,
+            temperature=agent.temperature,
+            context=context
+        )
+        return agent, request
+    
+    @staticmethod
+    def _analysis_context(
+        document_context: DocumentContext,
+        analysis_type: str,
+        instructions: str = ""
+    ) -> str:
+        # The same for every call about one document, so chunk and reduce
+        # calls share a cached prefix
+        lines = [
+            f"Analysis type: {analysis_type}",
+            f"Document title: {document_context.title}"
+        ]
+        if instructions:
+            lines.append(instructions)
+        return "\n\n".join(lines)
+    
+    def _analysis_request(
+        self,
+        document_context: DocumentContext,
+        analysis_type: str
+    ) -> Tuple[AIAgentConfig, CompletionRequest]:
+        return self._request(
+            "document_analyzer",
+            document_context.content,
+            self._analysis_context(document_context, analysis_type)
+        )
+    
+    def _chunk_request(
+        self,
+        document_context: DocumentContext,
+        analysis_type: str,
+        chunk: Chunk
+    ) -> Tuple[AIAgentConfig, CompletionRequest]:
+        # Only the chunk's own content goes into the prompt (not its position),
+        # so an unchanged chunk maps to the same cached result after edits
+        return self._request(
+            "document_analyzer",
+            chunk.text,
+            self._analysis_context(
+                document_context,
+                analysis_type,
+                "The user message is one part of a longer document. Analyze "
+                "only this part; the analyses of all parts will be combined "
+                "afterwards."
+            )
+        )
+    
+    def _reduce_request(
+        self,
+        document_context: DocumentContext,
+        analysis_type: str,
+        partials: List[str]
+    ) -> Tuple[AIAgentConfig, CompletionRequest]:
+        parts = "\n\n".join(
+            f"--- Part {i} ---\n{partial}" for i, partial in enumerate(partials, 1)
+        )
+        return self._request(
+            "document_analyzer",
+            parts,
+            self._analysis_context(
+                document_context,
+                analysis_type,
+                "The user message holds analyses of consecutive parts of the "
+                "document. Combine them into one analysis of the whole, merging "
+                "overlapping points and resolving contradictions."
+            )
+        )
+    
+    async def _complete_all(
+        self,
+        requests: List[Tuple[AIAgentConfig, CompletionRequest]],
+        organization_id: Optional[str] = None
+    ) -> Tuple[List[str], Usage, bool]:
+        """
+        Run completions concurrently, at most ``ANALYSIS_CONCURRENCY`` at a time.
+        
+        Returns:
+            Tuple of the texts in request order, their total usage, and
+            whether every result came from the cache
+        """
+        semaphore = asyncio.Semaphore(settings.ANALYSIS_CONCURRENCY)
+        
+        async def run(agent: AIAgentConfig, request: CompletionRequest):
+            async with semaphore:
+                return await self._complete(agent, request, organization_id)
+        
+        tasks = [asyncio.ensure_future(run(*item)) for item in requests]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        usage = sum((completion.usage for completion, _ in results), Usage())
+        return (
+            [completion.text for completion, _ in results],
+            usage,
+            all(cached for _, cached in results)
+        )
+    
+    async def _partial_analyses(
+        self,
+        document_context: DocumentContext,
+        analysis_type: str,
+        chunks: List[Chunk]
+    ) -> Tuple[List[str], Usage, bool]:
+        """
+        Map step: analyze each chunk, then combine groups of partial analyses
+        until they fit in one final reduce prompt.
+        """
+        partials, usage, cached = await self._complete_all([
+            self._chunk_request(document_context, analysis_type, chunk)
+            for chunk in chunks
+        ], document_context.organization_id)
+        max_tokens = settings.ANALYSIS_CHUNK_MAX_TOKENS
+        while sum(estimate_tokens(partial) for partial in partials) > max_tokens:
+            groups: List[List[str]] = [[]]
+            group_tokens = 0
+            for partial in partials:
+                tokens = estimate_tokens(partial)
+                if groups[-1] and group_tokens + tokens > max_tokens:
+                    groups.append([])
+                    group_tokens = 0
+                groups[-1].append(partial)
+                group_tokens += tokens
+            if len(groups) == len(partials):
+                break  # Each partial alone fills the budget; reduce as is
+            
+            partials, group_usage, group_cached = await self._complete_all([
+                self._reduce_request(document_context, analysis_type, group)
+                for group in groups
+            ], document_context.organization_id)
+            usage += group_usage
+            cached = cached and group_cached
+        return partials, usage, cached
+    
+    async def _analyze(
+        self,
+        document_context: DocumentContext,
+        analysis_type: str
+    ) -> Dict[str, Any]:
+        """
+        Analyze a document in one call, or map-reduce over its chunks when
+        it is longer than ``ANALYSIS_CHUNK_MAX_TOKENS``.
+        
+        Returns:
+            Dict with the ``analysis`` text, total ``usage``, ``cached`` (all
+            calls served from the cache) and the number of ``chunks``
+        """
+        chunks = chunk_text(document_context.content)
+        if len(chunks) <= 1:
+            agent, request = self._analysis_request(document_context, analysis_type)
+            completion, cached = await self._complete(
+                agent, request, document_context.organization_id
+            )
+            return {
+                "analysis": completion.text,
+                "usage": completion.usage,
+                "cached": cached,
+                "chunks": 1
+            }
+        
+        partials, usage, cached = await self._partial_analyses(
+            document_context, analysis_type, chunks
+        )
+        agent, request = self._reduce_request(
+            document_context, analysis_type, partials
+        )
+        completion, final_cached = await self._complete(
+            agent, request, document_context.organization_id
+        )
+        return {
+            "analysis": completion.text,
+            "usage": usage + completion.usage,
+            "cached": cached and final_cached,
+            "chunks": len(chunks)
+        }
+    
+    async def _stream_chunked(
+        self,
+        document_context: DocumentContext,
+        analysis_type: str,
+        chunks: List[Chunk]
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Analyze the chunks, then stream the final reduce step."""
+        partials, usage, cached = await self._partial_analyses(
+            document_context, analysis_type, chunks
+        )
+        agent, request = self._reduce_request(
+            document_context, analysis_type, partials
+        )
+        events = self._stream(agent, request, document_context.organization_id)
+        try:
+            async for event in events:
+                if event.done:
+                    event = StreamEvent(
+                        done=True,
+                        usage=usage + event.usage,
+                        stop_reason=event.stop_reason,
+                        cached=cached and event.cached
+                    )
+                yield event
+        finally:
+            await events.aclose()
+    
+    def _generation_request(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        template_type: Optional[str]
+    ) -> Tuple[AIAgentConfig, CompletionRequest]:
+        # The context (typically Memory Bank content) is reused across
+        # prompts; sorted keys keep its serialization, and the prefix, stable
+        shared = ""
+        if context:
+            shared = "Context:\n" + json.dumps(
+                context, indent=2, sort_keys=True, default=str
+            )
+        if template_type:
+            prompt = f"Template type: {template_type}\n\n{prompt}"
+        return self._request("content_generator", prompt, shared)
+    
+    def _memory_bank_request(
+        self,
+        current_context: Dict[str, Any],
+        requested_updates: List[str]
+    ) -> Tuple[AIAgentConfig, CompletionRequest]:
+        updates = "\n".join(f"- {update}" for update in requested_updates)
+        current = json.dumps(current_context, indent=2, sort_keys=True, default=str)
+        return self._request(
+            "memory_bank_assistant",
+            f"Requested updates:\n{updates}",
+            f"Current context:\n{current}"
+        )
+    
     def _initialize_default_agents(self):
         """Initialize default system agents."""
         
@@ -64,7 +607,9 @@ class AIService:
 
 Provide your analysis in a structured format.""",
             max_tokens=1500,
-            temperature=0.3
+            temperature=0.3,
+            # Re-analyzing unchanged content should not cost another call
+            cache_nondeterministic=True
         )
         
         self.agents["document_analyzer"] = doc_analyzer_config
@@ -109,6 +654,11 @@ Focus on maintaining clear, actionable, and up-to-date project documentation."""
         )
         
         self.agents["memory_bank_assistant"] = memory_bank_config
+        
+        if settings.AI_PROVIDER_OVERRIDE:
+            # e.g. "fake", to load-test without calling a real provider
+            for agent in self.agents.values():
+                agent.model_provider = settings.AI_PROVIDER_OVERRIDE
     
     async def analyze_document(
         self, 
@@ -117,56 +667,423 @@ Focus on maintaining clear, actionable, and up-to-date project documentation."""
     ) -> Dict[str, Any]:
         """Analyze a document using the document analyzer agent."""
         try:
-            # Simple mock response for now
+            result = await self._analyze(document_context, analysis_type)
             return {
-                "analysis": f"Analysis of document '{document_context.title}' completed. This is a placeholder response.",
+                "analysis": result["analysis"],
                 "document_id": document_context.document_id,
-                "analysis_type": analysis_type
+                "analysis_type": analysis_type,
+                "usage": asdict(result["usage"]),
+                "cached": result["cached"],
+                "chunks": result["chunks"]
             }
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
                 "document_id": document_context.document_id
             }
     
+    def _batch_key(
+        self,
+        document_context: DocumentContext,
+        analysis_type: str
+    ) -> str:
+        # Everything an analysis depends on besides the agent configuration
+        return content_hash({
+            "title": document_context.title,
+            "content": document_context.content,
+            "analysis_type": analysis_type
+        })
+    
+    async def analyze_documents(
+        self,
+        documents: AsyncIterator[Tuple[DocumentContext, str]],
+        concurrency: int = settings.ANALYSIS_BATCH_CONCURRENCY
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Analyze many documents, yielding each result as soon as it is ready.
+        
+        Documents with the same title, content and analysis type as one
+        earlier in the batch are analyzed once; their results name the
+        analyzed document in ``duplicate_of``, carry no usage and leave out
+        the ``analysis`` text, which is only sent with the original. At most
+        ``concurrency`` documents are analyzed at a time, and ``documents``
+        is only read as slots free up. Calls the rate limiter rejects are
+        retried once their ``retry_after`` has passed.
+        
+        Args:
+            documents: ``(document_context, analysis_type)`` pairs
+            concurrency: Documents analyzed at once
+            
+        Yields:
+            One ``analyze_document`` result per document, in completion order
+        """
+        results: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(concurrency)
+        waiting: Dict[str, List[DocumentContext]] = {}  # duplicates by batch key
+        finished: Dict[str, Dict[str, Any]] = {}  # results without their text
+        tasks: Set[asyncio.Task] = set()
+        
+        def without_text(result: Dict[str, Any]) -> Dict[str, Any]:
+            return {key: value for key, value in result.items() if key != "analysis"}
+        
+        def duplicate(result: Dict[str, Any], document_context: DocumentContext):
+            copy = {
+                **without_text(result),
+                "document_id": document_context.document_id
+            }
+            if "error" not in result:
+                copy.update(usage=asdict(Usage()), duplicate_of=result["document_id"])
+            return copy
+        
+        async def analyze(
+            key: str,
+            document_context: DocumentContext,
+            analysis_type: str
+        ):
+            try:
+                while True:
+                    try:
+                        result = await self.analyze_document(
+                            document_context, analysis_type
+                        )
+                        break
+                    except RateLimitExceeded as e:
+                        await asyncio.sleep(e.retry_after or 1.0)
+            finally:
+                slots.release()
+            # Later duplicates do not repeat the text, so the batch does not
+            # keep every analysis in memory
+            finished[key] = without_text(result)
+            results.put_nowait(result)
+            for other in waiting.pop(key):
+                results.put_nowait(duplicate(result, other))
+        
+        async def produce():
+            try:
+                async for document_context, analysis_type in documents:
+                    key = self._batch_key(document_context, analysis_type)
+                    if key in finished:
+                        results.put_nowait(duplicate(finished[key], document_context))
+                    elif key in waiting:
+                        waiting[key].append(document_context)
+                    else:
+                        waiting[key] = []
+                        await slots.acquire()
+                        task = asyncio.create_task(
+                            analyze(key, document_context, analysis_type)
+                        )
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                await asyncio.gather(*tasks)
+            finally:
+                results.put_nowait(None)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                yield result
+            await producer  # re-raises a failure to read the documents
+        finally:
+            for task in (producer, *tasks):
+                task.cancel()
+            await asyncio.gather(producer, *tasks, return_exceptions=True)
+    
+    async def submit_analysis_batch(
+        self,
+        documents: AsyncIterator[Tuple[DocumentContext, str]]
+    ) -> Dict[str, Any]:
+        """
+        Queue documents for analysis through the provider's batch API.
+        
+        Batch APIs cost less and are not rate limited like interactive
+        calls, but finish within hours rather than seconds. Documents are
+        deduplicated as in ``analyze_documents``. Documents too long for a
+        single call are returned as ``skipped``, for ``analyze_documents``.
+        
+        Returns:
+            Dict with the ``batch_id``, the document ids each request
+            covers and the skipped documents
+            
+        Raises:
+            ValueError: If the analyzer's provider has no batch mode, or no
+                document can be submitted
+            ProviderError: If the provider rejects the batch
+        """
+        agent = self.agents["document_analyzer"]
+        provider = self.provider(agent.model_provider)
+        if not provider.supports_batch:
+            raise ValueError(f"{agent.model_provider} has no batch mode")
+        
+        requests: Dict[str, CompletionRequest] = {}
+        manifest: Dict[str, Dict[str, Any]] = {}
+        skipped = []
+        async for document_context, analysis_type in documents:
+            if len(chunk_text(document_context.content)) > 1:
+                skipped.append({
+                    "document_id": document_context.document_id,
+                    "reason": "Too long for a single call"
+                })
+                continue
+            # A SHA-256 hex digest is exactly the 64 characters allowed
+            custom_id = self._batch_key(document_context, analysis_type)
+            if custom_id not in requests:
+                agent, request = self._analysis_request(
+                    document_context, analysis_type
+                )
+                requests[custom_id] = request
+                manifest[custom_id] = {
+                    "document_ids": [],
+                    "cache_key": (
+                        self._cache_key(agent, request)
+                        if self._cacheable(agent, request) else None
+                    )
+                }
+            manifest[custom_id]["document_ids"].append(document_context.document_id)
+        if not requests:
+            raise ValueError("No documents to submit")
+        
+        batch_id = (
+            f"{agent.model_provider}:{await provider.submit_batch(requests)}"
+        )
+        # The manifest is the only link from results back to documents, so
+        # it is stored with the batch rather than in the evictable cache
+        async with AsyncSessionLocal() as db:
+            db.add(AnalysisBatch(id=batch_id, manifest=manifest))
+            await db.commit()
+        return {
+            "batch_id": batch_id,
+            "requests": {
+                custom_id: entry["document_ids"]
+                for custom_id, entry in manifest.items()
+            },
+            "skipped": skipped
+        }
+    
+    async def get_analysis_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Get a submitted batch's progress and, once it has ended, its results.
+        
+        Successful results are also stored in the result cache, so later
+        interactive analyses of the same documents are cache hits.
+        
+        Raises:
+            ValueError: If the batch id is malformed
+            ProviderError: If the provider does not know the batch
+        """
+        provider_name, _, provider_batch_id = batch_id.partition(":")
+        if not provider_batch_id:
+            raise ValueError(f"Invalid batch id: {batch_id}")
+        provider = self.provider(provider_name)
+        if not provider.supports_batch:
+            raise ValueError(f"{provider_name} has no batch mode")
+        status = await provider.batch_status(provider_batch_id)
+        response = {
+            "batch_id": batch_id,
+            "status": status.status,
+            "total": status.total,
+            "succeeded": status.succeeded,
+            "failed": status.failed,
+            "results": None
+        }
+        if not status.ended:
+            return response
+        
+        async with AsyncSessionLocal() as db:
+            batch = await db.get(AnalysisBatch, batch_id)
+        manifest = batch.manifest if batch is not None else {}
+        response["results"] = [
+            await self._batch_result(result, manifest.get(result.custom_id, {}))
+            for result in await provider.batch_results(provider_batch_id)
+        ]
+        return response
+    
+    async def _batch_result(
+        self,
+        result: BatchResult,
+        entry: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        completion = result.completion
+        if completion is not None and entry.get("cache_key"):
+            await self.result_cache.set(entry["cache_key"], {
+                "text": completion.text,
+                "usage": asdict(completion.usage),
+                "stop_reason": completion.stop_reason
+            })
+        return {
+            "request_id": result.custom_id,
+            "document_ids": entry.get("document_ids", []),
+            "analysis": completion.text if completion else None,
+            "usage": asdict(completion.usage) if completion else None,
+            "error": result.error
+        }
+    
     async def generate_content(
         self,
         prompt: str,
         context: Optional[Dict[str, Any]] = None,
-        template_type: Optional[str] = None
+        template_type: Optional[str] = None,
+        organization_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Generate content using the content generator agent."""
         try:
-            # Simple mock response for now
+            agent, request = self._generation_request(prompt, context, template_type)
+            completion, cached = await self._complete(
+                agent, request, organization_id
+            )
             return {
-                "content": f"Generated content based on prompt: {prompt}",
+                "content": completion.text,
                 "template_type": template_type,
+                "usage": asdict(completion.usage),
+                "cached": cached,
                 "success": True
             }
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
                 "success": False
             }
     
+    def stream_analysis(
+        self,
+        document_context: DocumentContext,
+        analysis_type: str = "comprehensive"
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Stream a document analysis as it is generated."""
+        chunks = chunk_text(document_context.content)
+        if len(chunks) > 1:
+            return self._stream_chunked(document_context, analysis_type, chunks)
+        agent, request = self._analysis_request(document_context, analysis_type)
+        return self._stream(agent, request, document_context.organization_id)
+    
+    def stream_content(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        template_type: Optional[str] = None,
+        organization_id: Optional[str] = None
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Stream generated content as it is produced."""
+        agent, request = self._generation_request(prompt, context, template_type)
+        return self._stream(agent, request, organization_id)
+    
     async def update_memory_bank(
         self,
         current_context: Dict[str, Any],
-        requested_updates: List[str]
+        requested_updates: List[str],
+        organization_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Get suggestions for updating Memory Bank documentation."""
         try:
-            # Simple mock response for now
+            agent, request = self._memory_bank_request(
+                current_context, requested_updates
+            )
+            completion, cached = await self._complete(
+                agent, request, organization_id
+            )
             return {
-                "suggestions": "Memory bank update suggestions would be provided here.",
+                "suggestions": completion.text,
+                "usage": asdict(completion.usage),
+                "cached": cached,
                 "success": True
             }
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
                 "success": False
             }
     
+    async def execute_agent(
+        self,
+        agent_id: str,
+        context: Dict[str, Any],
+        parameters: Dict[str, Any],
+        organization_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run one of the configured agents to completion.
+        
+        Unlike the per-agent helpers above, errors are raised rather than
+        returned so that the execution queue can decide whether to retry.
+        
+        Args:
+            agent_id: ``document_analyzer``, ``content_generator`` or
+                ``memory_bank_assistant``
+            context: Agent input: a ``DocumentContext``, ``{"prompt",
+                "context"}`` or ``{"current_context", "requested_updates"}``
+            parameters: Optional ``analysis_type`` or ``template_type``
+            organization_id: Organization charged for the provider calls
+                (a ``DocumentContext`` names its own)
+            
+        Returns:
+            Dict with the agent's ``output``, token ``usage`` and ``cached``
+            
+        Raises:
+            ValueError: If the agent is unknown or the context is invalid
+            ProviderError: If the model provider call fails, including
+                ``RateLimitExceeded`` if it could not be admitted in time
+        """
+        if agent_id == "document_analyzer":
+            result = await self._analyze(
+                DocumentContext(**context),
+                parameters.get("analysis_type", "comprehensive")
+            )
+            return {
+                "output": result["analysis"],
+                "usage": asdict(result["usage"]),
+                "cached": result["cached"],
+                "chunks": result["chunks"]
+            }
+        
+        if agent_id == "content_generator":
+            if not context.get("prompt"):
+                raise ValueError("context.prompt is required")
+            agent, request = self._generation_request(
+                context["prompt"],
+                context.get("context"),
+                parameters.get("template_type")
+            )
+        elif agent_id == "memory_bank_assistant":
+            agent, request = self._memory_bank_request(
+                context.get("current_context", {}),
+                context.get("requested_updates", [])
+            )
+        else:
+            raise ValueError(f"Unknown agent: {agent_id}")
+        
+        completion, cached = await self._complete(agent, request, organization_id)
+        return {
+            "output": completion.text,
+            "stop_reason": completion.stop_reason,
+            "usage": asdict(completion.usage),
+            "cached": cached
+        }
+    
+    async def search_knowledge(
+        self,
+        organization_id: str,
+        query: str,
+        limit: int = 5,
+        project_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Retrieve the organization's documents most relevant to a query."""
+        async with AsyncSessionLocal() as db:
+            return await semantic_search_service.search(
+                db,
+                organization_id,
+                query,
+                limit=limit,
+                project_id=project_id
+            )
+    
     def list_agents(self) -> List[Dict[str, Any]]:
         """List all available agents."""
         return [
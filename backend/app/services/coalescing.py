@@ -0,0 +1,360 @@
+"""
+Single-flight coalescing of identical LLM calls.
+
+Concurrent calls with the same key share one provider stream. Within a
+process, the first caller starts a flight: a background task that runs
+the stream into a shared buffer. Every caller (the first included) replays
+that buffer, so callers that join late still receive the whole response.
+
+Across workers, a Redis lock elects one leader per key. The leader mirrors
+its events into a Redis stream; a flight in another worker that finds the
+lock taken reads that stream from the beginning instead of calling the
+provider. If the leader disappears before sending anything, a follower
+takes over the call.
+
+Only the caller that started a provider call is charged its usage; every
+other caller gets a ``done`` event with zero usage and ``coalesced`` set.
+A flight stops the provider stream once no local caller and no remote
+follower is left, so abandoned calls still end early.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, replace
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import REDIS_BACKOFF_SECONDS
+from app.core.config import settings
+from app.services.llm_providers import (
+    ProviderError,
+    ProviderRateLimitError,
+    StreamEvent,
+    Usage,
+)
+from app.services.rate_limiting import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+STREAM_TTL_SECONDS = 60  # how long a flight's events stay readable
+POLL_MILLISECONDS = 500  # stays below the Redis client's socket timeout
+
+StreamFactory = Callable[[], AsyncGenerator[StreamEvent, None]]
+
+
+@dataclass
+class CoalescingStats:
+    """Coalescing counters."""
+
+    provider_calls: int = 0  # calls made by this process
+    local_joins: int = 0  # callers that joined a flight in this process
+    remote_follows: int = 0  # flights served by another worker's call
+    takeovers: int = 0  # remote leaders that vanished before sending
+    errors: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _text(value: Any) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class _LeaderLost(Exception):
+    """The remote leader stopped without finishing its call."""
+
+
+class _Flight:
+    """One shared call and the events it has produced so far."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.id = uuid.uuid4().hex
+        self.events: List[StreamEvent] = []
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self.led = False  # this process called the provider
+        self.mirrored = False  # events are mirrored to Redis for followers
+        self.joined = 0
+        self.consumers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, event: StreamEvent) -> None:
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.error = error
+        self.finished = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def replay(self) -> AsyncGenerator[StreamEvent, None]:
+        position = 0
+        while True:
+            if position < len(self.events):
+                yield self.events[position]
+                position += 1
+            elif self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
+def _encode(event: StreamEvent) -> Dict[str, Any]:
+    return {
+        "text": event.text,
+        "done": event.done,
+        "usage": asdict(event.usage),
+        "stop_reason": event.stop_reason,
+    }
+
+
+def _decode(record: Dict[str, Any]) -> StreamEvent:
+    return StreamEvent(
+        text=record["text"],
+        done=record["done"],
+        usage=Usage(**record["usage"]),
+        stop_reason=record["stop_reason"],
+    )
+
+
+class StreamCoalescer:
+    """Shares identical in-flight provider streams within and across workers."""
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        namespace: str = "ai:flight",
+        lock_seconds: float = settings.AI_COALESCE_LOCK_SECONDS,
+    ):
+        self.redis = redis
+        self.namespace = namespace
+        self.lock_seconds = lock_seconds
+        self.stats = CoalescingStats()
+        self._flights: Dict[str, _Flight] = {}
+        self._redis_down_until = 0.0
+
+    async def stream(
+        self, key: str, start: StreamFactory
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """
+        Stream the response for ``key``, calling ``start`` only if no
+        identical call is in flight in this process or another worker.
+
+        Args:
+            key: Normalized request key; equal keys must mean equal requests
+            start: Opens the provider stream
+
+        Yields:
+            Text deltas, then one ``done`` event
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(key)
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(flight, start))
+        else:
+            self.stats.local_joins += 1
+
+        first = flight.joined == 0
+        flight.joined += 1
+        flight.consumers += 1
+        try:
+            async for event in flight.replay():
+                if event.done and not (first and flight.led):
+                    event = replace(event, usage=Usage(), coalesced=True)
+                yield event
+        finally:
+            flight.consumers -= 1
+            if flight.consumers == 0 and not flight.finished and not flight.mirrored:
+                # Nobody is listening; stop the provider call
+                self._discard(flight)
+                flight.task.cancel()
+                await asyncio.wait({flight.task})
+
+    def _discard(self, flight: _Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    async def _run(self, flight: _Flight, start: StreamFactory) -> None:
+        try:
+            while True:
+                leader = await self._acquire(flight)
+                if leader is None:
+                    await self._lead(flight, start)
+                    break
+                try:
+                    await self._follow(flight, leader)
+                    break
+                except _LeaderLost:
+                    if flight.events:
+                        raise ProviderError("Shared LLM call was interrupted")
+                    self.stats.takeovers += 1
+            flight.finish()
+        except asyncio.CancelledError:
+            flight.finish(ProviderError("LLM call cancelled"))
+        except Exception as e:
+            flight.finish(e)
+        finally:
+            self._discard(flight)
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, action: str, key: str, error: Exception) -> None:
+        self.stats.errors += 1
+        # Warn once per outage; calls coalesce within this process meanwhile
+        log = logger.warning if self._redis_available() else logger.debug
+        log("Coalescing %s failed for %s: %s", action, key, error)
+        self._redis_down_until = time.monotonic() + REDIS_BACKOFF_SECONDS
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.namespace, *parts))
+
+    async def _acquire(self, flight: _Flight) -> Optional[str]:
+        """Take the cross-worker lock, or return the current leader's flight id."""
+        if not self._redis_available():
+            return None
+        lock_key = self._key("lock", flight.key)
+        try:
+            while True:
+                acquired = await self.redis.set(
+                    lock_key, flight.id, nx=True, px=int(self.lock_seconds * 1000)
+                )
+                if acquired:
+                    flight.mirrored = True
+                    return None
+                leader = await self.redis.get(lock_key)
+                if leader is not None:
+                    return _text(leader)
+        except (RedisError, OSError) as e:
+            self._redis_failed("lock", flight.key, e)
+            return None
+
+    async def _lead(self, flight: _Flight, start: StreamFactory) -> None:
+        flight.led = True
+        self.stats.provider_calls += 1
+        events = start()
+        finished = False
+        try:
+            async for event in events:
+                flight.publish(event)
+                if flight.mirrored:
+                    await self._mirror(flight, _encode(event))
+                    if flight.consumers == 0 and not await self._has_followers(flight):
+                        # Orphaned: the callers and followers have gone
+                        self._discard(flight)
+                        break
+            finished = bool(flight.events) and flight.events[-1].done
+        except ProviderError as e:
+            finished = True
+            if flight.mirrored:
+                await self._mirror(
+                    flight,
+                    {
+                        "error": str(e),
+                        "retry_after": getattr(e, "retry_after", None),
+                        "rate_limited": isinstance(e, ProviderRateLimitError),
+                        "rejected": isinstance(e, RateLimitExceeded),
+                    },
+                )
+            raise
+        finally:
+            await events.aclose()
+            if flight.mirrored:
+                if not finished:
+                    await self._mirror(flight, {"abort": True})
+                await self._release(flight)
+        if not finished:
+            raise ProviderError("LLM call abandoned")
+
+    async def _mirror(self, flight: _Flight, record: Dict[str, Any]) -> None:
+        stream_key = self._key("events", flight.id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xadd(stream_key, {"e": json.dumps(record)})
+                pipe.expire(stream_key, STREAM_TTL_SECONDS)
+                pipe.pexpire(
+                    self._key("lock", flight.key), int(self.lock_seconds * 1000)
+                )
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            # Followers will see the lock lapse and take over
+            flight.mirrored = False
+            self._redis_failed("mirror", flight.key, e)
+
+    async def _has_followers(self, flight: _Flight) -> bool:
+        try:
+            count = await self.redis.get(self._key("followers", flight.id))
+        except (RedisError, OSError):
+            return False
+        return int(count or 0) > 0
+
+    async def _release(self, flight: _Flight) -> None:
+        lock_key = self._key("lock", flight.key)
+        try:
+            if _text(await self.redis.get(lock_key)) == flight.id:
+                await self.redis.delete(lock_key)
+        except (RedisError, OSError):
+            self.stats.errors += 1
+
+    async def _follow(self, flight: _Flight, leader: str) -> None:
+        """Republish a remote leader's events until its call finishes."""
+        self.stats.remote_follows += 1
+        stream_key = self._key("events", leader)
+        followers_key = self._key("followers", leader)
+        lock_key = self._key("lock", flight.key)
+        last_id = "0-0"
+        try:
+            await self.redis.incr(followers_key)
+            await self.redis.expire(followers_key, STREAM_TTL_SECONDS)
+            while True:
+                response = await self.redis.xread(
+                    {stream_key: last_id}, count=100, block=POLL_MILLISECONDS
+                )
+                if not response:
+                    if _text(await self.redis.get(lock_key)) != leader:
+                        # Leader finished or died; anything it sent is readable now
+                        response = await self.redis.xread({stream_key: last_id})
+                        if not response:
+                            raise _LeaderLost()
+                for entry_id, fields in response[0][1]:
+                    last_id = entry_id
+                    record = json.loads(fields[b"e"] if b"e" in fields else fields["e"])
+                    if record.get("abort"):
+                        raise _LeaderLost()
+                    if "error" in record:
+                        if record.get("rejected"):
+                            # Turned away by the leader's limiter, not the provider
+                            raise RateLimitExceeded(
+                                record["error"], record["retry_after"]
+                            )
+                        if record["rate_limited"]:
+                            raise ProviderRateLimitError(
+                                record["error"], record["retry_after"]
+                            )
+                        raise ProviderError(record["error"])
+                    event = _decode(record)
+                    flight.publish(event)
+                    if event.done:
+                        return
+        except (RedisError, OSError) as e:
+            self._redis_failed("follow", flight.key, e)
+            raise _LeaderLost() from e
+        finally:
+            try:
+                await self.redis.decr(followers_key)
+            except (RedisError, OSError):
+                pass
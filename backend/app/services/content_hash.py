@@ -0,0 +1,22 @@
+"""
+Canonical serialization and hashing of document content.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+
+def canonical_json(content: Any) -> bytes:
+    """Serialize content deterministically (sorted keys, no whitespace)."""
+    return json.dumps(content, sort_keys=True, separators=(",", ":")).encode()
+
+
+def hash_bytes(encoded: bytes) -> str:
+    """SHA-256 hex digest of already-canonicalized content."""
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def content_hash(content: Any) -> str:
+    """SHA-256 hex digest of the canonical JSON form of ``content``."""
+    return hash_bytes(canonical_json(content))
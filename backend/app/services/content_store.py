@@ -0,0 +1,196 @@
+"""
+Content-addressed, reference-counted storage for document bodies.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.document import ContentBlob
+from app.services.content_hash import canonical_json, hash_bytes
+
+# Maximum number of blobs per release_many statement
+RELEASE_BATCH_SIZE = 1000
+
+
+class ContentNotFoundError(LookupError):
+    """Raised when a content blob does not exist."""
+
+
+class ContentStore:
+    """Stores document bodies once per distinct content and counts references."""
+
+    async def put(
+        self,
+        db: AsyncSession,
+        content: Dict[str, Any],
+        encoded: Optional[bytes] = None,
+    ) -> str:
+        """
+        Store ``content`` (or add a reference to an identical stored copy).
+
+        Args:
+            db: Database session
+            content: Document content
+            encoded: ``canonical_json(content)`` if the caller already has it
+
+        Returns:
+            str: Content hash to reference the blob by
+        """
+        if encoded is None:
+            encoded = canonical_json(content)
+        digest = hash_bytes(encoded)
+        statement = insert(ContentBlob).values(
+            hash=digest,
+            content=content,
+            size=len(encoded),
+            ref_count=1,
+        )
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ContentBlob.hash],
+                set_={"ref_count": ContentBlob.ref_count + 1},
+            )
+        )
+        return digest
+
+    async def put_many(
+        self,
+        db: AsyncSession,
+        contents: Sequence[Dict[str, Any]],
+    ) -> List[Tuple[str, int]]:
+        """
+        Store many bodies in one statement, one reference per item.
+
+        Identical bodies within the batch are written once with a combined
+        reference count.
+
+        Returns:
+            List of ``(content hash, size)`` in the order of ``contents``
+        """
+        stored = []
+        blobs: Dict[str, Dict[str, Any]] = {}
+        for content in contents:
+            encoded = canonical_json(content)
+            digest = hash_bytes(encoded)
+            stored.append((digest, len(encoded)))
+            blob = blobs.setdefault(
+                digest,
+                {
+                    "hash": digest,
+                    "content": content,
+                    "size": len(encoded),
+                    "ref_count": 0,
+                },
+            )
+            blob["ref_count"] += 1
+        if not blobs:
+            return stored
+
+        # Sorted so concurrent imports lock existing rows in the same order
+        statement = insert(ContentBlob).values([blobs[d] for d in sorted(blobs)])
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ContentBlob.hash],
+                set_={
+                    "ref_count": ContentBlob.ref_count + statement.excluded.ref_count
+                },
+            )
+        )
+        return stored
+
+    async def add_refs(self, db: AsyncSession, counts: Dict[str, int]) -> None:
+        """Add ``counts[digest]`` references to each of several existing blobs."""
+        if not counts:
+            return
+        result = await db.execute(
+            update(ContentBlob)
+            .where(ContentBlob.hash.in_(sorted(counts)))
+            .values(
+                ref_count=ContentBlob.ref_count + case(counts, value=ContentBlob.hash)
+            )
+        )
+        if result.rowcount != len(counts):
+            raise ContentNotFoundError("Content not found for some references")
+
+    async def add_ref(self, db: AsyncSession, digest: str) -> None:
+        """Add a reference to an existing blob without touching its content."""
+        result = await db.execute(
+            update(ContentBlob)
+            .where(ContentBlob.hash == digest)
+            .values(ref_count=ContentBlob.ref_count + 1)
+        )
+        if result.rowcount == 0:
+            raise ContentNotFoundError(f"Content {digest} not found")
+
+    async def release(self, db: AsyncSession, digest: str) -> None:
+        """Drop a reference, deleting the blob once nothing refers to it."""
+        remaining = await db.scalar(
+            update(ContentBlob)
+            .where(ContentBlob.hash == digest)
+            .values(ref_count=ContentBlob.ref_count - 1)
+            .returning(ContentBlob.ref_count)
+        )
+        if remaining is not None and remaining <= 0:
+            # A concurrent put() may have re-referenced it in the meantime
+            await db.execute(
+                delete(ContentBlob).where(
+                    ContentBlob.hash == digest, ContentBlob.ref_count <= 0
+                )
+            )
+
+    async def release_many(self, db: AsyncSession, counts: Dict[str, int]) -> None:
+        """
+        Drop ``counts[digest]`` references from each of several blobs.
+
+        Blobs left without references are deleted, so release only after
+        the rows that held the references are gone.
+        """
+        digests = sorted(counts)
+        for start in range(0, len(digests), RELEASE_BATCH_SIZE):
+            batch = {d: counts[d] for d in digests[start : start + RELEASE_BATCH_SIZE]}
+            released = await db.execute(
+                update(ContentBlob)
+                .where(ContentBlob.hash.in_(list(batch)))
+                .values(
+                    ref_count=ContentBlob.ref_count
+                    - case(batch, value=ContentBlob.hash)
+                )
+                .returning(ContentBlob.hash, ContentBlob.ref_count)
+            )
+            unreferenced = [digest for digest, remaining in released if remaining <= 0]
+            if unreferenced:
+                await db.execute(
+                    delete(ContentBlob).where(
+                        ContentBlob.hash.in_(unreferenced), ContentBlob.ref_count <= 0
+                    )
+                )
+
+    async def get_size(self, db: AsyncSession, digest: str) -> int:
+        """Return the serialized size of a blob without loading its content."""
+        size = await db.scalar(
+            select(ContentBlob.size).where(ContentBlob.hash == digest)
+        )
+        if size is None:
+            raise ContentNotFoundError(f"Content {digest} not found")
+        return size
+
+    async def get(self, db: AsyncSession, digest: str) -> Dict[str, Any]:
+        """
+        Load the content stored under ``digest``.
+
+        Raises:
+            ContentNotFoundError: If no blob has that hash
+        """
+        content = await db.scalar(
+            select(ContentBlob.content).where(ContentBlob.hash == digest)
+        )
+        if content is None:
+            raise ContentNotFoundError(f"Content {digest} not found")
+        return content
+
+
+# Global content store instance
+content_store = ContentStore()
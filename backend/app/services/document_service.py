@@ -0,0 +1,777 @@
+"""
+Document service for querying and serializing documents.
+"""
+
+import base64
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, AsyncIterator, Collection, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import Select, Text, delete, func, insert, select, tuple_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache
+from app.models.document import ContentBlob, Document
+from app.models.organization import Organization
+from app.models.project import Project
+from app.services.content_hash import canonical_json
+from app.services.content_store import content_store
+from app.services.json_patch import JsonPatch, JsonPatchError, apply_patch
+from app.services.search_service import search_vector, shared_search_vector
+from app.services.semantic_search import semantic_search_service
+from app.services.version_store import version_store
+
+# Columns returned by the "summary" projection (everything except content)
+SUMMARY_COLUMNS = (
+    Document.id,
+    Document.organization_id,
+    Document.project_id,
+    Document.title,
+    Document.type,
+    Document.version,
+    Document.template_id,
+    Document.created_by,
+    Document.created_at,
+    Document.updated_at,
+)
+FULL_COLUMNS = SUMMARY_COLUMNS + (ContentBlob.content,)
+# Content as the JSON text Postgres stores, for writing into responses as is
+RAW_FULL_COLUMNS = SUMMARY_COLUMNS + (ContentBlob.content.cast(Text).label("content"),)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class DocumentNotFoundError(LookupError):
+    """Raised when a document does not exist."""
+
+
+class ParentNotFoundError(LookupError):
+    """Raised when a new document's organization or project does not exist."""
+
+
+class VersionConflictError(Exception):
+    """Raised when a write is based on a stale document version."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Document is at version {current_version}")
+        self.current_version = current_version
+
+
+def encode_cursor(updated_at: datetime, document_id: str) -> str:
+    """Encode a keyset position as an opaque URL-safe cursor."""
+    raw = f"{updated_at.isoformat()}|{document_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, document_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(updated_at), document_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def document_tag(document_id: str) -> str:
+    """Cache tag for entries derived from a document."""
+    return f"document:{document_id}"
+
+
+def _document_value_tags(data: Dict[str, Any]) -> List[str]:
+    tags = [f"org:{data['organization_id']}"]
+    if data["project_id"] is not None:
+        tags.append(f"project:{data['project_id']}")
+    return tags
+
+
+def _invalid_id(item: Dict[str, Any]) -> Optional[str]:
+    """Describe the first malformed ID in a bulk item, if any."""
+    for field in ("organization_id", "project_id", "template_id"):
+        value = item.get(field)
+        if value is None:
+            continue
+        try:
+            uuid.UUID(value)
+        except ValueError:
+            return f"Invalid {field}: {value}"
+    return None
+
+
+def _format_timestamps(data: Dict[str, Any]) -> Dict[str, Any]:
+    data["created_at"] = data["created_at"].isoformat()
+    data["updated_at"] = data["updated_at"].isoformat()
+    return data
+
+
+def row_to_dict(row: Any) -> Dict[str, Any]:
+    """Convert a document row (full or summary projection) to a response dict."""
+    return _format_timestamps(dict(row._mapping))
+
+
+def document_to_dict(document: Document, content: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a loaded ``Document`` and its content to a response dict."""
+    data = {column.key: getattr(document, column.key) for column in SUMMARY_COLUMNS}
+    data["content"] = content
+    return _format_timestamps(data)
+
+
+class DocumentService:
+    """Service for document queries and writes."""
+
+    async def get_document(
+        self, db: AsyncSession, document_id: str, for_update: bool = False
+    ) -> Document:
+        """
+        Load a document by ID.
+
+        Raises:
+            DocumentNotFoundError: If the document does not exist
+        """
+        document = await db.get(Document, document_id, with_for_update=for_update)
+        if document is None:
+            raise DocumentNotFoundError(f"Document {document_id} not found")
+        return document
+
+    async def get_document_dict(
+        self, db: AsyncSession, document_id: str, raw_content: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Load a document with its content as a response dict.
+
+        Reads through the cache; on a miss the document and its content
+        are loaded in one query. With ``raw_content`` the content is the
+        stored JSON text rather than decoded.
+
+        Raises:
+            DocumentNotFoundError: If the document does not exist
+        """
+        prefix = "raw:" if raw_content else ""
+        return await cache.get_or_load(
+            prefix + document_tag(document_id),
+            lambda: self._load_document_dict(db, document_id, raw_content),
+            tags=[document_tag(document_id)],
+            value_tags=_document_value_tags,
+        )
+
+    async def get_document_validators(
+        self, db: AsyncSession, document_id: str
+    ) -> Dict[str, Any]:
+        """
+        Get a document's ``version`` and ``updated_at`` without its content.
+
+        Used to answer conditional requests; cached alongside the document.
+
+        Raises:
+            DocumentNotFoundError: If the document does not exist
+        """
+
+        async def load() -> Dict[str, Any]:
+            row = (
+                await db.execute(
+                    select(Document.version, Document.updated_at).where(
+                        Document.id == document_id
+                    )
+                )
+            ).first()
+            if row is None:
+                raise DocumentNotFoundError(f"Document {document_id} not found")
+            return {"version": row.version, "updated_at": row.updated_at.isoformat()}
+
+        return await cache.get_or_load(
+            f"validators:{document_tag(document_id)}",
+            load,
+            tags=[document_tag(document_id)],
+        )
+
+    async def _load_document_dict(
+        self, db: AsyncSession, document_id: str, raw_content: bool = False
+    ) -> Dict[str, Any]:
+        columns = RAW_FULL_COLUMNS if raw_content else FULL_COLUMNS
+        row = (
+            await db.execute(
+                select(*columns)
+                .join(ContentBlob, ContentBlob.hash == Document.content_hash)
+                .where(Document.id == document_id)
+            )
+        ).first()
+        if row is None:
+            raise DocumentNotFoundError(f"Document {document_id} not found")
+        return row_to_dict(row)
+
+    async def create_document(
+        self,
+        db: AsyncSession,
+        organization_id: str,
+        title: str,
+        content: Optional[Dict[str, Any]] = None,
+        project_id: Optional[str] = None,
+        type: str = "custom",
+        template_id: Optional[str] = None,
+        created_by: Optional[str] = None,
+    ) -> Tuple[Document, Dict[str, Any]]:
+        """
+        Create a document and record it as version 1.
+
+        When ``content`` is omitted the document is instantiated from
+        ``template_id`` and shares the template's stored body until edited.
+
+        Returns:
+            Tuple of the new document and its content
+
+        Raises:
+            ParentNotFoundError: If the organization or project does not exist
+        """
+        parent = {"organization_id": organization_id, "project_id": project_id}
+        error = _invalid_id(parent) or (await self._missing_parents(db, [parent]))[0]
+        if error is not None:
+            raise ParentNotFoundError(error)
+        if content is None:
+            if template_id is None:
+                raise ValueError("Either content or template_id is required")
+            template = await self.get_document(db, template_id)
+            return await self._share(
+                db,
+                template,
+                organization_id=organization_id,
+                project_id=project_id,
+                title=title,
+                type=type,
+                template_id=template_id,
+                created_by=created_by,
+            )
+
+        document = Document(
+            organization_id=organization_id,
+            project_id=project_id,
+            title=title,
+            content_hash=await content_store.put(db, content),
+            type=type,
+            template_id=template_id,
+            version=1,
+            created_by=created_by,
+            search_vector=search_vector(title, content),
+        )
+        db.add(document)
+        await db.flush()
+
+        await version_store.record(
+            db, document.id, 1, title, content, created_by=created_by
+        )
+        await db.commit()
+        return document, content
+
+    async def import_documents(
+        self,
+        db: AsyncSession,
+        items: List[Dict[str, Any]],
+        created_by: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Create a batch of documents in one transaction.
+
+        Bodies, documents and first versions are each written with a single
+        multi-row INSERT. Items whose organization or project does not exist
+        are reported without being written. If the database still rejects
+        the batch, it is rolled back and retried one document at a time so
+        the failure is reported against the offending items only.
+
+        Args:
+            db: Database session
+            items: ``create_document`` keyword arguments, one dict per document
+            created_by: Author of the new documents
+
+        Returns:
+            Per-item results in input order: ``{"id": ...}`` or ``{"error": ...}``
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            error = _invalid_id(item)
+            if item.get("content") is None and item.get("template_id") is None:
+                error = "Either content or template_id is required"
+            if error is not None:
+                results[index] = {"error": error}
+            else:
+                pending.append(index)
+
+        missing = await self._missing_parents(db, [items[index] for index in pending])
+        for index, error in zip(pending, missing):
+            if error is not None:
+                results[index] = {"error": error}
+        pending = [index for index in pending if results[index] is None]
+
+        try:
+            inserted = await self._insert_batch(
+                db, [(index, items[index]) for index in pending], created_by
+            )
+            await db.commit()
+        except DBAPIError:
+            await db.rollback()
+            inserted = {}
+            for index in pending:
+                try:
+                    document, _ = await self.create_document(
+                        db, created_by=created_by, **items[index]
+                    )
+                    inserted[index] = {"id": document.id}
+                except (DocumentNotFoundError, ParentNotFoundError) as e:
+                    await db.rollback()
+                    inserted[index] = {"error": str(e)}
+                except DBAPIError as e:
+                    await db.rollback()
+                    # Drivers put the most specific explanation last
+                    message = str(e.orig).splitlines()[-1]
+                    inserted[index] = {"error": message.removeprefix("DETAIL:").strip()}
+
+        for index, result in inserted.items():
+            results[index] = result
+        return results
+
+    async def _missing_parents(
+        self, db: AsyncSession, items: List[Dict[str, Any]]
+    ) -> List[Optional[str]]:
+        """
+        Describe, per item, an organization or project that does not exist.
+
+        Items must have well-formed IDs. A project must belong to the item's
+        organization. The rows found are key-share locked, so they cannot be
+        deleted before the documents referencing them are written.
+        """
+        if not items:
+            return []
+        organization_ids = {str(uuid.UUID(item["organization_id"])) for item in items}
+        project_ids = {
+            str(uuid.UUID(item["project_id"]))
+            for item in items
+            if item.get("project_id") is not None
+        }
+        organizations = set(
+            await db.scalars(
+                select(Organization.id)
+                .where(Organization.id.in_(organization_ids))
+                .with_for_update(read=True, key_share=True)
+            )
+        )
+        projects: Dict[str, str] = {}
+        if project_ids:
+            rows = await db.execute(
+                select(Project.id, Project.organization_id)
+                .where(Project.id.in_(project_ids))
+                .with_for_update(read=True, key_share=True)
+            )
+            projects = {row.id: row.organization_id for row in rows}
+
+        errors: List[Optional[str]] = []
+        for item in items:
+            organization_id = str(uuid.UUID(item["organization_id"]))
+            project_id = item.get("project_id")
+            if organization_id not in organizations:
+                errors.append(f"Organization {item['organization_id']} not found")
+            elif (
+                project_id is not None
+                and projects.get(str(uuid.UUID(project_id))) != organization_id
+            ):
+                errors.append(
+                    f"Project {project_id} not found in organization "
+                    f"{item['organization_id']}"
+                )
+            else:
+                errors.append(None)
+        return errors
+
+    async def _insert_batch(
+        self,
+        db: AsyncSession,
+        batch: List[Tuple[int, Dict[str, Any]]],
+        created_by: Optional[str],
+    ) -> Dict[int, Dict[str, Any]]:
+        """Write a validated batch without committing; returns results by index."""
+        template_ids = {
+            item["template_id"] for _, item in batch if item.get("content") is None
+        }
+        templates = {}
+        if template_ids:
+            rows = await db.execute(
+                select(Document.id, Document.content_hash, ContentBlob.size)
+                .join(ContentBlob, ContentBlob.hash == Document.content_hash)
+                .where(Document.id.in_(template_ids))
+            )
+            templates = {row.id: row for row in rows}
+
+        with_content = [
+            (index, item) for index, item in batch if item.get("content") is not None
+        ]
+        stored = await content_store.put_many(
+            db, [item["content"] for _, item in with_content]
+        )
+        blobs = dict(zip((index for index, _ in with_content), stored))
+
+        results: Dict[int, Dict[str, Any]] = {}
+        template_refs: Dict[str, int] = {}
+        documents = []
+        versions = []
+        for index, item in batch:
+            if index in blobs:
+                digest, size = blobs[index]
+                vector = search_vector(item["title"], item["content"])
+            else:
+                template = templates.get(item["template_id"])
+                if template is None:
+                    results[index] = {
+                        "error": f"Document {item['template_id']} not found"
+                    }
+                    continue
+                digest, size = template.content_hash, template.size
+                template_refs[digest] = template_refs.get(digest, 0) + 1
+                vector = shared_search_vector(item["title"], template.id)
+
+            document_id = str(uuid.uuid4())
+            documents.append(
+                {
+                    "id": document_id,
+                    "organization_id": item["organization_id"],
+                    "project_id": item.get("project_id"),
+                    "title": item["title"],
+                    "content_hash": digest,
+                    "type": item.get("type", "custom"),
+                    "template_id": item.get("template_id"),
+                    "version": 1,
+                    "created_by": created_by,
+                    "search_vector": vector,
+                }
+            )
+            versions.append(
+                {
+                    "document_id": document_id,
+                    "title": item["title"],
+                    "content_hash": digest,
+                    "content_size": size,
+                    "created_by": created_by,
+                }
+            )
+            results[index] = {"id": document_id}
+
+        # Head references for template instances (bodies above got theirs)
+        await content_store.add_refs(db, template_refs)
+        if documents:
+            await db.execute(insert(Document).values(documents))
+        await version_store.record_initial_many(db, versions)
+        return results
+
+    async def duplicate_document(
+        self,
+        db: AsyncSession,
+        document_id: str,
+        title: str,
+        created_by: Optional[str] = None,
+    ) -> Tuple[Document, Dict[str, Any]]:
+        """
+        Duplicate a document by sharing its stored body (copy-on-write).
+
+        Returns:
+            Tuple of the new document and its content
+        """
+        source = await self.get_document(db, document_id)
+        return await self._share(
+            db,
+            source,
+            organization_id=source.organization_id,
+            project_id=source.project_id,
+            title=title,
+            type=source.type,
+            template_id=source.template_id,
+            created_by=created_by,
+        )
+
+    async def _share(
+        self, db: AsyncSession, source: Document, **fields: Any
+    ) -> Tuple[Document, Dict[str, Any]]:
+        """Create a document that references ``source``'s content blob."""
+        digest = source.content_hash
+        await content_store.add_ref(db, digest)
+        document = Document(
+            content_hash=digest,
+            version=1,
+            search_vector=shared_search_vector(fields["title"], source.id),
+            **fields,
+        )
+        db.add(document)
+        await db.flush()
+
+        await version_store.record_shared(
+            db,
+            document.id,
+            1,
+            document.title,
+            digest,
+            await content_store.get_size(db, digest),
+            created_by=document.created_by,
+        )
+        await db.commit()
+        return document, await content_store.get(db, digest)
+
+    async def update_document(
+        self,
+        db: AsyncSession,
+        document_id: str,
+        title: str,
+        content: Dict[str, Any],
+        updated_by: Optional[str] = None,
+        expected_versions: Optional[Collection[int]] = None,
+    ) -> Document:
+        """
+        Replace a document's title and content, recording a new version.
+
+        Raises:
+            VersionConflictError: If ``expected_versions`` is given and the
+                document's current version is not among them
+        """
+        document = await self.get_document(db, document_id, for_update=True)
+        if expected_versions is not None and document.version not in expected_versions:
+            raise VersionConflictError(document.version)
+        previous_content = await content_store.get(db, document.content_hash)
+        await self._save_version(
+            db, document, title, content, previous_content, updated_by
+        )
+        return document
+
+    async def patch_document(
+        self,
+        db: AsyncSession,
+        document_id: str,
+        base_version: int,
+        operations: JsonPatch,
+        title: Optional[str] = None,
+        updated_by: Optional[str] = None,
+    ) -> Tuple[Document, Dict[str, Any]]:
+        """
+        Apply a JSON Patch to a document with optimistic concurrency.
+
+        The patch is applied server-side and stored as the version delta
+        as-is, so no diff is recomputed.
+
+        Raises:
+            VersionConflictError: If the document is no longer at ``base_version``
+            JsonPatchError: If the patch does not apply to the current content
+
+        Returns:
+            Tuple of the updated document and its new content
+        """
+        document = await self.get_document(db, document_id, for_update=True)
+        if document.version != base_version:
+            raise VersionConflictError(document.version)
+
+        previous_content = await content_store.get(db, document.content_hash)
+        content = apply_patch(previous_content, operations)
+        if not isinstance(content, dict):
+            raise JsonPatchError("Patched document must be an object")
+        await self._save_version(
+            db,
+            document,
+            document.title if title is None else title,
+            content,
+            previous_content,
+            updated_by,
+            delta=operations,
+        )
+        return document, content
+
+    async def _save_version(
+        self,
+        db: AsyncSession,
+        document: Document,
+        title: str,
+        content: Dict[str, Any],
+        previous_content: Dict[str, Any],
+        updated_by: Optional[str],
+        delta: Optional[JsonPatch] = None,
+    ) -> None:
+        """Point a locked document at new content and record the version."""
+        encoded = canonical_json(content)
+        previous_hash = document.content_hash
+
+        document.title = title
+        document.content_hash = await content_store.put(db, content, encoded=encoded)
+        document.version += 1
+        document.updated_at = func.now()
+        document.search_vector = search_vector(title, content)
+
+        await version_store.record(
+            db,
+            document.id,
+            document.version,
+            title,
+            content,
+            previous_content=previous_content,
+            created_by=updated_by,
+            delta=delta,
+            encoded=encoded,
+        )
+        # Repoint the document before its old blob can be deleted
+        await db.flush()
+        await content_store.release(db, previous_hash)
+        await db.commit()
+        await cache.invalidate(document_tag(document.id))
+
+    async def delete_document(self, db: AsyncSession, document_id: str) -> None:
+        """Delete a document, its history and its content references."""
+        document = await self.get_document(db, document_id, for_update=True)
+        digest = document.content_hash
+
+        await version_store.release_document(db, document_id)
+        await db.execute(delete(Document).where(Document.id == document_id))
+        await content_store.release(db, digest)
+        await db.commit()
+        await cache.invalidate(document_tag(document_id))
+        semantic_search_service.forget(document.organization_id, document_id)
+
+    async def delete_documents(
+        self, db: AsyncSession, *criteria: Any
+    ) -> List[Tuple[str, str]]:
+        """
+        Delete every document matching ``criteria`` with its history and
+        content references, without committing.
+
+        For deleting what owns documents (an organization or project): the
+        foreign key cascade would remove the rows but leave the content they
+        referenced stored forever. Lock the owner first so no document is
+        added meanwhile.
+
+        Returns:
+            ``(organization_id, document_id)`` of each deleted document, to
+            pass to ``forget_documents`` once committed
+        """
+        rows = (
+            await db.execute(
+                select(Document.id, Document.organization_id, Document.content_hash)
+                .where(*criteria)
+                .with_for_update()
+            )
+        ).all()
+        if not rows:
+            return []
+
+        references = Counter(row.content_hash for row in rows)
+        references.update(
+            await version_store.delete_histories(
+                db, select(Document.id).where(*criteria)
+            )
+        )
+        await db.execute(delete(Document).where(*criteria))
+        await content_store.release_many(db, references)
+        return [(row.organization_id, row.id) for row in rows]
+
+    async def forget_documents(self, deleted: Collection[Tuple[str, str]]) -> None:
+        """Drop documents removed by ``delete_documents`` from caches and indexes."""
+        if not deleted:
+            return
+        await cache.invalidate(
+            *(document_tag(document_id) for _, document_id in deleted)
+        )
+        for organization_id, document_id in deleted:
+            semantic_search_service.forget(organization_id, document_id)
+
+    def _list_query(
+        self,
+        organization_id: Optional[str],
+        project_id: Optional[str],
+        type: Optional[str],
+        cursor: Optional[str],
+        summary: bool,
+        raw_content: bool = False,
+    ) -> Select:
+        """Build the keyset-ordered listing query."""
+        if summary:
+            query = select(*SUMMARY_COLUMNS)
+        else:
+            columns = RAW_FULL_COLUMNS if raw_content else FULL_COLUMNS
+            query = select(*columns).join(
+                ContentBlob, ContentBlob.hash == Document.content_hash
+            )
+        if organization_id is not None:
+            query = query.where(Document.organization_id == organization_id)
+        if project_id is not None:
+            query = query.where(Document.project_id == project_id)
+        if type is not None:
+            query = query.where(Document.type == type)
+        if cursor is not None:
+            updated_at, document_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Document.updated_at, Document.id) < (updated_at, document_id)
+            )
+        return query.order_by(Document.updated_at.desc(), Document.id.desc())
+
+    async def list_documents(
+        self,
+        db: AsyncSession,
+        organization_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        summary: bool = False,
+        raw_content: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Fetch one page of documents.
+
+        With ``raw_content`` each item's content is the stored JSON text
+        rather than decoded.
+
+        Returns:
+            Tuple of the page items and the cursor for the next page (None
+            when this is the last page).
+        """
+        query = self._list_query(
+            organization_id, project_id, type, cursor, summary, raw_content
+        )
+        # Fetch one extra row to learn whether another page exists
+        rows = (await db.execute(query.limit(limit + 1))).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.updated_at, last.id)
+
+        return [row_to_dict(row) for row in rows], next_cursor
+
+    async def stream_documents(
+        self,
+        db: AsyncSession,
+        organization_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        summary: bool = False,
+        batch_size: int = 500,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream documents as NDJSON lines straight off a server-side cursor.
+
+        Only ``batch_size`` rows are held in memory at a time, and content
+        is copied into the output as stored, without being decoded.
+        """
+        query = self._list_query(
+            organization_id, project_id, type, cursor, summary, raw_content=True
+        )
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for row in result:
+            data = row_to_dict(row)
+            if not summary:
+                data["content"] = orjson.Fragment(data["content"])
+            yield orjson.dumps(data) + b"\n"
+
+
+# Global document service instance
+document_service = DocumentService()
@@ -0,0 +1,74 @@
+"""
+Text embedders for semantic search.
+
+The default ``HashingEmbedder`` runs fully offline: it projects word
+unigrams and bigrams into a fixed number of dimensions with a signed
+feature hash and sublinear term frequency, then L2-normalizes. Other
+embedders can be added with ``register_embedder`` and selected through
+``settings.EMBEDDING_MODEL``.
+"""
+
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder:
+    """Base class for embedders producing L2-normalized float32 vectors."""
+
+    name: str = "base"
+    dim: int = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts`` into a ``(len(texts), dim)`` float32 array."""
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic feature-hashing embedder (no model download, no network)."""
+
+    def __init__(self, dim: int = settings.EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text[: settings.EMBEDDING_MAX_CHARS].lower())
+            features = Counter(tokens)
+            features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+            for feature, count in features.items():
+                # crc32 is stable across processes, unlike hash()
+                h = zlib.crc32(feature.encode())
+                sign = 1.0 if h & 0x80000000 else -1.0
+                vectors[row, h % self.dim] += sign * (1.0 + math.log(count))
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+_EMBEDDERS: Dict[str, Callable[[], Embedder]] = {
+    "hashing": HashingEmbedder,
+}
+
+
+def register_embedder(name: str, factory: Callable[[], Embedder]) -> None:
+    """Make an embedder selectable via ``settings.EMBEDDING_MODEL``."""
+    _EMBEDDERS[name] = factory
+
+
+def get_embedder(name: str = settings.EMBEDDING_MODEL) -> Embedder:
+    """Instantiate the configured embedder."""
+    try:
+        return _EMBEDDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown embedder: {name}")
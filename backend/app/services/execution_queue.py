@@ -0,0 +1,552 @@
+"""
+Durable queue and worker pool for asynchronous agent executions.
+
+Executions are rows in ``agent_executions``, so queued work survives
+restarts and any number of worker processes can share the queue. Workers
+claim rows with ``FOR UPDATE SKIP LOCKED``: highest priority first, then
+round-robin across organizations (each organization's oldest execution
+before anyone's second), and at most ``EXECUTION_MAX_PER_ORG`` running per
+organization. The cap is read without locking, so concurrent workers can
+briefly exceed it.
+
+A claimed execution holds a lease that its worker renews while it runs.
+If the worker dies the lease expires and another worker re-queues it.
+Failures are retried with exponential backoff and jitter, honouring a
+provider's ``Retry-After``, up to ``EXECUTION_MAX_ATTEMPTS``.
+
+The API enqueues and polls; ``ExecutionWorker`` runs the agents, either
+inside the API process (``EXECUTION_WORKER_IN_PROCESS``) or in dedicated
+worker processes started with ``python -m app.worker``.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.agent_execution import AgentExecution
+from app.services.ai_service import ai_service
+from app.services.llm_providers import ProviderRateLimitError
+from app.services.rate_limiting import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# Candidates read per free slot, so per-org caps and rows locked by other
+# workers do not leave slots idle
+CANDIDATES_PER_SLOT = 4
+MAX_RETRY_DELAY_SECONDS = 600.0
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class ExecutionNotFoundError(LookupError):
+    """Raised when an execution does not exist."""
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def execution_to_dict(execution: AgentExecution) -> Dict[str, Any]:
+    """Convert an ``AgentExecution`` to a response dict."""
+    return {
+        "id": execution.id,
+        "organization_id": execution.organization_id,
+        "agent_id": execution.agent_id,
+        "context": execution.context,
+        "parameters": execution.parameters,
+        "priority": execution.priority,
+        "status": execution.status,
+        "attempts": execution.attempts,
+        "max_attempts": execution.max_attempts,
+        "result": execution.result,
+        "error": execution.error,
+        "created_by": execution.created_by,
+        "created_at": _isoformat(execution.created_at),
+        "started_at": _isoformat(execution.started_at),
+        "finished_at": _isoformat(execution.finished_at),
+    }
+
+
+class ExecutionQueue:
+    """Postgres-backed queue of agent executions."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        max_attempts: int = settings.EXECUTION_MAX_ATTEMPTS,
+        max_per_org: int = settings.EXECUTION_MAX_PER_ORG,
+        retry_base: float = settings.EXECUTION_RETRY_BASE_SECONDS,
+        lease_seconds: int = settings.EXECUTION_LEASE_SECONDS,
+    ):
+        self._session_factory = session_factory
+        self.max_attempts = max_attempts
+        self.max_per_org = max_per_org
+        self.retry_base = retry_base
+        self.lease_seconds = lease_seconds
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        agent_id: str,
+        context: Dict[str, Any],
+        parameters: Optional[Dict[str, Any]] = None,
+        organization_id: Optional[str] = None,
+        priority: int = 0,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Queue an execution.
+
+        Args:
+            db: Database session
+            agent_id: Agent to run
+            context: Agent input
+            parameters: Agent options
+            organization_id: Organization the execution counts against for
+                fairness
+            priority: Higher runs first
+            created_by: User ID
+
+        Returns:
+            The queued execution
+        """
+        execution = AgentExecution(
+            organization_id=organization_id,
+            agent_id=agent_id,
+            context=context,
+            parameters=parameters or {},
+            priority=priority,
+            max_attempts=self.max_attempts,
+            created_by=created_by,
+        )
+        db.add(execution)
+        await db.commit()
+        return execution_to_dict(execution)
+
+    async def get(self, db: AsyncSession, execution_id: str) -> Dict[str, Any]:
+        """
+        Get an execution with its status and result.
+
+        Raises:
+            ExecutionNotFoundError: If the execution does not exist
+        """
+        execution = await db.get(AgentExecution, execution_id)
+        if execution is None:
+            raise ExecutionNotFoundError(execution_id)
+        return execution_to_dict(execution)
+
+    async def claim(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Claim up to ``limit`` runnable executions for a worker.
+
+        Returns:
+            The claimed executions, now ``running`` under a fresh lease
+        """
+        async with self._session_factory() as db:
+            running = dict(
+                (
+                    await db.execute(
+                        select(AgentExecution.organization_id, func.count())
+                        .where(AgentExecution.status == "running")
+                        .group_by(AgentExecution.organization_id)
+                    )
+                ).all()
+            )
+            full = [org for org, count in running.items() if count >= self.max_per_org]
+            org_filter = []
+            if None in full:
+                org_filter.append(AgentExecution.organization_id.isnot(None))
+            if any(org is not None for org in full):
+                org_filter.append(
+                    or_(
+                        AgentExecution.organization_id.is_(None),
+                        AgentExecution.organization_id.notin_(
+                            [org for org in full if org is not None]
+                        ),
+                    )
+                )
+
+            # Each organization's n-th execution (by priority, then age)
+            # gets turn n, so one busy organization cannot crowd out the rest
+            ranked = (
+                select(
+                    AgentExecution.id,
+                    AgentExecution.organization_id,
+                    AgentExecution.priority,
+                    AgentExecution.created_at,
+                    func.row_number()
+                    .over(
+                        partition_by=AgentExecution.organization_id,
+                        order_by=(
+                            AgentExecution.priority.desc(),
+                            AgentExecution.created_at,
+                        ),
+                    )
+                    .label("turn"),
+                )
+                .where(
+                    AgentExecution.status == "queued",
+                    AgentExecution.run_after <= func.now(),
+                    *org_filter,
+                )
+                .subquery()
+            )
+            candidates = (
+                await db.execute(
+                    select(ranked.c.id, ranked.c.organization_id)
+                    .order_by(
+                        ranked.c.priority.desc(), ranked.c.turn, ranked.c.created_at
+                    )
+                    .limit(limit * CANDIDATES_PER_SLOT)
+                )
+            ).all()
+            if not candidates:
+                return []
+
+            # Skip rows another worker is claiming right now
+            locked = set(
+                await db.scalars(
+                    select(AgentExecution.id)
+                    .where(
+                        AgentExecution.id.in_([row.id for row in candidates]),
+                        AgentExecution.status == "queued",
+                    )
+                    .with_for_update(skip_locked=True)
+                )
+            )
+            chosen = []
+            for row in candidates:
+                if row.id not in locked:
+                    continue
+                if running.get(row.organization_id, 0) >= self.max_per_org:
+                    continue
+                running[row.organization_id] = running.get(row.organization_id, 0) + 1
+                chosen.append(row.id)
+                if len(chosen) == limit:
+                    break
+            if not chosen:
+                await db.rollback()
+                return []
+
+            claimed = await db.scalars(
+                update(AgentExecution)
+                .where(AgentExecution.id.in_(chosen))
+                .values(
+                    status="running",
+                    worker_id=worker_id,
+                    attempts=AgentExecution.attempts + 1,
+                    started_at=func.now(),
+                    lease_expires_at=self._lease_expiry(),
+                )
+                .returning(AgentExecution)
+            )
+            executions = [execution_to_dict(execution) for execution in claimed]
+            await db.commit()
+
+        order = {execution_id: i for i, execution_id in enumerate(chosen)}
+        return sorted(executions, key=lambda execution: order[execution["id"]])
+
+    async def renew(self, worker_id: str, execution_ids: List[str]) -> None:
+        """Extend the leases of a worker's running executions."""
+        if not execution_ids:
+            return
+        await self._update_owned(
+            execution_ids, worker_id, lease_expires_at=self._lease_expiry()
+        )
+
+    async def complete(
+        self, execution_id: str, worker_id: str, result: Dict[str, Any]
+    ) -> bool:
+        """
+        Record a successful execution.
+
+        Returns:
+            False if the worker no longer owned the execution (its lease
+            expired and the execution was re-queued)
+        """
+        return await self._update_owned(
+            [execution_id],
+            worker_id,
+            status="succeeded",
+            result=result,
+            error=None,
+            finished_at=func.now(),
+            lease_expires_at=None,
+        )
+
+    async def fail(
+        self,
+        execution: Dict[str, Any],
+        worker_id: str,
+        error: str,
+        retryable: bool = True,
+        retry_after: Optional[float] = None,
+    ) -> bool:
+        """
+        Record a failed attempt, re-queueing it with backoff if attempts remain.
+
+        Args:
+            execution: The execution as returned by ``claim``
+            worker_id: Worker that ran the attempt
+            error: Error message
+            retryable: Whether another attempt could succeed
+            retry_after: Minimum delay requested by the provider, in seconds
+
+        Returns:
+            False if the worker no longer owned the execution
+        """
+        if not retryable or execution["attempts"] >= execution["max_attempts"]:
+            return await self._update_owned(
+                [execution["id"]],
+                worker_id,
+                status="failed",
+                error=error,
+                finished_at=func.now(),
+                lease_expires_at=None,
+            )
+        return await self._update_owned(
+            [execution["id"]],
+            worker_id,
+            status="queued",
+            error=error,
+            worker_id=None,
+            lease_expires_at=None,
+            run_after=func.now()
+            + timedelta(seconds=self.retry_delay(execution["attempts"], retry_after)),
+        )
+
+    async def release(
+        self, worker_id: str, execution_ids: List[str], delay: float = 0.0
+    ) -> None:
+        """
+        Return executions to the queue without using an attempt.
+
+        Args:
+            worker_id: Worker that claimed them
+            execution_ids: Executions to return
+            delay: Seconds before they may be claimed again
+        """
+        if not execution_ids:
+            return
+        await self._update_owned(
+            execution_ids,
+            worker_id,
+            status="queued",
+            attempts=AgentExecution.attempts - 1,
+            worker_id=None,
+            lease_expires_at=None,
+            run_after=func.now() + timedelta(seconds=delay),
+        )
+
+    async def requeue_expired(self) -> int:
+        """
+        Recover executions whose worker stopped renewing its lease.
+
+        Returns:
+            Number of executions re-queued or, when out of attempts, failed
+        """
+        expired = and_(
+            AgentExecution.status == "running",
+            AgentExecution.lease_expires_at < func.now(),
+        )
+        async with self._session_factory() as db:
+            requeued = await db.execute(
+                update(AgentExecution)
+                .where(expired, AgentExecution.attempts < AgentExecution.max_attempts)
+                .values(
+                    status="queued",
+                    error="Worker lease expired",
+                    worker_id=None,
+                    lease_expires_at=None,
+                    run_after=func.now(),
+                )
+            )
+            failed = await db.execute(
+                update(AgentExecution)
+                .where(expired)
+                .values(
+                    status="failed",
+                    error="Worker lease expired",
+                    finished_at=func.now(),
+                    lease_expires_at=None,
+                )
+            )
+            await db.commit()
+        return requeued.rowcount + failed.rowcount
+
+    def retry_delay(self, attempts: int, retry_after: Optional[float] = None) -> float:
+        """Backoff before the next attempt: exponential with jitter."""
+        delay = min(self.retry_base * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+        delay *= random.uniform(0.5, 1.0)
+        return max(delay, retry_after or 0.0)
+
+    def _lease_expiry(self):
+        return func.now() + timedelta(seconds=self.lease_seconds)
+
+    async def _update_owned(
+        self, execution_ids: List[str], owner: str, **values: Any
+    ) -> bool:
+        # Only the worker holding the lease may change a running execution
+        async with self._session_factory() as db:
+            result = await db.execute(
+                update(AgentExecution)
+                .where(
+                    AgentExecution.id.in_(execution_ids),
+                    AgentExecution.worker_id == owner,
+                    AgentExecution.status == "running",
+                )
+                .values(**values)
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+
+class ExecutionWorker:
+    """Runs queued executions with bounded concurrency."""
+
+    def __init__(
+        self,
+        queue: ExecutionQueue,
+        handler: Handler,
+        concurrency: int = settings.EXECUTION_CONCURRENCY,
+        poll_interval: float = settings.EXECUTION_POLL_SECONDS,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> int:
+        """Executions this worker is running now."""
+        return len(self._tasks)
+
+    def notify(self) -> None:
+        """Check the queue now rather than at the next poll."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start claiming and running executions in the background."""
+        if self._loop_task is None:
+            self._stopping = False
+            self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """
+        Stop claiming, wait up to ``timeout`` seconds for running executions,
+        then cancel the rest and return them to the queue.
+        """
+        if self._loop_task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._loop_task
+        self._loop_task = None
+
+        if self._tasks:
+            _, pending = await asyncio.wait(list(self._tasks.values()), timeout=timeout)
+            interrupted = [
+                execution_id
+                for execution_id, task in self._tasks.items()
+                if task in pending
+            ]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            try:
+                await self.queue.release(self.worker_id, interrupted)
+            except (SQLAlchemyError, OSError) as e:
+                # Their leases will expire and another worker will retry them
+                logger.warning("Failed to release interrupted executions: %s", e)
+
+    async def _loop(self) -> None:
+        next_maintenance = 0.0
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                if time.monotonic() >= next_maintenance:
+                    await self.queue.renew(self.worker_id, list(self._tasks))
+                    await self.queue.requeue_expired()
+                    next_maintenance = time.monotonic() + self.queue.lease_seconds / 3
+                free = self.concurrency - len(self._tasks)
+                if free > 0:
+                    for execution in await self.queue.claim(self.worker_id, free):
+                        self._spawn(execution)
+            except (SQLAlchemyError, OSError) as e:
+                logger.warning("Execution worker poll failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, execution: Dict[str, Any]) -> None:
+        execution_id = execution["id"]
+        task = asyncio.create_task(self._run(execution))
+        self._tasks[execution_id] = task
+
+        def done(_: asyncio.Task) -> None:
+            self._tasks.pop(execution_id, None)
+            self._wakeup.set()  # a slot is free
+
+        task.add_done_callback(done)
+
+    async def _run(self, execution: Dict[str, Any]) -> None:
+        try:
+            try:
+                result = await self.handler(execution)
+            except RateLimitExceeded as e:
+                # Throttled before reaching the provider; not a failed attempt
+                await self.queue.release(
+                    self.worker_id, [execution["id"]], delay=e.retry_after or 0.0
+                )
+            except ProviderRateLimitError as e:
+                await self.queue.fail(
+                    execution, self.worker_id, str(e), retry_after=e.retry_after
+                )
+            except ValueError as e:
+                # Invalid input fails the same way on every attempt
+                await self.queue.fail(
+                    execution, self.worker_id, str(e), retryable=False
+                )
+            except Exception as e:
+                logger.warning("Execution %s failed: %s", execution["id"], e)
+                await self.queue.fail(
+                    execution, self.worker_id, str(e) or type(e).__name__
+                )
+            else:
+                await self.queue.complete(execution["id"], self.worker_id, result)
+        except (SQLAlchemyError, OSError) as e:
+            # The outcome is lost; the lease expires and the execution reruns
+            logger.warning("Failed to record execution %s: %s", execution["id"], e)
+
+
+async def run_agent(execution: Dict[str, Any]) -> Dict[str, Any]:
+    """Execution handler that runs the requested AI agent."""
+    return await ai_service.execute_agent(
+        execution["agent_id"],
+        execution["context"],
+        execution["parameters"],
+        organization_id=execution["organization_id"],
+    )
+
+
+# Global queue and worker instances
+execution_queue = ExecutionQueue()
+execution_worker = ExecutionWorker(execution_queue, run_agent)
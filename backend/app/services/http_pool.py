@@ -0,0 +1,140 @@
+"""
+Shared HTTP connection pool for LLM provider clients.
+
+Every provider SDK client is built on the one ``httpx.AsyncClient`` owned
+by ``HTTPPool``, so TLS sessions and keep-alive (or HTTP/2) connections to
+the provider APIs are reused across requests. The transport counts
+in-flight requests, including streamed responses until their body is
+closed, so pool pressure can be reported next to the pool's limits.
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports when it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close: Optional[Callable[[], None]] = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if self._on_close is not None:
+            self._on_close()
+            self._on_close = None
+        await self._stream.aclose()
+
+
+class _PoolTransport(httpx.AsyncHTTPTransport):
+    """Connection-pooling transport that counts requests in flight."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self._release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, self._release),
+            extensions=response.extensions,
+        )
+
+    def connection_stats(self) -> Dict[str, int]:
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"connections": len(connections), "idle": idle}
+
+
+class HTTPPool:
+    """Lazily created, tunable ``httpx.AsyncClient`` shared by providers."""
+
+    def __init__(
+        self,
+        max_connections: int = settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = settings.LLM_HTTP2,
+        timeout: Optional[httpx.Timeout] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.timeout = timeout or httpx.Timeout(
+            connect=settings.LLM_HTTP_CONNECT_TIMEOUT,
+            read=settings.LLM_HTTP_READ_TIMEOUT,
+            write=settings.LLM_HTTP_WRITE_TIMEOUT,
+            pool=settings.LLM_HTTP_POOL_TIMEOUT,
+        )
+        self._transport: Optional[_PoolTransport] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, created on first use."""
+        if self._client is None:
+            self._transport = _PoolTransport(limits=self.limits, http2=self.http2)
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return self._client
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool limits, open connections and requests in flight."""
+        stats: Dict[str, Any] = {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "connections": 0,
+            "idle": 0,
+            "active": 0,
+            "requests": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "utilization": 0.0,
+        }
+        if self._transport is None:
+            return stats
+        stats.update(self._transport.connection_stats())
+        stats["active"] = stats["connections"] - stats["idle"]
+        stats["requests"] = self._transport.requests
+        stats["in_flight"] = self._transport.in_flight
+        stats["peak_in_flight"] = self._transport.peak_in_flight
+        if self.limits.max_connections:
+            stats["utilization"] = round(
+                stats["active"] / self.limits.max_connections, 3
+            )
+        return stats
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._transport = None
@@ -0,0 +1,180 @@
+"""
+Minimal RFC 6902 JSON Patch diff/apply for ProseMirror documents.
+"""
+
+import copy
+from typing import Any, Dict, List
+
+JsonPatch = List[Dict[str, Any]]
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch cannot be applied to a document."""
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer}")
+    return [_unescape(token) for token in pointer[1:].split("/")]
+
+
+def make_diff(old: Any, new: Any, path: str = "") -> JsonPatch:
+    """
+    Compute a JSON Patch that turns ``old`` into ``new``.
+
+    Lists are diffed by trimming the common prefix and suffix first, so
+    inserting or deleting one block in a long document yields a single op
+    rather than rewriting every following node.
+    """
+    if old == new:
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: JsonPatch = []
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(make_diff(old[key], value, child))
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        prefix = 0
+        limit = min(len(old), len(new))
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < limit - prefix
+            and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]
+        ):
+            suffix += 1
+
+        old_mid = old[prefix : len(old) - suffix]
+        new_mid = new[prefix : len(new) - suffix]
+        ops = []
+        for i in range(min(len(old_mid), len(new_mid))):
+            ops.extend(make_diff(old_mid[i], new_mid[i], f"{path}/{prefix + i}"))
+        if len(new_mid) > len(old_mid):
+            for i in range(len(old_mid), len(new_mid)):
+                ops.append(
+                    {"op": "add", "path": f"{path}/{prefix + i}", "value": new_mid[i]}
+                )
+        else:
+            for _ in range(len(new_mid), len(old_mid)):
+                ops.append({"op": "remove", "path": f"{path}/{prefix + len(new_mid)}"})
+        return ops
+
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _index(token: str, size: int) -> int:
+    """Parse a list index token, valid for ``0 <= index < size``."""
+    # RFC 6901 indexes are plain decimal digits without leading zeros
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise JsonPatchError(f"Invalid list index: {token}")
+    index = int(token)
+    if index >= size:
+        raise JsonPatchError(f"List index out of range: {token}")
+    return index
+
+
+def _resolve(doc: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, list):
+            doc = doc[_index(token, len(doc))]
+        elif isinstance(doc, dict):
+            if token not in doc:
+                raise JsonPatchError(f"Path not found: {token}")
+            doc = doc[token]
+        else:
+            raise JsonPatchError(f"Cannot traverse into scalar at: {token}")
+    return doc
+
+
+def _add(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent, key = _resolve(doc, tokens[:-1]), tokens[-1]
+    if isinstance(parent, list):
+        # Inserting at len(parent) appends, like "-"
+        index = len(parent) if key == "-" else _index(key, len(parent) + 1)
+        parent.insert(index, value)
+    elif isinstance(parent, dict):
+        parent[key] = value
+    else:
+        raise JsonPatchError("Cannot add to a scalar")
+    return doc
+
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the document root")
+    parent, key = _resolve(doc, tokens[:-1]), tokens[-1]
+    if isinstance(parent, list):
+        return parent.pop(_index(key, len(parent)))
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JsonPatchError(f"Path not found: {key}")
+        return parent.pop(key)
+    raise JsonPatchError("Cannot remove from a scalar")
+
+
+def _member(operation: Dict[str, Any], name: str) -> Any:
+    """A member an operation requires, e.g. "value" for add."""
+    if name not in operation:
+        raise JsonPatchError(f"{operation.get('op')} operation requires '{name}'")
+    return operation[name]
+
+
+def apply_patch(doc: Any, patch: JsonPatch, in_place: bool = False) -> Any:
+    """
+    Apply a JSON Patch and return the patched document.
+
+    Supports the add, remove, replace, move, copy and test operations. The
+    input is deep-copied first unless ``in_place`` is set.
+
+    Raises:
+        JsonPatchError: If an operation is malformed or does not apply
+    """
+    if not in_place:
+        doc = copy.deepcopy(doc)
+
+    for operation in patch:
+        op = operation.get("op")
+        tokens = _parse_pointer(_member(operation, "path"))
+        if op == "add":
+            doc = _add(doc, tokens, copy.deepcopy(_member(operation, "value")))
+        elif op == "remove":
+            _remove(doc, tokens)
+        elif op == "replace":
+            value = copy.deepcopy(_member(operation, "value"))
+            if tokens:
+                _remove(doc, tokens)
+            doc = _add(doc, tokens, value)
+        elif op in ("move", "copy"):
+            source = _parse_pointer(_member(operation, "from"))
+            if op == "move":
+                value = _remove(doc, source)
+            else:
+                value = copy.deepcopy(_resolve(doc, source))
+            doc = _add(doc, tokens, value)
+        elif op == "test":
+            if _resolve(doc, tokens) != _member(operation, "value"):
+                raise JsonPatchError(f"Test failed at: {operation['path']}")
+        else:
+            raise JsonPatchError(f"Unsupported operation: {op}")
+    return doc
@@ -0,0 +1,680 @@
+"""
+LLM provider clients behind a common streaming interface.
+
+A provider turns a ``CompletionRequest`` into a stream of ``StreamEvent``s:
+text deltas as the model produces them, then one final event carrying
+token usage. ``complete`` is built on ``stream``, so streaming and
+non-streaming calls share one code path per provider. Providers are
+registered by name with ``register_provider`` and selected through
+``AIAgentConfig.model_provider``. SDKs are imported and clients created on
+first use, so processes that never call a provider do not pay for loading
+them; clients can share one pooled ``httpx.AsyncClient`` (see
+``app.services.http_pool``).
+
+Requests put their static material first: the system prompt, then any
+shared ``context``, then the messages that change from call to call. That
+stable prefix is marked for Anthropic's prompt cache and is what OpenAI's
+automatic prefix caching matches on; ``Usage`` reports how many input
+tokens were read from (or written to) the cache. Neither provider caches
+prefixes shorter than about 1024 tokens.
+
+The ``fake`` provider stands in for a real one in load tests: it streams
+deterministic text at a configurable pace, injects errors and 429s at
+configurable rates, and simulates the prompt cache, all without network
+calls or quota.
+
+Providers with an asynchronous batch API (``supports_batch``) can also
+take many requests at once for cheaper offline processing: submit them
+with ``submit_batch``, poll ``batch_status`` and fetch ``batch_results``
+once the batch has ended.
+"""
+
+import asyncio
+import hashlib
+import importlib
+import json
+import random
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+import httpx
+
+from app.core.config import settings
+from app.services.chunking import estimate_tokens
+
+if TYPE_CHECKING:
+    import anthropic
+    import openai
+
+
+@dataclass
+class Usage:
+    """Token usage of one completion."""
+
+    input_tokens: int = 0  # all input tokens, cached or not
+    output_tokens: int = 0
+    cached_input_tokens: int = 0  # input tokens read from the prompt cache
+    cache_write_input_tokens: int = 0  # input tokens written to the prompt cache
+
+    def __add__(self, other: "Usage") -> "Usage":
+        return Usage(
+            self.input_tokens + other.input_tokens,
+            self.output_tokens + other.output_tokens,
+            self.cached_input_tokens + other.cached_input_tokens,
+            self.cache_write_input_tokens + other.cache_write_input_tokens,
+        )
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        return self.input_tokens - self.cached_input_tokens
+
+
+@dataclass
+class CompletionRequest:
+    """Provider-neutral chat completion request."""
+
+    model: str
+    system: str
+    messages: List[Dict[str, str]]
+    max_tokens: int = 1000
+    temperature: float = 0.7
+    # Static material shared by many calls, sent after the system prompt as
+    # part of the cacheable prefix
+    context: str = ""
+
+
+@dataclass
+class StreamEvent:
+    """A text delta, or (``done``) the end of the response with its usage."""
+
+    text: str = ""
+    done: bool = False
+    usage: Usage = field(default_factory=Usage)
+    stop_reason: Optional[str] = None
+    cached: bool = False  # served from the result cache; no tokens used
+    coalesced: bool = False  # shared another caller's in-flight call
+
+
+@dataclass
+class Completion:
+    """A complete (non-streamed) response."""
+
+    text: str
+    usage: Usage
+    stop_reason: Optional[str] = None
+    coalesced: bool = False
+
+
+async def collect(events: AsyncGenerator[StreamEvent, None]) -> Completion:
+    """Consume a stream of events into a ``Completion``."""
+    parts = []
+    final = StreamEvent(done=True)
+    try:
+        async for event in events:
+            if event.done:
+                final = event
+            else:
+                parts.append(event.text)
+    finally:
+        await events.aclose()
+    return Completion("".join(parts), final.usage, final.stop_reason, final.coalesced)
+
+
+@dataclass
+class BatchStatus:
+    """Progress of a provider batch."""
+
+    id: str
+    status: str  # in_progress, ended, failed, expired or cancelled
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+
+    @property
+    def ended(self) -> bool:
+        return self.status != "in_progress"
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one request in a provider batch."""
+
+    custom_id: str
+    completion: Optional[Completion] = None
+    error: Optional[str] = None
+
+
+class ProviderError(Exception):
+    """Raised when a provider call fails."""
+
+
+class ProviderRateLimitError(ProviderError):
+    """Raised when a provider rejects a call with 429."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+@contextmanager
+def _provider_errors(rate_limit_error: type, base_error: type) -> Iterator[None]:
+    """Translate SDK exceptions into ``ProviderError``s."""
+    try:
+        yield
+    except rate_limit_error as e:
+        raise ProviderRateLimitError(str(e), _retry_after(e)) from e
+    except base_error as e:
+        raise ProviderError(str(e)) from e
+
+
+class LLMProvider:
+    """Base class for LLM providers."""
+
+    name: str = "base"
+    supports_batch: bool = False
+    sdk_module: Optional[str] = None  # imported on first use
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        # Shared with other providers and owned by the caller, which closes it
+        self.http_client = http_client
+
+    @property
+    def sdk(self) -> Any:
+        """The provider's SDK module."""
+        return importlib.import_module(self.sdk_module)
+
+    def stream(self, request: CompletionRequest) -> AsyncGenerator[StreamEvent, None]:
+        """
+        Stream a completion.
+
+        Yields text deltas followed by exactly one ``done`` event. Closing
+        the iterator early aborts the upstream request.
+        """
+        raise NotImplementedError
+
+    async def complete(self, request: CompletionRequest) -> Completion:
+        """Run a completion to the end and return the full text."""
+        return await collect(self.stream(request))
+
+    async def submit_batch(self, requests: Dict[str, CompletionRequest]) -> str:
+        """
+        Queue requests for asynchronous processing by the provider.
+
+        Args:
+            requests: Requests by custom id (letters, digits, ``_`` and
+                ``-``, at most 64 characters)
+
+        Returns:
+            The provider's batch id
+        """
+        raise NotImplementedError(f"{self.name} has no batch mode")
+
+    async def batch_status(self, batch_id: str) -> BatchStatus:
+        """Get a batch's progress."""
+        raise NotImplementedError(f"{self.name} has no batch mode")
+
+    async def batch_results(self, batch_id: str) -> List[BatchResult]:
+        """Get the results of an ended batch."""
+        raise NotImplementedError(f"{self.name} has no batch mode")
+
+    async def aclose(self) -> None:
+        """Release network resources."""
+
+
+def _openai_usage(usage: Dict[str, Any]) -> Usage:
+    details = usage.get("prompt_tokens_details") or {}
+    return Usage(
+        usage.get("prompt_tokens") or 0,
+        usage.get("completion_tokens") or 0,
+        cached_input_tokens=details.get("cached_tokens") or 0,
+    )
+
+
+def _anthropic_usage(usage: Any, output_tokens: int) -> Usage:
+    # Anthropic counts cache reads and writes apart from input_tokens
+    cached = getattr(usage, "cache_read_input_tokens", None) or 0
+    written = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return Usage(
+        usage.input_tokens + cached + written,
+        output_tokens,
+        cached_input_tokens=cached,
+        cache_write_input_tokens=written,
+    )
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions."""
+
+    name = "openai"
+    supports_batch = True
+    sdk_module = "openai"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = settings.OPENAI_API_KEY,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        super().__init__(http_client)
+        self._api_key = api_key
+        self._client: Optional["openai.AsyncOpenAI"] = None
+
+    @property
+    def client(self) -> "openai.AsyncOpenAI":
+        if self._client is None:
+            self._client = self.sdk.AsyncOpenAI(
+                api_key=self._api_key, http_client=self.http_client
+            )
+        return self._client
+
+    def _errors(self):
+        return _provider_errors(self.sdk.RateLimitError, self.sdk.OpenAIError)
+
+    @staticmethod
+    def _params(request: CompletionRequest) -> Dict[str, Any]:
+        # Prefix caching is automatic; it only needs the static part first
+        prefix = [text for text in (request.system, request.context) if text]
+        messages = [{"role": "system", "content": text} for text in prefix]
+        messages.extend(request.messages)
+        return {
+            "model": request.model,
+            "messages": messages,
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature,
+        }
+
+    async def stream(
+        self, request: CompletionRequest
+    ) -> AsyncGenerator[StreamEvent, None]:
+        usage = Usage()
+        stop_reason = None
+        with self._errors():
+            response = await self.client.chat.completions.create(
+                **self._params(request),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            try:
+                async for chunk in response:
+                    if chunk.usage is not None:
+                        usage = _openai_usage(chunk.usage.model_dump())
+                    for choice in chunk.choices:
+                        if choice.delta.content:
+                            yield StreamEvent(text=choice.delta.content)
+                        if choice.finish_reason:
+                            stop_reason = choice.finish_reason
+            finally:
+                await response.close()
+        yield StreamEvent(done=True, usage=usage, stop_reason=stop_reason)
+
+    async def submit_batch(self, requests: Dict[str, CompletionRequest]) -> str:
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._params(request),
+                }
+            )
+            for custom_id, request in requests.items()
+        ]
+        with self._errors():
+            upload = await self.client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=upload.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+            )
+        return batch.id
+
+    async def batch_status(self, batch_id: str) -> BatchStatus:
+        with self._errors():
+            batch = await self.client.batches.retrieve(batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing"):
+            status = "in_progress"
+        elif batch.status == "completed":
+            status = "ended"
+        elif batch.status in ("cancelling", "cancelled"):
+            status = "cancelled"
+        else:
+            status = batch.status  # failed or expired
+        counts = batch.request_counts
+        return BatchStatus(
+            batch.id,
+            status,
+            total=counts.total if counts else 0,
+            succeeded=counts.completed if counts else 0,
+            failed=counts.failed if counts else 0,
+        )
+
+    async def batch_results(self, batch_id: str) -> List[BatchResult]:
+        results = []
+        with self._errors():
+            batch = await self.client.batches.retrieve(batch_id)
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id is None:
+                    continue
+                content = await self.client.files.content(file_id)
+                for line in content.text.splitlines():
+                    if line.strip():
+                        results.append(self._batch_result(json.loads(line)))
+        return results
+
+    @staticmethod
+    def _batch_result(record: Dict[str, Any]) -> BatchResult:
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or body.get("error") or {}
+            return BatchResult(
+                record["custom_id"], error=error.get("message", "Request failed")
+            )
+        choice = body["choices"][0]
+        return BatchResult(
+            record["custom_id"],
+            Completion(
+                choice["message"].get("content") or "",
+                _openai_usage(body.get("usage") or {}),
+                choice.get("finish_reason"),
+            ),
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None and self.http_client is None:
+            await self._client.close()
+        self._client = None
+
+
+class AnthropicProvider(LLMProvider):
+    """Anthropic messages API."""
+
+    name = "anthropic"
+    supports_batch = True
+    sdk_module = "anthropic"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = settings.ANTHROPIC_API_KEY,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        super().__init__(http_client)
+        self._api_key = api_key
+        self._client: Optional["anthropic.AsyncAnthropic"] = None
+
+    @property
+    def client(self) -> "anthropic.AsyncAnthropic":
+        if self._client is None:
+            self._client = self.sdk.AsyncAnthropic(
+                api_key=self._api_key, http_client=self.http_client
+            )
+        return self._client
+
+    def _errors(self):
+        return _provider_errors(self.sdk.RateLimitError, self.sdk.AnthropicError)
+
+    @staticmethod
+    def _params(request: CompletionRequest) -> Dict[str, Any]:
+        system = [
+            {"type": "text", "text": text}
+            for text in (request.system, request.context)
+            if text
+        ]
+        params: Dict[str, Any] = {
+            "model": request.model,
+            "messages": request.messages,
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature,
+        }
+        if system:
+            # Cache everything up to and including the last static block
+            system[-1]["cache_control"] = {"type": "ephemeral"}
+            params["system"] = system
+        return params
+
+    async def stream(
+        self, request: CompletionRequest
+    ) -> AsyncGenerator[StreamEvent, None]:
+        usage = Usage()
+        stop_reason = None
+        with self._errors():
+            response = await self.client.messages.create(
+                **self._params(request), stream=True
+            )
+            try:
+                async for event in response:
+                    if event.type == "message_start":
+                        usage = _anthropic_usage(event.message.usage, 0)
+                    elif event.type == "content_block_delta":
+                        if event.delta.type == "text_delta":
+                            yield StreamEvent(text=event.delta.text)
+                    elif event.type == "message_delta":
+                        usage.output_tokens = event.usage.output_tokens
+                        stop_reason = event.delta.stop_reason
+            finally:
+                await response.close()
+        yield StreamEvent(done=True, usage=usage, stop_reason=stop_reason)
+
+    async def submit_batch(self, requests: Dict[str, CompletionRequest]) -> str:
+        with self._errors():
+            batch = await self.client.beta.messages.batches.create(
+                requests=[
+                    {"custom_id": custom_id, "params": self._params(request)}
+                    for custom_id, request in requests.items()
+                ]
+            )
+        return batch.id
+
+    async def batch_status(self, batch_id: str) -> BatchStatus:
+        with self._errors():
+            batch = await self.client.beta.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        failed = counts.errored + counts.canceled + counts.expired
+        return BatchStatus(
+            batch.id,
+            "ended" if batch.processing_status == "ended" else "in_progress",
+            total=counts.processing + counts.succeeded + failed,
+            succeeded=counts.succeeded,
+            failed=failed,
+        )
+
+    async def batch_results(self, batch_id: str) -> List[BatchResult]:
+        results = []
+        with self._errors():
+            entries = await self.client.beta.messages.batches.results(batch_id)
+            async for entry in entries:
+                result = entry.result
+                if result.type != "succeeded":
+                    error = getattr(result, "error", None)
+                    message = getattr(getattr(error, "error", None), "message", None)
+                    results.append(
+                        BatchResult(entry.custom_id, error=message or result.type)
+                    )
+                    continue
+                message = result.message
+                text = "".join(
+                    block.text for block in message.content if block.type == "text"
+                )
+                usage = _anthropic_usage(message.usage, message.usage.output_tokens)
+                results.append(
+                    BatchResult(
+                        entry.custom_id,
+                        Completion(text, usage, message.stop_reason),
+                    )
+                )
+        return results
+
+    async def aclose(self) -> None:
+        if self._client is not None and self.http_client is None:
+            await self._client.close()
+        self._client = None
+
+
+_FAKE_WORDS = (
+    "the analysis shows that this document covers key themes such as "
+    "structure, clarity, context, goals, risks, decisions and next steps; "
+    "consider adding examples, owners, dates and a short summary for readers"
+).split()
+
+
+class FakeProvider(LLMProvider):
+    """
+    Local stand-in for load tests.
+
+    The response text depends only on the request, so equal requests get
+    equal responses and the result cache and coalescing behave as they would
+    with a real provider. Timing follows ``time_to_first_token`` and
+    ``tokens_per_second``; injected failures are drawn at random per call.
+    """
+
+    name = "fake"
+    PROMPT_CACHE_MIN_TOKENS = 1024
+    PROMPT_CACHE_TTL_SECONDS = 300.0
+    PROMPT_CACHE_MAX_ENTRIES = 10_000
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        time_to_first_token: float = settings.FAKE_LLM_TIME_TO_FIRST_TOKEN_SECONDS,
+        tokens_per_second: float = settings.FAKE_LLM_TOKENS_PER_SECOND,
+        output_tokens: int = settings.FAKE_LLM_OUTPUT_TOKENS,
+        error_rate: float = settings.FAKE_LLM_ERROR_RATE,
+        rate_limit_rate: float = settings.FAKE_LLM_RATE_LIMIT_RATE,
+        retry_after: float = settings.FAKE_LLM_RETRY_AFTER_SECONDS,
+        seed: Optional[int] = settings.FAKE_LLM_SEED,
+    ):
+        super().__init__(http_client)
+        self.time_to_first_token = time_to_first_token
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._prefixes: "OrderedDict[str, float]" = OrderedDict()
+
+    def _prompt_cache(self, request: CompletionRequest) -> Usage:
+        """Simulate provider prefix caching of the system prompt and context."""
+        prefix = request.system + request.context
+        tokens = estimate_tokens(prefix)
+        if tokens < self.PROMPT_CACHE_MIN_TOKENS:
+            return Usage()
+        key = hashlib.sha256(prefix.encode()).hexdigest()
+        now = time.monotonic()
+        hit = self._prefixes.pop(key, 0.0) > now
+        self._prefixes[key] = now + self.PROMPT_CACHE_TTL_SECONDS
+        if len(self._prefixes) > self.PROMPT_CACHE_MAX_ENTRIES:
+            self._prefixes.popitem(last=False)
+        if hit:
+            return Usage(cached_input_tokens=tokens)
+        return Usage(cache_write_input_tokens=tokens)
+
+    def _words(self, request: CompletionRequest) -> List[str]:
+        seed = hashlib.sha256(json.dumps(self._params(request)).encode()).digest()
+        words = random.Random(seed).choices(
+            _FAKE_WORDS, k=min(self.output_tokens, request.max_tokens)
+        )
+        return [word + " " for word in words]
+
+    @staticmethod
+    def _params(request: CompletionRequest) -> Dict[str, Any]:
+        return {
+            "model": request.model,
+            "system": request.system,
+            "context": request.context,
+            "messages": request.messages,
+        }
+
+    async def stream(
+        self, request: CompletionRequest
+    ) -> AsyncGenerator[StreamEvent, None]:
+        self.calls += 1
+        draw = self._random.random()
+        if draw < self.rate_limit_rate:
+            raise ProviderRateLimitError(
+                "Fake provider rate limit", retry_after=self.retry_after
+            )
+
+        loop = asyncio.get_running_loop()
+        start = loop.time() + self.time_to_first_token
+        await asyncio.sleep(self.time_to_first_token)
+        if draw < self.rate_limit_rate + self.error_rate:
+            raise ProviderError("Fake provider error")
+
+        words = self._words(request)
+        for i, word in enumerate(words):
+            if self.tokens_per_second > 0:
+                # Pace against the start time so sleeps do not add up drift
+                delay = start + i / self.tokens_per_second - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield StreamEvent(text=word)
+
+        usage = self._prompt_cache(request)
+        usage.input_tokens = estimate_tokens(
+            request.system
+            + request.context
+            + "".join(m.get("content", "") for m in request.messages)
+        )
+        usage.output_tokens = len(words)
+        stop_reason = "length" if len(words) == request.max_tokens else "stop"
+        yield StreamEvent(done=True, usage=usage, stop_reason=stop_reason)
+
+
+_PROVIDERS: Dict[str, Callable[..., LLMProvider]] = {
+    "openai": OpenAIProvider,
+    "anthropic": AnthropicProvider,
+    "fake": FakeProvider,
+}
+
+
+def register_provider(name: str, factory: Callable[..., LLMProvider]) -> None:
+    """
+    Make a provider selectable via ``AIAgentConfig.model_provider``.
+
+    ``factory`` is called with an ``http_client`` keyword argument.
+    """
+    _PROVIDERS[name] = factory
+
+
+def preload_sdks(names: Iterable[str]) -> None:
+    """Import the SDKs of the named providers ahead of their first call."""
+    for name in names:
+        module = getattr(_PROVIDERS.get(name), "sdk_module", None)
+        if module is not None:
+            importlib.import_module(module)
+
+
+def create_provider(
+    name: str, http_client: Optional[httpx.AsyncClient] = None
+) -> LLMProvider:
+    """Instantiate a registered provider, optionally on a shared HTTP client."""
+    try:
+        factory = _PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown model provider: {name}")
+    return factory(http_client=http_client)
@@ -0,0 +1,105 @@
+"""
+Organization service for organization reads and writes.
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache
+from app.models.document import Document
+from app.models.organization import Organization
+from app.services.document_service import document_service
+
+
+class OrganizationNotFoundError(LookupError):
+    """Raised when an organization does not exist."""
+
+
+def organization_tag(organization_id: str) -> str:
+    """Cache tag for entries derived from an organization."""
+    return f"org:{organization_id}"
+
+
+def organization_to_dict(organization: Organization) -> Dict[str, Any]:
+    """Convert an ``Organization`` to a response dict."""
+    return {
+        "id": organization.id,
+        "name": organization.name,
+        "slug": organization.slug,
+        "created_at": organization.created_at.isoformat(),
+        "updated_at": organization.updated_at.isoformat(),
+    }
+
+
+class OrganizationService:
+    """Service for organization queries and writes."""
+
+    async def get_organization(
+        self, db: AsyncSession, organization_id: str
+    ) -> Dict[str, Any]:
+        """
+        Get an organization as a response dict, reading through the cache.
+
+        Raises:
+            OrganizationNotFoundError: If the organization does not exist
+        """
+
+        async def load() -> Dict[str, Any]:
+            return organization_to_dict(await self._get(db, organization_id))
+
+        return await cache.get_or_load(
+            organization_tag(organization_id),
+            load,
+            tags=[organization_tag(organization_id)],
+        )
+
+    async def create_organization(
+        self, db: AsyncSession, name: str, slug: str
+    ) -> Dict[str, Any]:
+        """Create an organization."""
+        organization = Organization(name=name, slug=slug)
+        db.add(organization)
+        await db.commit()
+        return organization_to_dict(organization)
+
+    async def update_organization(
+        self, db: AsyncSession, organization_id: str, name: str
+    ) -> Dict[str, Any]:
+        """Rename an organization."""
+        organization = await self._get(db, organization_id)
+        organization.name = name
+        organization.updated_at = func.now()
+        await db.commit()
+        await cache.invalidate(organization_tag(organization_id))
+        return organization_to_dict(organization)
+
+    async def delete_organization(self, db: AsyncSession, organization_id: str) -> None:
+        """Delete an organization and everything it owns."""
+        # Locked so no document is added while its documents are released
+        found = await db.scalar(
+            select(Organization.id)
+            .where(Organization.id == organization_id)
+            .with_for_update()
+        )
+        if found is None:
+            raise OrganizationNotFoundError(f"Organization {organization_id} not found")
+        deleted = await document_service.delete_documents(
+            db, Document.organization_id == organization_id
+        )
+        # Projects, memberships and the rest go by cascade
+        await db.execute(delete(Organization).where(Organization.id == organization_id))
+        await db.commit()
+        await cache.invalidate(organization_tag(organization_id))
+        await document_service.forget_documents(deleted)
+
+    async def _get(self, db: AsyncSession, organization_id: str) -> Organization:
+        organization = await db.get(Organization, organization_id)
+        if organization is None:
+            raise OrganizationNotFoundError(f"Organization {organization_id} not found")
+        return organization
+
+
+# Global organization service instance
+organization_service = OrganizationService()
@@ -0,0 +1,150 @@
+"""
+Project service for project reads and writes.
+"""
+
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache
+from app.models.document import Document
+from app.models.organization import Organization
+from app.models.project import Project
+from app.services.document_service import document_service
+from app.services.organization_service import OrganizationNotFoundError
+
+
+class ProjectNotFoundError(LookupError):
+    """Raised when a project does not exist."""
+
+
+def project_tag(project_id: str) -> str:
+    """Cache tag for entries derived from a project."""
+    return f"project:{project_id}"
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def project_to_dict(project: Project) -> Dict[str, Any]:
+    """Convert a ``Project`` to a response dict."""
+    return {
+        "id": project.id,
+        "organization_id": project.organization_id,
+        "name": project.name,
+        "description": project.description,
+        "created_by": project.created_by,
+        "created_at": project.created_at.isoformat(),
+        "updated_at": project.updated_at.isoformat(),
+    }
+
+
+class ProjectService:
+    """Service for project queries and writes."""
+
+    async def list_projects(
+        self, db: AsyncSession, organization_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """List projects, optionally within one organization."""
+        query = select(Project).order_by(Project.name)
+        if organization_id is not None:
+            query = query.where(Project.organization_id == organization_id)
+        return [project_to_dict(project) for project in await db.scalars(query)]
+
+    async def get_project(self, db: AsyncSession, project_id: str) -> Dict[str, Any]:
+        """
+        Get a project as a response dict, reading through the cache.
+
+        Raises:
+            ProjectNotFoundError: If the project does not exist
+        """
+
+        async def load() -> Dict[str, Any]:
+            return project_to_dict(await self._get(db, project_id))
+
+        return await cache.get_or_load(
+            project_tag(project_id),
+            load,
+            tags=[project_tag(project_id)],
+            value_tags=lambda data: [f"org:{data['organization_id']}"],
+        )
+
+    async def create_project(
+        self,
+        db: AsyncSession,
+        organization_id: str,
+        name: str,
+        description: str = "",
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create a project.
+
+        Raises:
+            OrganizationNotFoundError: If the organization does not exist
+        """
+        # Key-share locked so the organization cannot be deleted before the
+        # insert; a malformed id cannot name one either
+        found = None
+        if _is_uuid(organization_id):
+            found = await db.scalar(
+                select(Organization.id)
+                .where(Organization.id == organization_id)
+                .with_for_update(read=True, key_share=True)
+            )
+        if found is None:
+            raise OrganizationNotFoundError(f"Organization {organization_id} not found")
+        project = Project(
+            organization_id=organization_id,
+            name=name,
+            description=description,
+            created_by=created_by,
+        )
+        db.add(project)
+        await db.commit()
+        return project_to_dict(project)
+
+    async def update_project(
+        self, db: AsyncSession, project_id: str, name: str, description: str = ""
+    ) -> Dict[str, Any]:
+        """Update a project's name and description."""
+        project = await self._get(db, project_id)
+        project.name = name
+        project.description = description
+        project.updated_at = func.now()
+        await db.commit()
+        await cache.invalidate(project_tag(project_id))
+        return project_to_dict(project)
+
+    async def delete_project(self, db: AsyncSession, project_id: str) -> None:
+        """Delete a project and its documents."""
+        # Locked so no document is added while its documents are released
+        found = await db.scalar(
+            select(Project.id).where(Project.id == project_id).with_for_update()
+        )
+        if found is None:
+            raise ProjectNotFoundError(f"Project {project_id} not found")
+        deleted = await document_service.delete_documents(
+            db, Document.project_id == project_id
+        )
+        await db.execute(delete(Project).where(Project.id == project_id))
+        await db.commit()
+        await cache.invalidate(project_tag(project_id))
+        await document_service.forget_documents(deleted)
+
+    async def _get(self, db: AsyncSession, project_id: str) -> Project:
+        project = await db.get(Project, project_id)
+        if project is None:
+            raise ProjectNotFoundError(f"Project {project_id} not found")
+        return project
+
+
+# Global project service instance
+project_service = ProjectService()
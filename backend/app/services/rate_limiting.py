@@ -0,0 +1,393 @@
+"""
+Admission control for LLM provider calls.
+
+Every provider call passes two gates before it starts:
+
+* Token buckets, measured in requests and in estimated tokens, one pair
+  shared by the whole process and one pair per organization, so a single
+  tenant cannot use up the provider quota. A call reserves its cost up
+  front and waits until the buckets have refilled enough to cover it;
+  reservations queue callers in arrival order. The estimate (prompt plus
+  ``max_tokens``) is corrected to the actual usage once the call finishes.
+* An AIMD concurrency limit per provider. The limit grows by one for every
+  window of successful calls and halves when the provider answers 429 or
+  first-token latency spikes far above its recent baseline.
+
+Waiting is bounded: a call that would wait longer than
+``AI_RATE_LIMIT_MAX_WAIT_SECONDS`` fails at once with ``RateLimitExceeded``
+and a ``retry_after`` hint, which the API turns into ``429 Too Many
+Requests`` with a ``Retry-After`` header. Limits apply per process; divide
+the provider quota by the number of API and worker processes.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.chunking import estimate_tokens
+from app.services.llm_providers import (
+    CompletionRequest,
+    ProviderRateLimitError,
+    StreamEvent,
+)
+
+DECREASE_INTERVAL_SECONDS = 1.0  # at most one multiplicative decrease per interval
+LATENCY_SMOOTHING = 0.1  # weight of each new sample in the latency baseline
+MAX_ORG_BUCKETS = 10_000  # idle organizations' buckets are dropped beyond this
+
+StreamFactory = Callable[[CompletionRequest], AsyncGenerator[StreamEvent, None]]
+
+
+class RateLimitExceeded(ProviderRateLimitError):
+    """Raised when a call would wait longer than allowed to be admitted."""
+
+
+@dataclass
+class RateLimitStats:
+    """Admission counters."""
+
+    admitted: int = 0
+    delayed: int = 0  # admitted after waiting for a bucket or a slot
+    rejected: int = 0
+    provider_rate_limited: int = 0  # 429s returned by providers
+    latency_spikes: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class TokenBucket:
+    """Refills continuously at ``rate`` per minute, holding up to ``capacity``."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else float(rate_per_minute)
+        self.tokens = self.capacity  # negative while callers hold reservations
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` is available, after earlier reservations."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit that adapts by additive increase, multiplicative decrease."""
+
+    def __init__(
+        self,
+        initial: int = settings.AI_CONCURRENCY_INITIAL,
+        minimum: int = settings.AI_CONCURRENCY_MIN,
+        maximum: int = settings.AI_CONCURRENCY_MAX,
+        latency_tolerance: float = settings.AI_LATENCY_TOLERANCE,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.latency_baseline: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self, timeout: float) -> bool:
+        """
+        Take a slot, waiting up to ``timeout`` seconds for one.
+
+        Returns:
+            False if no slot became free in time
+        """
+        if self.available:
+            self.in_flight += 1
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=max(timeout, 0.0))
+        except BaseException:
+            if waiter.done():
+                # Handed a slot just as the wait was cancelled
+                self._release_slot()
+            else:
+                self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            return False
+        return True
+
+    @property
+    def available(self) -> bool:
+        """Whether a slot can be taken without waiting."""
+        return not self._waiters and self.in_flight < int(self.limit)
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        self._waiters.remove(waiter)
+        waiter.cancel()
+
+    def release(
+        self, latency: Optional[float] = None, overloaded: bool = False
+    ) -> bool:
+        """
+        Free a slot and adapt the limit to how the call went.
+
+        Args:
+            latency: Seconds to the first response event, if the call got one
+            overloaded: The provider rejected the call with 429
+
+        Returns:
+            Whether the call counted as a latency spike
+        """
+        spike = False
+        if latency is not None and not overloaded:
+            baseline = self.latency_baseline
+            spike = baseline is not None and latency > baseline * self.latency_tolerance
+            # Spikes move the baseline too, so a lasting slowdown becomes normal
+            self.latency_baseline = (
+                latency
+                if baseline is None
+                else baseline + LATENCY_SMOOTHING * (latency - baseline)
+            )
+        if overloaded or spike:
+            now = time.monotonic()
+            if now - self._last_decrease >= DECREASE_INTERVAL_SECONDS:
+                self.limit = max(float(self.minimum), self.limit / 2)
+                self._last_decrease = now
+        elif latency is not None:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+        self._release_slot()
+        return spike
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "latency_baseline_ms": (
+                round(self.latency_baseline * 1000, 1)
+                if self.latency_baseline is not None
+                else None
+            ),
+        }
+
+
+def estimate_request_tokens(request: CompletionRequest) -> int:
+    """Upper estimate of the tokens a request uses: its prompt plus ``max_tokens``."""
+    prompt = (
+        request.system
+        + request.context
+        + "".join(m.get("content", "") for m in request.messages)
+    )
+    return estimate_tokens(prompt) + request.max_tokens
+
+
+class RateLimiter:
+    """Token-bucket and adaptive-concurrency gates in front of provider calls."""
+
+    def __init__(
+        self,
+        global_requests_per_minute: int = settings.AI_GLOBAL_REQUESTS_PER_MINUTE,
+        global_tokens_per_minute: int = settings.AI_GLOBAL_TOKENS_PER_MINUTE,
+        org_requests_per_minute: int = settings.AI_ORG_REQUESTS_PER_MINUTE,
+        org_tokens_per_minute: int = settings.AI_ORG_TOKENS_PER_MINUTE,
+        max_wait: float = settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS,
+    ):
+        self.org_requests_per_minute = org_requests_per_minute
+        self.org_tokens_per_minute = org_tokens_per_minute
+        self.max_wait = max_wait
+        self.global_requests = TokenBucket(global_requests_per_minute)
+        self.global_tokens = TokenBucket(global_tokens_per_minute)
+        self.stats = RateLimitStats()
+        self._org_buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._concurrency: Dict[str, AdaptiveConcurrency] = {}
+
+    def _buckets(
+        self, organization_id: Optional[str]
+    ) -> Tuple[TokenBucket, TokenBucket]:
+        if organization_id is None:
+            # Calls without an organization only count against the global quota
+            return self.global_requests, self.global_tokens
+        buckets = self._org_buckets.get(organization_id)
+        if buckets is None:
+            if len(self._org_buckets) >= MAX_ORG_BUCKETS:
+                # A full bucket is the same as a new one
+                for org, (requests, tokens) in list(self._org_buckets.items()):
+                    if requests.full and tokens.full:
+                        del self._org_buckets[org]
+            buckets = (
+                TokenBucket(self.org_requests_per_minute),
+                TokenBucket(self.org_tokens_per_minute),
+            )
+            self._org_buckets[organization_id] = buckets
+        return buckets
+
+    def concurrency(self, provider: str) -> AdaptiveConcurrency:
+        """The adaptive concurrency limit of one provider."""
+        if provider not in self._concurrency:
+            self._concurrency[provider] = AdaptiveConcurrency()
+        return self._concurrency[provider]
+
+    def _reject(self, retry_after: float, reason: str) -> RateLimitExceeded:
+        self.stats.rejected += 1
+        retry_after = math.ceil(min(retry_after, 3600.0))
+        return RateLimitExceeded(
+            f"Rate limit exceeded ({reason}); retry in {retry_after}s", retry_after
+        )
+
+    async def _admit(
+        self, organization_id: Optional[str], tokens: int
+    ) -> List[Tuple[TokenBucket, float]]:
+        """Reserve the call's cost and wait for the buckets to cover it."""
+        org_requests, org_tokens = self._buckets(organization_id)
+        costs = [(self.global_requests, 1.0), (self.global_tokens, float(tokens))]
+        if org_requests is not self.global_requests:
+            costs += [(org_requests, 1.0), (org_tokens, float(tokens))]
+        delays = [bucket.delay(amount) for bucket, amount in costs]
+        delay = max(delays)
+        if delay > self.max_wait:
+            blocked = costs[delays.index(delay)][0]
+            scope = (
+                "organization" if blocked in (org_requests, org_tokens) else "global"
+            )
+            unit = (
+                "requests"
+                if blocked in (org_requests, self.global_requests)
+                else "tokens"
+            )
+            raise self._reject(delay, f"{scope} {unit} per minute")
+        for bucket, amount in costs:
+            bucket.take(amount)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._refund(costs)
+                raise
+        return costs
+
+    @staticmethod
+    def _refund(costs: List[Tuple[TokenBucket, float]]) -> None:
+        for bucket, amount in costs:
+            bucket.give(amount)
+
+    async def stream(
+        self,
+        provider: str,
+        organization_id: Optional[str],
+        request: CompletionRequest,
+        start: StreamFactory,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """
+        Stream ``start(request)`` once the call has been admitted.
+
+        Args:
+            provider: Provider name, selecting the concurrency limit
+            organization_id: Organization charged for the call, if any
+            request: The completion request
+            start: Opens the provider stream
+
+        Yields:
+            The provider's events
+
+        Raises:
+            RateLimitExceeded: If admission would take longer than ``max_wait``
+        """
+        started = time.monotonic()
+        tokens = estimate_request_tokens(request)
+        costs = await self._admit(organization_id, tokens)
+        limit = self.concurrency(provider)
+        remaining = self.max_wait - (time.monotonic() - started)
+        try:
+            acquired = await limit.acquire(remaining)
+        except BaseException:
+            self._refund(costs)
+            raise
+        if not acquired:
+            self._refund(costs)
+            raise self._reject(self.max_wait, f"{provider} concurrency")
+        called = time.monotonic()
+        self.stats.admitted += 1
+        if called - started > 0.001:
+            self.stats.delayed += 1
+
+        latency: Optional[float] = None
+        overloaded = False
+        events = start(request)
+        try:
+            async for event in events:
+                if latency is None:
+                    latency = time.monotonic() - called
+                if event.done:
+                    # Settle the estimate against what the call really used
+                    used = event.usage.input_tokens + event.usage.output_tokens
+                    self._settle(organization_id, tokens, used)
+                yield event
+        except ProviderRateLimitError:
+            overloaded = True
+            self.stats.provider_rate_limited += 1
+            raise
+        finally:
+            await events.aclose()
+            if limit.release(latency, overloaded):
+                self.stats.latency_spikes += 1
+
+    def _settle(
+        self, organization_id: Optional[str], estimated: int, used: int
+    ) -> None:
+        if used <= 0:
+            return
+        buckets = [self.global_tokens]
+        if organization_id is not None:
+            buckets.append(self._buckets(organization_id)[1])
+        for bucket in buckets:
+            if used > estimated:
+                bucket.take(used - estimated)
+            else:
+                bucket.give(estimated - used)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters, bucket levels and concurrency limits."""
+        return {
+            **self.stats.to_dict(),
+            "global_requests_available": round(self.global_requests.tokens, 1),
+            "global_tokens_available": round(self.global_tokens.tokens),
+            "organizations": len(self._org_buckets),
+            "concurrency": {
+                name: limit.stats() for name, limit in self._concurrency.items()
+            },
+        }
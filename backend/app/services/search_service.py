@@ -0,0 +1,144 @@
+"""
+Full-text search over ProseMirror documents.
+
+Text is extracted from each document's ProseMirror tree when it is
+written and stored as a weighted ``tsvector`` (title weighted above body)
+on the document row, backed by a GIN index. Every create, update and
+delete therefore keeps the index current for just that document.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import ColumnElement, Text, cast, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.document import Document
+
+# ProseMirror node types whose text should not run into the next block
+_INLINE_BREAKS = {"hard_break", "hardBreak"}
+
+
+def extract_text(content: Dict[str, Any]) -> str:
+    """
+    Extract plain text from a ProseMirror document.
+
+    Block nodes are separated by newlines; text beyond
+    ``SEARCH_MAX_TEXT_CHARS`` is dropped.
+    """
+    parts: List[str] = []
+    size = 0
+    stack = [content]
+    while stack and size < settings.SEARCH_MAX_TEXT_CHARS:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        text = node.get("text")
+        if isinstance(text, str):
+            parts.append(text)
+            size += len(text)
+        elif node.get("type") in _INLINE_BREAKS:
+            parts.append(" ")
+        children = node.get("content")
+        if isinstance(children, list):
+            if node.get("type") not in ("text", None) and parts:
+                parts.append("\n")
+            stack.extend(reversed(children))
+    return "".join(parts)[: settings.SEARCH_MAX_TEXT_CHARS]
+
+
+def _language() -> ColumnElement:
+    return literal_column(f"'{settings.SEARCH_LANGUAGE}'::regconfig")
+
+
+def _title_vector(title: str) -> ColumnElement:
+    return func.setweight(
+        func.to_tsvector(_language(), cast(title, Text)), literal_column("'A'")
+    )
+
+
+def search_vector(title: str, content: Dict[str, Any]) -> ColumnElement:
+    """SQL expression computing a document's weighted search vector."""
+    body_vector = func.setweight(
+        func.to_tsvector(_language(), cast(extract_text(content), Text)),
+        literal_column("'B'"),
+    )
+    return _title_vector(title).op("||")(body_vector)
+
+
+def shared_search_vector(title: str, source_id: str) -> ColumnElement:
+    """
+    Search vector for a document sharing ``source_id``'s body.
+
+    Reuses the source's body lexemes in SQL instead of re-extracting text.
+    """
+    source_body = (
+        select(func.ts_filter(Document.search_vector, literal_column("'{b}'")))
+        .where(Document.id == source_id)
+        .scalar_subquery()
+    )
+    return _title_vector(title).op("||")(source_body)
+
+
+class SearchService:
+    """Ranked full-text search over documents."""
+
+    async def search(
+        self,
+        db: AsyncSession,
+        query: str,
+        organization_id: str,
+        project_id: Optional[str] = None,
+        type: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Search documents in an organization.
+
+        Args:
+            db: Database session
+            query: Web-search style query ("quoted phrases", -exclusions, or)
+            organization_id: Organization to search in
+            project_id: Optional project filter
+            type: Optional document type filter
+            limit: Page size
+            offset: Number of results to skip
+
+        Returns:
+            Tuple of ranked result dicts and whether more results exist
+        """
+        ts_query = func.websearch_to_tsquery(_language(), cast(query, Text))
+        rank = func.ts_rank_cd(Document.search_vector, ts_query).label("rank")
+
+        statement = select(
+            Document.id,
+            Document.organization_id,
+            Document.project_id,
+            Document.title,
+            Document.type,
+            Document.version,
+            Document.updated_at,
+            rank,
+        ).where(
+            Document.organization_id == organization_id,
+            Document.search_vector.op("@@")(ts_query),
+        )
+        if project_id is not None:
+            statement = statement.where(Document.project_id == project_id)
+        if type is not None:
+            statement = statement.where(Document.type == type)
+        statement = (
+            statement.order_by(rank.desc(), Document.id).offset(offset).limit(limit + 1)
+        )
+
+        rows = (await db.execute(statement)).all()
+        results = [
+            {**row._mapping, "updated_at": row.updated_at.isoformat()}
+            for row in rows[:limit]
+        ]
+        return results, len(rows) > limit
+
+
+# Global search service instance
+search_service = SearchService()
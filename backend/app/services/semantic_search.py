@@ -0,0 +1,241 @@
+"""
+Semantic (embedding) search over documents.
+
+Each worker keeps one ``IVFIndex`` per organization in memory. Indexes are
+built lazily on first query and then kept current incrementally: every
+query first picks up documents updated since the last sync, and hits
+whose document no longer exists are dropped. Index training runs in a
+background thread, never in the request that triggered it; until it
+finishes, queries use the previous centroids (or exhaustive search). Embeddings are cached per
+content hash, in process and in the ``document_embeddings`` table, so
+unchanged bodies (including duplicates and template instances) are
+embedded only once.
+"""
+
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.document import ContentBlob, Document
+from app.models.embedding import DocumentEmbedding
+from app.services.embeddings import Embedder, get_embedder
+from app.services.search_service import extract_text
+from app.services.vector_index import IVFIndex
+
+# Re-scan this far back on each sync to catch transactions that committed late
+SYNC_OVERLAP = timedelta(seconds=30)
+# Maximum number of hashes per IN (...) query
+BATCH_SIZE = 500
+
+
+class _OrganizationIndex:
+    """Vector index for one organization plus its sync state."""
+
+    def __init__(self, index: IVFIndex):
+        self.index = index
+        self.content_hashes: Dict[str, str] = {}  # document id -> indexed hash
+        self.synced_at: Optional[datetime] = None
+        self.lock = asyncio.Lock()
+
+
+class SemanticSearchService:
+    """Embeds documents and serves nearest-neighbour queries per organization."""
+
+    def __init__(self, cache_size: int = 10_000):
+        self._embedder: Optional[Embedder] = None
+        self._indexes: Dict[str, _OrganizationIndex] = {}
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_size = cache_size
+        self._training: Set[asyncio.Task] = set()
+
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            self._embedder = get_embedder()
+        return self._embedder
+
+    async def search(
+        self,
+        db: AsyncSession,
+        organization_id: str,
+        query: str,
+        limit: int = 10,
+        project_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the documents most similar in meaning to ``query``.
+
+        Returns:
+            List of document metadata dicts with a ``score`` (cosine
+            similarity), best first
+        """
+        org_index = await self._sync(db, organization_id)
+        query_vector = (await asyncio.to_thread(self.embedder.embed, [query]))[0]
+        # Over-fetch so filtering out other projects still fills the page
+        hits = org_index.index.search(query_vector, limit * 4 if project_id else limit)
+        if not hits:
+            return []
+
+        rows = (
+            await db.execute(
+                select(
+                    Document.id,
+                    Document.project_id,
+                    Document.title,
+                    Document.type,
+                    Document.version,
+                    Document.updated_at,
+                ).where(Document.id.in_([document_id for document_id, _ in hits]))
+            )
+        ).all()
+        found = {row.id: row for row in rows}
+
+        results = []
+        for document_id, score in hits:
+            row = found.get(document_id)
+            if row is None:
+                # Deleted by another worker since we indexed it
+                self._remove(org_index, document_id)
+                continue
+            if project_id is not None and row.project_id != project_id:
+                continue
+            results.append(
+                {
+                    **row._mapping,
+                    "updated_at": row.updated_at.isoformat(),
+                    "score": score,
+                }
+            )
+        return results[:limit]
+
+    def forget(self, organization_id: str, document_id: str) -> None:
+        """Drop a deleted document from this worker's index."""
+        org_index = self._indexes.get(organization_id)
+        if org_index is not None:
+            self._remove(org_index, document_id)
+
+    def _remove(self, org_index: _OrganizationIndex, document_id: str) -> None:
+        org_index.index.remove(document_id)
+        org_index.content_hashes.pop(document_id, None)
+
+    async def _sync(self, db: AsyncSession, organization_id: str) -> _OrganizationIndex:
+        """Index documents created or changed since the last sync."""
+        org_index = self._indexes.get(organization_id)
+        if org_index is None:
+            org_index = _OrganizationIndex(
+                IVFIndex(self.embedder.dim, nprobe=settings.VECTOR_INDEX_NPROBE)
+            )
+            self._indexes[organization_id] = org_index
+
+        async with org_index.lock:
+            synced_at = await db.scalar(select(func.now()))
+            query = select(Document.id, Document.content_hash).where(
+                Document.organization_id == organization_id
+            )
+            if org_index.synced_at is not None:
+                query = query.where(
+                    Document.updated_at > org_index.synced_at - SYNC_OVERLAP
+                )
+
+            changed = [
+                (row.id, row.content_hash)
+                for row in (await db.execute(query)).all()
+                if org_index.content_hashes.get(row.id) != row.content_hash
+            ]
+            if changed:
+                vectors = await self._embeddings(db, {h for _, h in changed})
+                changed = [item for item in changed if item[1] in vectors]
+                if changed:
+                    org_index.index.add_many(
+                        [document_id for document_id, _ in changed],
+                        np.stack([vectors[digest] for _, digest in changed]),
+                    )
+                    for document_id, digest in changed:
+                        org_index.content_hashes[document_id] = digest
+            org_index.synced_at = synced_at
+
+        fit = org_index.index.start_training()
+        if fit is not None:
+            task = asyncio.create_task(self._train(org_index.index, fit))
+            self._training.add(task)
+            task.add_done_callback(self._training.discard)
+        return org_index
+
+    async def _train(
+        self, index: IVFIndex, fit: Callable[[], Tuple[np.ndarray, np.ndarray]]
+    ) -> None:
+        """Fit an index's centroids in a thread and install them."""
+        result = None
+        try:
+            result = await asyncio.to_thread(fit)
+        finally:
+            index.finish_training(result)
+
+    async def _embeddings(
+        self, db: AsyncSession, digests: set
+    ) -> Dict[str, np.ndarray]:
+        """Embeddings for content hashes: memory, then database, then compute."""
+        vectors: Dict[str, np.ndarray] = {}
+        for digest in digests:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                vectors[digest] = self._cache[digest]
+
+        model = self.embedder.name
+        missing = [d for d in digests if d not in vectors]
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[start : start + BATCH_SIZE]
+            rows = await db.execute(
+                select(DocumentEmbedding.content_hash, DocumentEmbedding.vector).where(
+                    DocumentEmbedding.model == model,
+                    DocumentEmbedding.content_hash.in_(batch),
+                )
+            )
+            for digest, vector in rows:
+                vectors[digest] = np.frombuffer(vector, dtype=np.float32)
+
+        missing = [d for d in missing if d not in vectors]
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[start : start + BATCH_SIZE]
+            rows = (
+                await db.execute(
+                    select(ContentBlob.hash, ContentBlob.content).where(
+                        ContentBlob.hash.in_(batch)
+                    )
+                )
+            ).all()
+            if not rows:
+                continue
+            texts = [extract_text(content) for _, content in rows]
+            embedded = await asyncio.to_thread(self.embedder.embed, texts)
+            await db.execute(
+                insert(DocumentEmbedding)
+                .values(
+                    [
+                        {"content_hash": digest, "model": model, "vector": v.tobytes()}
+                        for (digest, _), v in zip(rows, embedded)
+                    ]
+                )
+                .on_conflict_do_nothing()
+            )
+            await db.commit()
+            for (digest, _), vector in zip(rows, embedded):
+                vectors[digest] = vector
+
+        for digest, vector in vectors.items():
+            self._cache[digest] = vector
+            self._cache.move_to_end(digest)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return vectors
+
+
+# Global semantic search service instance
+semantic_search_service = SemanticSearchService()
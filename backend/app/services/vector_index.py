@@ -0,0 +1,189 @@
+"""
+In-memory IVF (inverted file) approximate nearest-neighbour index.
+
+Vectors are L2-normalized, so inner product equals cosine similarity.
+Below ``min_train_size`` vectors the index searches exhaustively. Above
+it, k-means centroids partition the vectors into lists and a query only
+scores the vectors in the ``nprobe`` lists nearest to it. Centroids are
+retrained whenever the index has doubled since the last training.
+
+Training is k-means over up to ``64 * sqrt(n)`` vectors, which takes
+seconds on large indexes, so it is split in three steps:
+``start_training`` snapshots the vectors, the returned function fits
+centroids to the snapshot and may run in another thread, and
+``finish_training`` installs the result. The index stays usable meanwhile;
+vectors added or moved during training are reassigned when it finishes.
+``train`` does all three in place.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+class IVFIndex:
+    """Approximate nearest-neighbour index with incremental upserts and deletes."""
+
+    def __init__(
+        self,
+        dim: int,
+        nprobe: int = 8,
+        min_train_size: int = 1024,
+        kmeans_iterations: int = 10,
+        seed: int = 0,
+    ):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.kmeans_iterations = kmeans_iterations
+        self._rng = np.random.default_rng(seed)
+
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        self._lists = np.zeros(64, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        # Positions written since start_training; None when not training
+        self._touched: Optional[Set[int]] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._positions
+
+    @property
+    def needs_training(self) -> bool:
+        """Whether the index has grown enough to (re)train and is not training."""
+        return self._touched is None and len(self._ids) >= max(
+            self.min_train_size, 2 * self._trained_size
+        )
+
+    def add(self, item_id: str, vector: np.ndarray) -> None:
+        """Insert or replace the vector stored for ``item_id``."""
+        self.add_many([item_id], vector[np.newaxis])
+
+    def add_many(self, item_ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Insert or replace the vectors stored for several items at once."""
+        positions = np.empty(len(item_ids), dtype=np.int64)
+        for i, item_id in enumerate(item_ids):
+            position = self._positions.get(item_id)
+            if position is None:
+                position = len(self._ids)
+                if position == len(self._vectors):
+                    self._grow()
+                self._ids.append(item_id)
+                self._positions[item_id] = position
+            positions[i] = position
+
+        self._vectors[positions] = vectors
+        if self._centroids is not None:
+            self._lists[positions] = self._assign(vectors)
+        if self._touched is not None:
+            self._touched.update(positions.tolist())
+
+    def remove(self, item_id: str) -> None:
+        """Remove ``item_id`` if present (swap-with-last, O(1))."""
+        position = self._positions.pop(item_id, None)
+        if position is None:
+            return
+        last = len(self._ids) - 1
+        if position != last:
+            moved = self._ids[last]
+            self._ids[position] = moved
+            self._positions[moved] = position
+            self._vectors[position] = self._vectors[last]
+            self._lists[position] = self._lists[last]
+            if self._touched is not None:
+                self._touched.add(position)
+        self._ids.pop()
+
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """Return up to ``k`` ``(item_id, similarity)`` pairs, best first."""
+        count = len(self._ids)
+        if count == 0 or k <= 0:
+            return []
+
+        vectors = self._vectors[:count]
+        if self._centroids is None:
+            candidates = np.arange(count)
+        else:
+            probe = np.argsort(self._centroids @ query)[-self.nprobe :]
+            candidates = np.flatnonzero(np.isin(self._lists[:count], probe))
+
+        scores = vectors[candidates] @ query
+        if len(candidates) > k:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(self._ids[candidates[i]], float(scores[i])) for i in top]
+
+    def train(self) -> None:
+        """Retrain now if ``needs_training``, blocking until done."""
+        fit = self.start_training()
+        if fit is not None:
+            self.finish_training(fit())
+
+    def start_training(
+        self,
+    ) -> Optional[Callable[[], Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Snapshot the vectors for retraining.
+
+        Returns:
+            None if not ``needs_training``; otherwise a function computing
+            centroids and assignments for the snapshot, which is safe to
+            run in another thread. Pass its result (or None, if it failed)
+            to ``finish_training``.
+        """
+        if not self.needs_training:
+            return None
+        vectors = self._vectors[: len(self._ids)].copy()
+        self._touched = set()
+        return lambda: self._fit(vectors)
+
+    def finish_training(self, result: Optional[Tuple[np.ndarray, np.ndarray]]) -> None:
+        """Install centroids from ``start_training``'s function (None aborts)."""
+        touched, self._touched = self._touched, None
+        if result is None or touched is None:
+            return
+        centroids, assignments = result
+        count = len(self._ids)
+        kept = min(count, len(assignments))
+        self._centroids = centroids
+        self._lists[:kept] = assignments[:kept]
+        # Vectors written since the snapshot, and those added beyond it
+        stale = sorted(p for p in touched if p < kept) + list(range(kept, count))
+        if stale:
+            self._lists[stale] = self._assign(self._vectors[stale])
+        self._trained_size = len(assignments)
+
+    def _fit(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """k-means centroids for ``vectors`` and each vector's list."""
+        count = len(vectors)
+        nlist = max(1, int(np.sqrt(count)))
+
+        sample_size = min(count, 64 * nlist)
+        sample = vectors[self._rng.choice(count, sample_size, replace=False)]
+        centroids = sample[self._rng.choice(sample_size, nlist, replace=False)]
+        for _ in range(self.kmeans_iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignments == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+        return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1)
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._vectors)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[: len(self._vectors)] = self._vectors
+        lists = np.zeros(capacity, dtype=np.int32)
+        lists[: len(self._lists)] = self._lists
+        self._vectors, self._lists = vectors, lists
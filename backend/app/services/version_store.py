@@ -0,0 +1,294 @@
+"""
+Delta-compressed document version store.
+
+Versions are grouped into chains: each chain starts with a full snapshot
+and continues with JSON Patch deltas against the previous version. A new
+snapshot starts whenever the chain reaches ``VERSION_SNAPSHOT_INTERVAL``
+entries or a delta would be large relative to the content, so
+reconstructing any version replays at most ``VERSION_SNAPSHOT_INTERVAL - 1``
+patches. Snapshot bodies live in the content store, so a snapshot of
+content that is already stored costs only a reference.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.document import DocumentVersion
+from app.services.content_hash import canonical_json, hash_bytes
+from app.services.content_store import content_store
+from app.services.json_patch import JsonPatch, apply_patch, make_diff
+
+# History listing columns (never includes the payload)
+METADATA_COLUMNS = (
+    DocumentVersion.version,
+    DocumentVersion.is_snapshot,
+    DocumentVersion.title,
+    DocumentVersion.content_hash,
+    DocumentVersion.content_size,
+    DocumentVersion.created_by,
+    DocumentVersion.created_at,
+)
+
+
+class VersionNotFoundError(LookupError):
+    """Raised when a requested document version does not exist."""
+
+
+class VersionStore:
+    """Stores and reconstructs document versions."""
+
+    def __init__(
+        self,
+        snapshot_interval: int = settings.VERSION_SNAPSHOT_INTERVAL,
+        max_delta_ratio: float = settings.VERSION_MAX_DELTA_RATIO,
+    ):
+        self.snapshot_interval = snapshot_interval
+        self.max_delta_ratio = max_delta_ratio
+
+    async def record(
+        self,
+        db: AsyncSession,
+        document_id: str,
+        version: int,
+        title: str,
+        content: Dict[str, Any],
+        previous_content: Optional[Dict[str, Any]] = None,
+        created_by: Optional[str] = None,
+        delta: Optional[JsonPatch] = None,
+        encoded: Optional[bytes] = None,
+    ) -> DocumentVersion:
+        """
+        Record ``content`` as ``version`` of a document.
+
+        Args:
+            db: Database session (the caller commits)
+            document_id: Document ID
+            version: New version number
+            title: Document title at this version
+            content: Full content at this version
+            previous_content: Content at ``version - 1`` (None for the first)
+            created_by: Author of this version
+            delta: Known patch from ``previous_content`` to ``content``;
+                skips recomputing the diff
+            encoded: ``canonical_json(content)`` if the caller already has it
+
+        Returns:
+            DocumentVersion: The stored entry
+        """
+        if encoded is None:
+            encoded = canonical_json(content)
+        base_version = None
+        if previous_content is not None:
+            base_version = await db.scalar(
+                select(DocumentVersion.base_version).where(
+                    DocumentVersion.document_id == document_id,
+                    DocumentVersion.version == version - 1,
+                )
+            )
+
+        in_chain = base_version is not None and (
+            version - base_version < self.snapshot_interval
+        )
+        if in_chain:
+            if delta is None:
+                delta = make_diff(previous_content, content)
+            if len(canonical_json(delta)) <= self.max_delta_ratio * len(encoded):
+                entry = DocumentVersion(
+                    document_id=document_id,
+                    version=version,
+                    base_version=base_version,
+                    is_snapshot=False,
+                    payload=delta,
+                    title=title,
+                    content_hash=hash_bytes(encoded),
+                    content_size=len(encoded),
+                    created_by=created_by,
+                )
+                db.add(entry)
+                return entry
+
+        digest = await content_store.put(db, content, encoded=encoded)
+        return self._add_snapshot(
+            db, document_id, version, title, digest, len(encoded), created_by
+        )
+
+    async def record_shared(
+        self,
+        db: AsyncSession,
+        document_id: str,
+        version: int,
+        title: str,
+        digest: str,
+        size: int,
+        created_by: Optional[str] = None,
+    ) -> DocumentVersion:
+        """
+        Record a snapshot version whose content is already in the content store.
+
+        Used for duplicates and template instances: only a reference is added,
+        the body is never loaded or copied.
+        """
+        await content_store.add_ref(db, digest)
+        return self._add_snapshot(
+            db, document_id, version, title, digest, size, created_by
+        )
+
+    async def record_initial_many(
+        self, db: AsyncSession, entries: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Record version 1 of many new documents whose bodies are already stored.
+
+        Args:
+            db: Database session (the caller commits)
+            entries: Dicts with ``document_id``, ``title``, ``content_hash``,
+                ``content_size`` and ``created_by``
+        """
+        if not entries:
+            return
+        counts: Dict[str, int] = {}
+        for entry in entries:
+            counts[entry["content_hash"]] = counts.get(entry["content_hash"], 0) + 1
+        await content_store.add_refs(db, counts)
+        await db.execute(
+            insert(DocumentVersion),
+            [
+                {
+                    **entry,
+                    "version": 1,
+                    "base_version": 1,
+                    "is_snapshot": True,
+                }
+                for entry in entries
+            ],
+        )
+
+    def _add_snapshot(
+        self,
+        db: AsyncSession,
+        document_id: str,
+        version: int,
+        title: str,
+        digest: str,
+        size: int,
+        created_by: Optional[str],
+    ) -> DocumentVersion:
+        entry = DocumentVersion(
+            document_id=document_id,
+            version=version,
+            base_version=version,
+            is_snapshot=True,
+            payload=None,
+            title=title,
+            content_hash=digest,
+            content_size=size,
+            created_by=created_by,
+        )
+        db.add(entry)
+        return entry
+
+    async def release_document(self, db: AsyncSession, document_id: str) -> None:
+        """Delete a document's history and release its snapshot references."""
+        digests = (
+            await db.scalars(
+                select(DocumentVersion.content_hash).where(
+                    DocumentVersion.document_id == document_id,
+                    DocumentVersion.is_snapshot.is_(True),
+                )
+            )
+        ).all()
+        await db.execute(
+            delete(DocumentVersion).where(DocumentVersion.document_id == document_id)
+        )
+        for digest in digests:
+            await content_store.release(db, digest)
+
+    async def delete_histories(
+        self, db: AsyncSession, document_ids: Select
+    ) -> Dict[str, int]:
+        """
+        Delete the history of several documents in one go.
+
+        Args:
+            db: Database session
+            document_ids: Query selecting the documents' IDs
+
+        Returns:
+            Content references held by the deleted snapshots, by hash, for
+            the caller to release with ``content_store.release_many``
+        """
+        rows = await db.execute(
+            select(DocumentVersion.content_hash, func.count())
+            .where(
+                DocumentVersion.document_id.in_(document_ids),
+                DocumentVersion.is_snapshot.is_(True),
+            )
+            .group_by(DocumentVersion.content_hash)
+        )
+        references = {digest: count for digest, count in rows}
+        await db.execute(
+            delete(DocumentVersion).where(DocumentVersion.document_id.in_(document_ids))
+        )
+        return references
+
+    async def list_versions(
+        self,
+        db: AsyncSession,
+        document_id: str,
+        before_version: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """List version metadata, newest first, without materializing bodies."""
+        query = select(*METADATA_COLUMNS).where(
+            DocumentVersion.document_id == document_id
+        )
+        if before_version is not None:
+            query = query.where(DocumentVersion.version < before_version)
+        query = query.order_by(DocumentVersion.version.desc()).limit(limit)
+
+        rows = (await db.execute(query)).all()
+        return [
+            {**row._mapping, "created_at": row.created_at.isoformat()} for row in rows
+        ]
+
+    async def get_content(
+        self, db: AsyncSession, document_id: str, version: int
+    ) -> Dict[str, Any]:
+        """
+        Reconstruct the content of a document at ``version``.
+
+        Raises:
+            VersionNotFoundError: If the version does not exist
+        """
+        base_version = await db.scalar(
+            select(DocumentVersion.base_version).where(
+                DocumentVersion.document_id == document_id,
+                DocumentVersion.version == version,
+            )
+        )
+        if base_version is None:
+            raise VersionNotFoundError(f"Version {version} not found")
+
+        rows = (
+            await db.execute(
+                select(DocumentVersion.content_hash, DocumentVersion.payload)
+                .where(
+                    DocumentVersion.document_id == document_id,
+                    DocumentVersion.version >= base_version,
+                    DocumentVersion.version <= version,
+                )
+                .order_by(DocumentVersion.version)
+            )
+        ).all()
+
+        content = await content_store.get(db, rows[0].content_hash)
+        for _, delta in rows[1:]:
+            content = apply_patch(content, delta, in_place=True)
+        return content
+
+
+# Global version store instance
+version_store = VersionStore()
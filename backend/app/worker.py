@@ -0,0 +1,54 @@
+"""
+Standalone agent execution worker.
+
+Run one or more of these next to the API (with
+``EXECUTION_WORKER_IN_PROCESS=false`` on the API) so long agent runs do not
+compete with request handling::
+
+    python -m app.worker
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import close_db
+from app.services.ai_service import ai_service
+from app.services.execution_queue import execution_worker
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    """Run the worker until SIGINT or SIGTERM, then drain and shut down."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await cache.start()
+    await ai_service.start()
+    await execution_worker.start()
+    logger.info(
+        "Execution worker %s started (concurrency %d)",
+        execution_worker.worker_id,
+        execution_worker.concurrency,
+    )
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Execution worker %s stopping", execution_worker.worker_id)
+        await execution_worker.stop()
+        await ai_service.aclose()
+        await cache.close()
+        await close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=settings.LOG_LEVEL,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Benchmark concurrent query throughput: sync session vs async session.
+
+Simulates N concurrent request handlers, each running one query that takes
+``--query-ms`` on the server (``pg_sleep``). The sync variant calls the
+blocking ``Session`` from coroutines, the way an ``async def`` handler using
+the old ``get_db`` would, so it serializes on the event loop. The async
+variant uses ``AsyncSessionLocal``.
+
+Requires a running local PostgreSQL reachable via ``DATABASE_URL``.
+
+Usage:
+    python -m benchmarks.db_concurrency --requests 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal, SessionLocal, close_db
+
+
+async def _sync_handler(query: str) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(text(query))
+    finally:
+        db.close()
+
+
+async def _async_handler(query: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text(query))
+
+
+async def _run(handler, requests: int, concurrency: int, query: str) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await handler(query)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+async def main(requests: int, concurrency: int, query_ms: int) -> None:
+    query = f"SELECT pg_sleep({query_ms / 1000})"
+
+    # Warm both pools so connection setup is not measured
+    await _run(_sync_handler, concurrency, concurrency, "SELECT 1")
+    await _run(_async_handler, concurrency, concurrency, "SELECT 1")
+
+    for name, handler in (("sync", _sync_handler), ("async", _async_handler)):
+        elapsed = await _run(handler, requests, concurrency, query)
+        print(
+            f"{name:>5}: {requests} requests in {elapsed:.2f}s "
+            f"-> {requests / elapsed:.1f} req/s"
+        )
+
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--query-ms", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests, args.concurrency, args.query_ms))
@@ -0,0 +1,521 @@
+"""
+Benchmark every API router over HTTP and compare against a baseline.
+
+Drives the app through its ASGI interface in-process (the default), or a
+running server with ``--url``. Setup creates a throwaway organization and
+project and bulk-imports ``--seed-documents`` documents of about
+``--document-kb`` KB of ProseMirror content each; the organization (and by
+cascade everything in it) is deleted at the end.
+
+Each scenario sends ``--requests`` requests, ``--concurrency`` at a time,
+after a short warm-up, and reports requests per second and p50/p95/p99
+latency. Responses with an unexpected status count as errors.
+
+In-process runs use the fake LLM provider with rate limiting off (both can
+be overridden through the usual environment variables), so the AI
+scenarios measure the service rather than a provider. Against a live
+server, the server's own provider settings apply.
+
+``--save-baseline`` stores the results; ``--baseline`` compares against
+stored results and exits with status 1 if any scenario's p95 grew, or its
+throughput fell, by more than ``--tolerance``. Baselines are machine
+specific: record them on the machine that runs the comparison.
+
+Requires a running local PostgreSQL reachable via ``DATABASE_URL``.
+
+Usage:
+    python -m benchmarks.http_suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.http_suite --baseline benchmarks/baseline.json
+    python -m benchmarks.http_suite --url http://localhost:8000 --only documents
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from contextlib import AsyncExitStack
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+API = "/api/v1"
+WORDS = (
+    "the project plan covers scope milestones risks owners dependencies and "
+    "open questions for the next release including migration steps rollout "
+    "monitoring documentation and support handover"
+).split()
+
+
+@dataclass
+class Scenario:
+    """One kind of request; ``build`` returns ``httpx`` request arguments."""
+
+    name: str
+    router: str
+    build: Callable[[int], Dict[str, Any]]
+    expect: Tuple[int, ...] = (200,)
+    requests: Optional[int] = None  # overrides --requests for heavy scenarios
+    on_response: Optional[Callable[[httpx.Response], None]] = None
+
+
+@dataclass
+class Result:
+    """Throughput and latency of one scenario."""
+
+    requests: int
+    errors: int
+    rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+@dataclass
+class Fixtures:
+    """Data created during setup and shared by the scenarios."""
+
+    organization_id: str = ""
+    project_id: str = ""
+    document_ids: List[str] = field(default_factory=list)
+    organization_etag: str = ""
+    created_organizations: List[str] = field(default_factory=list)
+
+
+def _text(i: int, words: int) -> str:
+    return " ".join(WORDS[(i + n) % len(WORDS)] for n in range(words))
+
+
+def prosemirror_document(kilobytes: float, seed: int = 0) -> Dict[str, Any]:
+    """A ProseMirror document of headings and paragraphs of about ``kilobytes``."""
+    content = []
+    size = 0
+    section = 0
+    while size < kilobytes * 1024:
+        section += 1
+        heading = {
+            "type": "heading",
+            "attrs": {"level": 2},
+            "content": [{"type": "text", "text": f"Section {section}"}],
+        }
+        paragraphs = [
+            {
+                "type": "paragraph",
+                "content": [{"type": "text", "text": _text(seed + section + n, 60)}],
+            }
+            for n in range(4)
+        ]
+        content.append(heading)
+        content.extend(paragraphs)
+        size += len(json.dumps(heading)) + sum(len(json.dumps(p)) for p in paragraphs)
+    return {"type": "doc", "content": content}
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def _document(fixtures: Fixtures, kilobytes: float, i: int) -> Dict[str, Any]:
+    return {
+        "title": f"Benchmark document {i}",
+        "content": prosemirror_document(kilobytes, i),
+        "organization_id": fixtures.organization_id,
+        "project_id": fixtures.project_id,
+    }
+
+
+async def setup(
+    client: httpx.AsyncClient, documents: int, kilobytes: float
+) -> Fixtures:
+    fixtures = Fixtures()
+    suffix = uuid.uuid4().hex[:8]
+    response = await client.post(
+        f"{API}/organizations/",
+        json={"name": "Benchmark", "slug": f"bench-{suffix}"},
+    )
+    response.raise_for_status()
+    fixtures.organization_id = response.json()["id"]
+    fixtures.created_organizations.append(fixtures.organization_id)
+
+    response = await client.post(
+        f"{API}/projects/",
+        json={"name": "Benchmark", "organization_id": fixtures.organization_id},
+    )
+    response.raise_for_status()
+    fixtures.project_id = response.json()["id"]
+
+    lines = "\n".join(
+        json.dumps(_document(fixtures, kilobytes, i)) for i in range(documents)
+    )
+    response = await client.post(
+        f"{API}/documents/bulk", content=lines.encode(), timeout=300
+    )
+    response.raise_for_status()
+    fixtures.document_ids = [
+        result["id"] for result in response.json()["results"] if result["id"]
+    ]
+
+    response = await client.get(f"{API}/organizations/{fixtures.organization_id}")
+    fixtures.organization_etag = response.headers.get("etag", "")
+    return fixtures
+
+
+def scenarios(fixtures: Fixtures, kilobytes: float) -> List[Scenario]:
+    org = fixtures.organization_id
+    project = fixtures.project_id
+    docs = fixtures.document_ids
+    content = _text(0, 40 * int(kilobytes))  # plain text of about the same size
+
+    def doc(i: int) -> str:
+        return docs[i % len(docs)]
+
+    def new_organization(i: int) -> Dict[str, Any]:
+        slug = f"bench-{uuid.uuid4().hex[:12]}"
+        return {"json": {"name": f"Benchmark {i}", "slug": slug}}
+
+    return [
+        Scenario(
+            "auth.logout", "auth", lambda i: {"method": "POST", "url": "/auth/logout"}
+        ),
+        Scenario(
+            "auth.login (501)",
+            "auth",
+            lambda i: {
+                "method": "POST",
+                "url": "/auth/login",
+                "json": {"email": "bench@example.com", "password": "x"},
+            },
+            expect=(501,),
+        ),
+        Scenario(
+            "organizations.get",
+            "organizations",
+            lambda i: {"method": "GET", "url": f"/organizations/{org}"},
+        ),
+        Scenario(
+            "organizations.get (304)",
+            "organizations",
+            lambda i: {
+                "method": "GET",
+                "url": f"/organizations/{org}",
+                "headers": {"If-None-Match": fixtures.organization_etag},
+            },
+            expect=(304,),
+        ),
+        Scenario(
+            "organizations.create",
+            "organizations",
+            lambda i: {
+                "method": "POST",
+                "url": "/organizations/",
+                **new_organization(i),
+            },
+            requests=50,
+            # Deleted with the fixtures at the end
+            on_response=lambda response: fixtures.created_organizations.append(
+                response.json()["id"]
+            ),
+        ),
+        Scenario(
+            "projects.list",
+            "projects",
+            lambda i: {
+                "method": "GET",
+                "url": "/projects/",
+                "params": {"organization_id": org},
+            },
+        ),
+        Scenario(
+            "projects.get",
+            "projects",
+            lambda i: {"method": "GET", "url": f"/projects/{project}"},
+        ),
+        Scenario(
+            "projects.create",
+            "projects",
+            lambda i: {
+                "method": "POST",
+                "url": "/projects/",
+                "json": {"name": f"Benchmark {i}", "organization_id": org},
+            },
+            requests=50,
+        ),
+        Scenario(
+            "documents.get",
+            "documents",
+            lambda i: {"method": "GET", "url": f"/documents/{doc(i)}"},
+        ),
+        Scenario(
+            "documents.list (summary)",
+            "documents",
+            lambda i: {
+                "method": "GET",
+                "url": "/documents/",
+                "params": {"project_id": project, "view": "summary", "limit": 50},
+            },
+        ),
+        Scenario(
+            "documents.list (full)",
+            "documents",
+            lambda i: {
+                "method": "GET",
+                "url": "/documents/",
+                "params": {"project_id": project, "limit": 20},
+            },
+        ),
+        Scenario(
+            "documents.search",
+            "documents",
+            lambda i: {
+                "method": "GET",
+                "url": "/documents/search",
+                "params": {"q": WORDS[i % len(WORDS)], "organization_id": org},
+            },
+        ),
+        Scenario(
+            "documents.create",
+            "documents",
+            lambda i: {
+                "method": "POST",
+                "url": "/documents/",
+                "json": _document(fixtures, kilobytes, i),
+            },
+            requests=100,
+        ),
+        Scenario(
+            "documents.update",
+            "documents",
+            lambda i: {
+                "method": "PUT",
+                "url": f"/documents/{doc(i)}",
+                "json": {
+                    "title": f"Benchmark document {i}",
+                    "content": prosemirror_document(kilobytes, i + 1),
+                },
+            },
+            requests=100,
+        ),
+        Scenario(
+            "documents.bulk (100)",
+            "documents",
+            lambda i: {
+                "method": "POST",
+                "url": "/documents/bulk",
+                "content": "\n".join(
+                    json.dumps(_document(fixtures, kilobytes, i * 100 + n))
+                    for n in range(100)
+                ).encode(),
+            },
+            requests=10,
+        ),
+        Scenario(
+            "ai-agents.capabilities",
+            "ai-agents",
+            lambda i: {"method": "GET", "url": "/ai-agents/capabilities/"},
+        ),
+        Scenario(
+            "ai-agents.generate-content",
+            "ai-agents",
+            lambda i: {
+                "method": "POST",
+                "url": "/ai-agents/generate-content",
+                "json": {"prompt": f"Write release notes {i}", "organization_id": org},
+            },
+        ),
+        Scenario(
+            "ai-agents.generate-content/stream",
+            "ai-agents",
+            lambda i: {
+                "method": "POST",
+                "url": "/ai-agents/generate-content/stream",
+                "json": {"prompt": f"Write a summary {i}", "organization_id": org},
+            },
+        ),
+        Scenario(
+            "ai-agents.analyze-document (cached)",
+            "ai-agents",
+            lambda i: {
+                "method": "POST",
+                "url": "/ai-agents/analyze-document",
+                "json": {
+                    "document_id": docs[0],
+                    "title": "Benchmark document",
+                    "content": content,
+                    "organization_id": org,
+                },
+            },
+        ),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> Result:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int, record: bool) -> None:
+        nonlocal errors
+        arguments = scenario.build(i)
+        arguments["url"] = API + arguments["url"]
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(**arguments)
+                await response.aread()
+                ok = response.status_code in scenario.expect
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - start
+        if ok and scenario.on_response is not None:
+            scenario.on_response(response)
+        if record:
+            latencies.append(elapsed)
+            errors += not ok
+
+    await asyncio.gather(*(one(-1 - i, False) for i in range(warmup)))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, True) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return Result(
+        requests=requests,
+        errors=errors,
+        rps=round(requests / elapsed, 1),
+        mean_ms=round(statistics.mean(latencies) * 1000, 2),
+        p50_ms=round(_percentile(latencies, 50) * 1000, 2),
+        p95_ms=round(_percentile(latencies, 95) * 1000, 2),
+        p99_ms=round(_percentile(latencies, 99) * 1000, 2),
+    )
+
+
+def compare(
+    results: Dict[str, Result], baseline: Dict[str, Dict[str, float]], tolerance: float
+) -> List[str]:
+    """Describe every scenario that regressed beyond ``tolerance``."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result.p95_ms > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {result.p95_ms}ms")
+        if result.rps < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {before['rps']} -> {result.rps} req/s")
+    return regressions
+
+
+def _report(
+    results: Dict[str, Result], baseline: Optional[Dict[str, Dict[str, float]]]
+) -> None:
+    print(
+        f"{'scenario':<38} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>6}" + ("  p95 vs baseline" if baseline else "")
+    )
+    for name, r in results.items():
+        line = (
+            f"{name:<38} {r.rps:>8.1f} {r.p50_ms:>8.1f} {r.p95_ms:>8.1f} "
+            f"{r.p99_ms:>8.1f} {r.errors:>6}"
+        )
+        if baseline and name in baseline:
+            change = r.p95_ms / baseline[name]["p95_ms"] - 1
+            line += f"  {change:+.0%}"
+        print(line)
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        else:
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://localhost",
+                timeout=60,
+            )
+        await stack.enter_async_context(client)
+
+        fixtures = await setup(client, args.seed_documents, args.document_kb)
+        try:
+            results: Dict[str, Result] = {}
+            for scenario in scenarios(fixtures, args.document_kb):
+                if args.only and not any(
+                    only == scenario.router or only in scenario.name
+                    for only in args.only
+                ):
+                    continue
+                requests = min(scenario.requests or args.requests, args.requests)
+                results[scenario.name] = await run_scenario(
+                    client,
+                    scenario,
+                    requests,
+                    args.concurrency,
+                    min(args.warmup, requests),
+                )
+        finally:
+            for organization_id in fixtures.created_organizations:
+                await client.delete(f"{API}/organizations/{organization_id}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    _report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({name: asdict(r) for name, r in results.items()}, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    failed = sum(r.errors for r in results.values())
+    if failed:
+        print(f"{failed} requests returned an unexpected status")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            return 1
+    return 1 if failed and args.fail_on_errors else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed-documents", type=int, default=200)
+    parser.add_argument("--document-kb", type=float, default=20.0)
+    parser.add_argument(
+        "--only", action="append", help="router, or part of a scenario name"
+    )
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="write results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--fail-on-errors", action="store_true")
+    args = parser.parse_args()
+
+    if not args.url:
+        # Measure the service, not a provider; explicit settings still win
+        os.environ.setdefault("AI_PROVIDER_OVERRIDE", "fake")
+        os.environ.setdefault("FAKE_LLM_TIME_TO_FIRST_TOKEN_SECONDS", "0.05")
+        os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "0")
+        os.environ.setdefault("AI_RATE_LIMIT_ENABLED", "false")
+        # DEBUG echoes every SQL statement, which would dominate the timings
+        os.environ.setdefault("DEBUG", "false")
+
+    sys.exit(asyncio.run(main(args)))
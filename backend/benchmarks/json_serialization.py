@@ -0,0 +1,145 @@
+"""
+Benchmark serializing large document responses.
+
+Builds documents of each ``--sizes`` KB of ProseMirror content and times
+turning them into a response body, for a single document
+(``DocumentResponse``) and a page of ``--page-size`` documents
+(``DocumentPage``), along four paths:
+
+- ``stdlib``: decode the stored JSON, let FastAPI validate the result
+  against the response model and ``jsonable_encoder`` it, render with the
+  standard library encoder (the previous default)
+- ``orjson``: the same, rendered with ``ORJSONResponse``
+- ``trusted``: decode the stored JSON, then ``trusted_response`` (no
+  validation or ``jsonable_encoder`` pass)
+- ``raw``: ``trusted_response`` with the stored JSON text embedded as is
+
+Everything runs in-process without a database, so the numbers isolate
+serialization. For end-to-end numbers use
+``python -m benchmarks.http_suite --document-kb 500 --only documents``.
+
+Usage:
+    python -m benchmarks.json_serialization --sizes 10 100 1000 --page-size 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.v1.endpoints.documents import (
+    DocumentPage,
+    DocumentResponse,
+    with_raw_content,
+)
+from app.core.responses import trusted_response
+from benchmarks.http_suite import prosemirror_document
+
+
+def _stored_row(kilobytes: float, i: int) -> Dict[str, Any]:
+    """A document dict as loaded with its content still as stored JSON text."""
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": f"00000000-0000-0000-0000-{i:012d}",
+        "organization_id": "00000000-0000-0000-0000-000000000001",
+        "project_id": None,
+        "title": f"Document {i}",
+        "type": "custom",
+        "version": 1,
+        "template_id": None,
+        "created_by": None,
+        "created_at": now,
+        "updated_at": now,
+        "content": json.dumps(prosemirror_document(kilobytes, seed=i)),
+    }
+
+
+def _decoded(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {**row, "content": json.loads(row["content"])}
+
+
+def _paths(model: Any, wrap: Callable[[Any], Any], rows: List[Dict[str, Any]]):
+    """Serialization paths for ``rows`` shaped by ``wrap`` into ``model``."""
+    field = create_response_field(name=f"Response_{model.__name__}", type_=model)
+
+    async def through_fastapi(response_class) -> bytes:
+        content = await serialize_response(
+            field=field,
+            response_content=wrap([_decoded(row) for row in rows]),
+            is_coroutine=True,
+        )
+        return response_class(content).body
+
+    async def stdlib() -> bytes:
+        return await through_fastapi(JSONResponse)
+
+    async def orjson() -> bytes:
+        return await through_fastapi(ORJSONResponse)
+
+    async def trusted() -> bytes:
+        return trusted_response(wrap([_decoded(row) for row in rows]), model).body
+
+    async def raw() -> bytes:
+        return trusted_response(
+            wrap([with_raw_content(row) for row in rows]), model
+        ).body
+
+    return {"stdlib": stdlib, "orjson": orjson, "trusted": trusted, "raw": raw}
+
+
+async def _time(path: Callable, repeat: int) -> tuple:
+    body = await path()  # warm-up, and the body to check
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await path()
+    return body, (time.perf_counter() - start) / repeat
+
+
+async def main(sizes: List[float], page_size: int, repeat: int) -> None:
+    shapes = (
+        ("single", DocumentResponse, lambda items: items[0], 1),
+        (
+            f"page of {page_size}",
+            DocumentPage,
+            lambda items: {"items": items, "next_cursor": None},
+            page_size,
+        ),
+    )
+    print(
+        f"{'document':>9} {'response':>12} {'path':>8} {'body KB':>9} "
+        f"{'ms':>9} {'MB/s':>8} {'speedup':>8}"
+    )
+    for kilobytes in sizes:
+        for label, model, wrap, count in shapes:
+            rows = [_stored_row(kilobytes, i) for i in range(count)]
+            expected = None
+            baseline = None
+            for name, path in _paths(model, wrap, rows).items():
+                body, seconds = await _time(path, repeat)
+                decoded = json.loads(body)
+                if expected is None:
+                    expected, baseline = decoded, seconds
+                elif decoded != expected:
+                    raise SystemExit(f"{name} produced a different body for {label}")
+                print(
+                    f"{kilobytes:>7g}KB {label:>12} {name:>8} "
+                    f"{len(body) / 1024:>9.0f} {seconds * 1000:>9.2f} "
+                    f"{len(body) / seconds / 1e6:>8.0f} "
+                    f"{baseline / seconds:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.sizes, args.page_size, args.repeat))
@@ -0,0 +1,127 @@
+"""
+Load-test the AI service offline against the fake LLM provider.
+
+Runs ``--requests`` streamed content generations, ``--concurrency`` at a
+time, through ``AIService`` with every agent switched to the ``fake``
+provider. Rate limiting, adaptive concurrency and coalescing all run as in
+production, so their effect on throughput and latency can be measured
+without provider quota. ``--distinct`` controls how many different prompts
+are sent (fewer means more identical calls to coalesce), ``--organizations``
+how many rate-limit buckets the load is spread over.
+
+Redis is optional; without it coalescing stays within the process.
+
+Usage:
+    python -m benchmarks.llm_load --requests 500 --concurrency 50 --tps 100
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List, Optional
+
+from app.services.ai_service import ai_service
+from app.services.llm_providers import FakeProvider, ProviderError
+from app.services.rate_limiting import RateLimitExceeded
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def main(
+    requests: int,
+    concurrency: int,
+    distinct: int,
+    organizations: int,
+    provider: FakeProvider,
+) -> None:
+    ai_service._providers["fake"] = provider
+    for agent in ai_service.agents.values():
+        agent.model_provider = "fake"
+
+    semaphore = asyncio.Semaphore(concurrency)
+    first_token: List[float] = []
+    durations: List[float] = []
+    outcomes = {"ok": 0, "rate_limited": 0, "provider_error": 0}
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            ttft: Optional[float] = None
+            try:
+                async for event in ai_service.stream_content(
+                    f"Write note {i % distinct}",
+                    organization_id=f"org-{i % organizations}",
+                ):
+                    if ttft is None and event.text:
+                        ttft = time.perf_counter() - start
+            except RateLimitExceeded:
+                outcomes["rate_limited"] += 1
+                return
+            except ProviderError:
+                outcomes["provider_error"] += 1
+                return
+            outcomes["ok"] += 1
+            durations.append(time.perf_counter() - start)
+            if ttft is not None:
+                first_token.append(ttft)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{requests} requests in {elapsed:.2f}s -> {requests / elapsed:.1f} req/s "
+        f"({provider.calls} provider calls)"
+    )
+    print("outcomes: " + ", ".join(f"{k}={v}" for k, v in outcomes.items()))
+    for name, values in (("first token", first_token), ("duration", durations)):
+        if values:
+            print(
+                f"{name:>11}: mean {statistics.mean(values) * 1000:.0f}ms "
+                f"p50 {_percentile(values, 50) * 1000:.0f}ms "
+                f"p95 {_percentile(values, 95) * 1000:.0f}ms "
+                f"p99 {_percentile(values, 99) * 1000:.0f}ms"
+            )
+    print("coalescing:", json.dumps(ai_service.cache_stats()["coalescing"]))
+    print("rate limits:", json.dumps(ai_service.rate_limit_stats()))
+
+    await ai_service.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=1_000_000)
+    parser.add_argument("--organizations", type=int, default=10)
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--tps", type=float, default=50.0)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            args.requests,
+            args.concurrency,
+            args.distinct,
+            args.organizations,
+            FakeProvider(
+                time_to_first_token=args.ttft,
+                tokens_per_second=args.tps,
+                output_tokens=args.output_tokens,
+                error_rate=args.error_rate,
+                rate_limit_rate=args.rate_limit_rate,
+                seed=args.seed,
+            ),
+        )
+    )
@@ -0,0 +1,60 @@
+"""
+Shared test fixtures.
+
+API tests drive the app in-process through its ASGI interface against the
+database named by ``DATABASE_URL`` and are skipped when it is unreachable.
+Everything they create lives under a throwaway organization that is
+deleted afterwards.
+"""
+
+import os
+import uuid
+
+# Before the app reads its settings
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("AI_PROVIDER_OVERRIDE", "fake")
+os.environ.setdefault("FAKE_LLM_TIME_TO_FIRST_TOKEN_SECONDS", "0")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "0")
+os.environ.setdefault("AI_RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("VALIDATE_TRUSTED_RESPONSES", "true")
+
+import httpx
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import async_engine
+
+
+@pytest.fixture
+async def client():
+    """HTTP client for the app's API, with a fresh connection pool per test."""
+    from app.main import app
+
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:  # connection errors do not share a base class
+        await async_engine.dispose()
+        pytest.skip(f"Database unavailable: {e}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url=f"http://localhost{settings.API_V1_STR}"
+    ) as http:
+        yield http
+    # Pooled connections belong to this test's event loop
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def organization(client):
+    """ID of a throwaway organization, deleted with its contents afterwards."""
+    response = await client.post(
+        "/organizations/",
+        json={"name": "Test organization", "slug": f"test-{uuid.uuid4().hex[:12]}"},
+    )
+    assert response.status_code == 200, response.text
+    organization_id = response.json()["id"]
+    yield organization_id
+    await client.delete(f"/organizations/{organization_id}")
@@ -0,0 +1,96 @@
+"""
+Tests for the AI agent endpoints, run against the fake LLM provider.
+"""
+
+import asyncio
+import json
+import uuid
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.services.ai_service import ai_service
+from app.services.rate_limiting import RateLimiter
+
+
+def _content(text):
+    return {
+        "type": "doc",
+        "content": [{"type": "paragraph", "content": [{"type": "text", "text": text}]}],
+    }
+
+
+async def test_batch_analysis_holds_no_connection_while_streaming(
+    client, organization, monkeypatch
+):
+    response = await client.post(
+        "/projects/", json={"name": "Project", "organization_id": organization}
+    )
+    project_id = response.json()["id"]
+    for text in ("first", "second"):
+        await client.post(
+            "/documents/",
+            json={
+                "title": text,
+                "content": _content(text),
+                "organization_id": organization,
+                "project_id": project_id,
+            },
+        )
+
+    checked_out = []
+    analyze_documents = ai_service.analyze_documents
+
+    async def recording(documents, *args, **kwargs):
+        checked_out.append(async_engine.sync_engine.pool.checkedout())
+        async for result in analyze_documents(documents, *args, **kwargs):
+            checked_out.append(async_engine.sync_engine.pool.checkedout())
+            yield result
+
+    monkeypatch.setattr(ai_service, "analyze_documents", recording)
+    response = await client.post(
+        "/ai-agents/analyze-documents/batch",
+        json={"project_id": project_id, "analysis_type": "summary"},
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["summary"]["documents"] == 2
+    assert lines[-1]["summary"]["errors"] == 0
+    assert checked_out and max(checked_out) == 0
+
+
+async def test_batch_analysis_unknown_project(client):
+    response = await client.post(
+        "/ai-agents/analyze-documents/batch",
+        json={"project_id": "00000000-0000-0000-0000-000000000000"},
+    )
+    assert response.status_code == 404
+
+
+async def test_rate_limit_rejection_is_not_shared_across_organizations(
+    client, monkeypatch
+):
+    monkeypatch.setattr(settings, "AI_RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(
+        ai_service, "rate_limiter", RateLimiter(org_requests_per_minute=1, max_wait=0)
+    )
+    prompt = f"Write a haiku {uuid.uuid4()}"
+    response = await client.post(
+        "/ai-agents/generate-content",
+        json={"prompt": "warm up", "organization_id": "org-a"},
+    )
+    assert response.status_code == 200
+
+    # Identical concurrent calls; org A's quota is used up, org B's is not
+    a, b = await asyncio.gather(
+        *(
+            client.post(
+                "/ai-agents/generate-content",
+                json={"prompt": prompt, "organization_id": org},
+            )
+            for org in ("org-a", "org-b")
+        )
+    )
+    assert a.status_code == 429
+    assert int(a.headers["Retry-After"]) > 0
+    assert b.status_code == 200
+    assert b.json()["success"]
@@ -0,0 +1,163 @@
+"""
+Tests for the AI service, run against the fake LLM provider.
+"""
+
+import asyncio
+import uuid
+from dataclasses import asdict
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.analysis_batch import AnalysisBatch
+from app.services.ai_service import AIService, DocumentContext
+from app.services.llm_providers import (
+    BatchResult,
+    BatchStatus,
+    Completion,
+    FakeProvider,
+    Usage,
+    collect,
+)
+from app.services.rate_limiting import RateLimiter, RateLimitExceeded
+
+
+async def test_caller_joins_only_its_own_organizations_call(monkeypatch):
+    monkeypatch.setattr(settings, "AI_RATE_LIMIT_ENABLED", True)
+    service = AIService()
+    service.rate_limiter = RateLimiter(org_requests_per_minute=1, max_wait=0)
+    try:
+        await service.generate_content("warm up", organization_id="org-a")
+        # Org A starts the call, org B arrives while it is in flight
+        a = asyncio.create_task(
+            service.generate_content("same", organization_id="org-a")
+        )
+        b = asyncio.create_task(
+            service.generate_content("same", organization_id="org-b")
+        )
+        results = await asyncio.gather(a, b, return_exceptions=True)
+    finally:
+        await service.aclose()
+    assert isinstance(results[0], RateLimitExceeded)
+    assert results[1]["success"]
+    assert service.rate_limiter.stats.admitted == 2
+
+
+async def test_shared_call_is_cached_with_its_usage():
+    service = AIService()
+    service._providers["fake"] = FakeProvider(time_to_first_token=0.01)
+    document = DocumentContext(
+        document_id="doc",
+        title="Notes",
+        content=f"Meeting notes {uuid.uuid4()}",
+        organization_id="org",
+    )
+    try:
+        # The stream makes the call; the analysis joins it
+        streamed = asyncio.create_task(collect(service.stream_analysis(document)))
+        await asyncio.sleep(0)
+        analysis = await service.analyze_document(document)
+        completion = await streamed
+        assert completion.usage.output_tokens > 0 and not completion.coalesced
+        assert analysis["usage"]["output_tokens"] == 0
+
+        agent, request = service._analysis_request(document, "comprehensive")
+        cached = await service.result_cache.get(service._cache_key(agent, request))
+        assert cached["usage"] == asdict(completion.usage)
+        hit = await service.analyze_document(document)
+        assert hit["cached"]
+        assert service.tokens_saved == completion.usage
+    finally:
+        await service.aclose()
+
+
+class BatchProvider(FakeProvider):
+    """Fake provider with a batch mode that ends every batch at once."""
+
+    supports_batch = True
+
+    def __init__(self):
+        super().__init__()
+        self.batches = {}
+
+    async def submit_batch(self, requests):
+        batch_id = uuid.uuid4().hex
+        self.batches[batch_id] = list(requests)
+        return batch_id
+
+    async def batch_status(self, batch_id):
+        total = len(self.batches[batch_id])
+        return BatchStatus(batch_id, "ended", total=total, succeeded=total)
+
+    async def batch_results(self, batch_id):
+        return [
+            BatchResult(custom_id, Completion(f"Analysis {custom_id}", Usage(10, 5)))
+            for custom_id in self.batches[batch_id]
+        ]
+
+
+async def test_batch_manifest_outlives_the_cache(client):  # needs the database
+    provider = BatchProvider()
+    contexts = [
+        DocumentContext(
+            document_id=document_id,
+            title="Notes",
+            content=content,
+            organization_id="org",
+        )
+        for document_id, content in (("a", "same"), ("b", "same"), ("c", "other"))
+    ]
+
+    async def documents():
+        for document_context in contexts:
+            yield document_context, "summary"
+
+    submitter, reader = AIService(), AIService()
+    for service in (submitter, reader):
+        service._providers["fake"] = provider
+    try:
+        batch = await submitter.submit_analysis_batch(documents())
+        # A different process, with nothing in its cache
+        response = await reader.get_analysis_batch(batch["batch_id"])
+    finally:
+        await submitter.aclose()
+        await reader.aclose()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(AnalysisBatch).where(AnalysisBatch.id == batch["batch_id"])
+            )
+            await db.commit()
+
+    assert response["status"] == "ended"
+    covered = sorted(result["document_ids"] for result in response["results"])
+    assert covered == [["a", "b"], ["c"]]
+
+
+async def test_batch_duplicates_refer_to_the_analyzed_document():
+    service = AIService()
+    contexts = [
+        DocumentContext(
+            document_id=document_id,
+            title="Notes",
+            content=content,
+            organization_id="org",
+        )
+        for document_id, content in (("a", "same"), ("b", "other"), ("c", "same"))
+    ]
+
+    async def documents():
+        for document_context in contexts:
+            yield document_context, "summary"
+
+    try:
+        results = {
+            result["document_id"]: result
+            async for result in service.analyze_documents(documents(), concurrency=1)
+        }
+    finally:
+        await service.aclose()
+    assert results["a"]["analysis"] and results["b"]["analysis"]
+    assert results["c"]["duplicate_of"] == "a"
+    assert "analysis" not in results["c"]
+    assert results["c"]["usage"]["output_tokens"] == 0
@@ -0,0 +1,180 @@
+"""
+Tests for the two-tier cache, with fakeredis standing in for Redis.
+"""
+
+import asyncio
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.core import cache as cache_module
+from app.core.cache import TwoTierCache
+
+
+class Loader:
+    """Loader that counts calls and waits for ``release`` before returning."""
+
+    def __init__(self, value="value"):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+def make_cache(server, **options):
+    return TwoTierCache(FakeRedis(server=server), namespace="test", **options)
+
+
+async def test_concurrent_misses_load_once(server):
+    cache = make_cache(server)
+    loader = Loader()
+    loader.release.clear()
+    tasks = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    loader.release.set()
+    assert await asyncio.gather(*tasks) == ["value"] * 5
+    assert loader.calls == 1
+    assert cache.stats.coalesced == 4
+    assert await cache.get_or_load("k", loader) == "value"
+    assert loader.calls == 1
+
+
+async def test_cancelled_loader_hands_over_to_waiting_caller(server):
+    cache = make_cache(server)
+    first = Loader("first")
+    first.release.clear()
+    second = Loader("second")
+
+    leader = asyncio.create_task(cache.get_or_load("k", first))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(cache.get_or_load("k", second))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == "second"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert (first.calls, second.calls) == (1, 1)
+
+
+async def test_cancelled_waiting_caller_leaves_load_running(server):
+    cache = make_cache(server)
+    loader = Loader()
+    loader.release.clear()
+
+    leader = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0.01)
+    follower.cancel()
+    loader.release.set()
+
+    assert await leader == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    assert loader.calls == 1
+
+
+async def test_slow_load_keeps_a_lock_another_worker_took(server):
+    cache = make_cache(server, lock_timeout=0.05)
+    redis = FakeRedis(server=server)
+    loader = Loader()
+    loader.release.clear()
+
+    load = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0.1)
+    # The lock expired mid-load and another worker took it
+    assert await redis.set("test:lock:k", "other", nx=True)
+    loader.release.set()
+    assert await load == "value"
+    assert await redis.get("test:lock:k") == b"other"
+
+
+async def test_loader_errors_propagate_and_are_not_cached(server):
+    cache = make_cache(server)
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise LookupError("missing")
+
+    tasks = [asyncio.create_task(cache.get_or_load("k", failing)) for _ in range(3)]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, LookupError) for result in results)
+    assert await cache.get_or_load("k", Loader()) == "value"
+
+
+async def test_invalidation_reaches_other_workers(server):
+    a, b = make_cache(server), make_cache(server)
+    await a.get_or_load("k", Loader("old"), tags=["doc:1"])
+    assert await b.get_or_load("k", Loader("unused"), tags=["doc:1"]) == "old"
+    assert b.stats.remote_hits == 1
+
+    await a.invalidate("doc:1")
+    # b missed the pub/sub message (no listener), so drop its local copy
+    b.clear_local()
+    assert await b.get_or_load("k", Loader("new"), tags=["doc:1"]) == "new"
+    assert await a.get_or_load("k", Loader("unused"), tags=["doc:1"]) == "new"
+
+
+async def test_failed_invalidation_is_replayed(server, monkeypatch):
+    monkeypatch.setattr(cache_module, "REDIS_BACKOFF_SECONDS", 0.05)
+    a, b = make_cache(server), make_cache(server)
+    await a.get_or_load("k", Loader("old"), tags=["doc:1"])
+
+    server.connected = False
+    await a.invalidate("doc:1")
+    server.connected = True
+    # Off Redis during the back-off, then replayed before it is read again
+    assert await a.get_or_load("k", Loader("new"), tags=["doc:1"]) == "new"
+    await asyncio.sleep(0.1)
+    a.clear_local()
+    assert await a.get_or_load("k", Loader("newer"), tags=["doc:1"]) == "newer"
+    assert await b.get_or_load("k", Loader("unused"), tags=["doc:1"]) == "newer"
+    await a.close()
+
+
+async def test_failed_invalidation_is_retried_in_the_background(server, monkeypatch):
+    monkeypatch.setattr(cache_module, "REDIS_BACKOFF_SECONDS", 0.05)
+    a, b = make_cache(server), make_cache(server)
+    await a.get_or_load("k", Loader("old"), tags=["doc:1"])
+
+    server.connected = False
+    await a.invalidate("doc:1")
+    await asyncio.sleep(0.1)  # still down at the first retry
+    server.connected = True
+    await asyncio.sleep(0.1)
+    # a did nothing since, yet b no longer sees the stale entry
+    assert await b.get_or_load("k", Loader("new"), tags=["doc:1"]) == "new"
+    await a.close()
+
+
+async def test_value_tags_invalidate(server):
+    cache = make_cache(server)
+    loader = Loader({"org": "o1"})
+    await cache.get_or_load(
+        "k", loader, value_tags=lambda value: [f"org:{value['org']}"]
+    )
+    await cache.invalidate("org:o1")
+    await cache.get_or_load("k", loader)
+    assert loader.calls == 2
+
+
+async def test_redis_down_degrades_to_local(server):
+    cache = make_cache(server)
+    server.connected = False
+    loader = Loader()
+    assert await cache.get_or_load("k", loader) == "value"
+    assert await cache.get_or_load("k", loader) == "value"
+    assert loader.calls == 1
+    assert cache.stats.errors >= 1
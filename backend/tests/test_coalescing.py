@@ -0,0 +1,72 @@
+"""
+Tests for coalescing identical LLM calls, with fakeredis standing in for Redis.
+"""
+
+import asyncio
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.services.coalescing import StreamCoalescer
+from app.services.llm_providers import ProviderRateLimitError, StreamEvent, Usage
+from app.services.rate_limiting import RateLimitExceeded
+
+
+def make_coalescer(server):
+    return StreamCoalescer(FakeRedis(server=server), namespace="test")
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+async def test_concurrent_calls_share_one_stream():
+    coalescer = StreamCoalescer()
+    calls = 0
+
+    async def start():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        yield StreamEvent(text="hello")
+        yield StreamEvent(done=True, usage=Usage(input_tokens=3, output_tokens=1))
+
+    first, second = await asyncio.gather(
+        _collect(coalescer.stream("k", start)), _collect(coalescer.stream("k", start))
+    )
+    assert calls == 1
+    assert [event.text for event in first] == [event.text for event in second]
+    assert first[-1].usage.output_tokens == 1 and not first[-1].coalesced
+    assert second[-1].usage == Usage() and second[-1].coalesced
+
+
+@pytest.mark.parametrize(
+    "error", [RateLimitExceeded("slow down", 7), ProviderRateLimitError("429", 3)]
+)
+async def test_followers_in_other_workers_get_the_same_error(error):
+    server = FakeServer()
+    leader, follower = make_coalescer(server), make_coalescer(server)
+    release = asyncio.Event()
+
+    async def start():
+        await release.wait()
+        raise error
+        yield  # pragma: no cover
+
+    async def unused():
+        raise AssertionError("follower called the provider")
+        yield  # pragma: no cover
+
+    led = asyncio.create_task(_collect(leader.stream("k", start)))
+    await asyncio.sleep(0.01)
+    followed = asyncio.create_task(_collect(follower.stream("k", unused)))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    for task in (led, followed):
+        with pytest.raises(ProviderRateLimitError) as raised:
+            await task
+        assert type(raised.value) is type(error)
+        assert raised.value.retry_after == error.retry_after
+    assert follower.stats.remote_follows == 1
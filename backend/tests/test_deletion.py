@@ -0,0 +1,118 @@
+"""
+Tests that deleting organizations and projects releases stored content.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal
+from app.models.document import ContentBlob, DocumentVersion
+from app.services.content_hash import content_hash
+
+
+def _content(text):
+    return {
+        "type": "doc",
+        "content": [{"type": "paragraph", "content": [{"type": "text", "text": text}]}],
+    }
+
+
+async def _ref_count(digest):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(ContentBlob.ref_count).where(ContentBlob.hash == digest)
+        )
+
+
+async def _versions(document_id):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(func.count()).where(DocumentVersion.document_id == document_id)
+        )
+
+
+async def _create(client, organization, content, **fields):
+    response = await client.post(
+        "/documents/",
+        json={
+            "title": "Doc",
+            "content": content,
+            "organization_id": organization,
+            **fields,
+        },
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+async def other_organization(client):
+    response = await client.post(
+        "/organizations/",
+        json={"name": "Other", "slug": f"test-{uuid.uuid4().hex[:12]}"},
+    )
+    organization_id = response.json()["id"]
+    yield organization_id
+    await client.delete(f"/organizations/{organization_id}")
+
+
+async def test_deleting_organization_releases_content(
+    client, organization, other_organization
+):
+    own = _content(f"own {uuid.uuid4()}")
+    shared = _content(f"shared {uuid.uuid4()}")
+    edited = _content(f"edited {uuid.uuid4()}")
+
+    document = await _create(client, organization, own)
+    await client.post(
+        f"/documents/{document['id']}/duplicate", params={"title": "Copy"}
+    )
+    response = await client.put(
+        f"/documents/{document['id']}", json={"title": "Doc", "content": edited}
+    )
+    assert response.status_code == 200
+    await _create(client, organization, shared)
+    kept = await _create(client, other_organization, shared)
+    shared_refs = await _ref_count(content_hash(shared))
+
+    response = await client.delete(f"/organizations/{organization}")
+    assert response.status_code == 200
+
+    # Current bodies, duplicates and history snapshots are all released
+    assert await _ref_count(content_hash(own)) is None
+    assert await _ref_count(content_hash(edited)) is None
+    assert await _versions(document["id"]) == 0
+    # Content another organization still uses keeps its own references
+    assert await _ref_count(content_hash(shared)) == shared_refs - 2
+    response = await client.get(f"/documents/{kept['id']}")
+    assert response.json()["content"] == shared
+
+    response = await client.get(f"/documents/{document['id']}")
+    assert response.status_code == 404
+
+
+async def test_deleting_project_releases_content(client, organization):
+    response = await client.post(
+        "/projects/", json={"name": "Project", "organization_id": organization}
+    )
+    project = response.json()
+    in_project = _content(f"project {uuid.uuid4()}")
+    team_wide = _content(f"team {uuid.uuid4()}")
+    document = await _create(client, organization, in_project, project_id=project["id"])
+    other = await _create(client, organization, team_wide)
+
+    response = await client.delete(f"/projects/{project['id']}")
+    assert response.status_code == 200
+
+    assert await _ref_count(content_hash(in_project)) is None
+    assert await _versions(document["id"]) == 0
+    assert await _ref_count(content_hash(team_wide)) is not None
+    response = await client.get(f"/documents/{other['id']}")
+    assert response.status_code == 200
+
+
+async def test_deleting_missing_organization(client):
+    response = await client.delete(f"/organizations/{uuid.uuid4()}")
+    assert response.status_code == 404
@@ -0,0 +1,200 @@
+"""
+Tests for the document endpoints.
+"""
+
+import json
+import uuid
+
+import pytest
+
+CONTENT = {
+    "type": "doc",
+    "content": [
+        {"type": "paragraph", "content": [{"type": "text", "text": "Hello"}]},
+    ],
+}
+
+
+@pytest.fixture
+async def document(client, organization):
+    response = await client.post(
+        "/documents/",
+        json={"title": "Notes", "content": CONTENT, "organization_id": organization},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_create_and_get(client, document):
+    assert document["content"] == CONTENT
+    assert document["version"] == 1
+
+    response = await client.get(f"/documents/{document['id']}")
+    assert response.status_code == 200
+    assert response.json()["content"] == CONTENT
+    assert response.headers["etag"] == '"v1"'
+
+    response = await client.get(
+        f"/documents/{document['id']}", headers={"If-None-Match": '"v1"'}
+    )
+    assert response.status_code == 304
+
+
+async def test_list(client, organization, document):
+    response = await client.get("/documents/", params={"organization_id": organization})
+    assert response.status_code == 200
+    (item,) = response.json()["items"]
+    assert item["id"] == document["id"]
+    assert item["content"] == CONTENT
+
+    response = await client.get(
+        "/documents/", params={"organization_id": organization, "view": "summary"}
+    )
+    assert "content" not in response.json()["items"][0]
+
+
+async def test_patch(client, document):
+    response = await client.patch(
+        f"/documents/{document['id']}",
+        json={
+            "base_version": 1,
+            "operations": [
+                {"op": "replace", "path": "/content/0/content/0/text", "value": "Hi"},
+                {"op": "add", "path": "/content/-", "value": {"type": "paragraph"}},
+            ],
+        },
+    )
+    assert response.status_code == 200, response.text
+    patched = response.json()
+    assert patched["version"] == 2
+    assert patched["content"]["content"][0]["content"][0]["text"] == "Hi"
+    assert response.headers["etag"] == '"v2"'
+
+    response = await client.get(f"/documents/{document['id']}")
+    assert response.json()["content"] == patched["content"]
+
+
+async def test_patch_stale_base_version(client, document):
+    response = await client.patch(
+        f"/documents/{document['id']}",
+        json={
+            "base_version": 7,
+            "operations": [{"op": "remove", "path": "/content/0"}],
+        },
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"]["current_version"] == 1
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        # Rejected by request validation
+        {"op": "add", "path": "/content"},
+        {"op": "replace", "path": "/type"},
+        {"op": "move", "path": "/content/0"},
+        {"op": "copy", "path": "/content/0"},
+        {"op": "nope", "path": "/type"},
+        # Rejected when applied
+        {"op": "add", "path": "/content/abc", "value": {}},
+        {"op": "remove", "path": "/content/abc"},
+        {"op": "replace", "path": "/content/abc", "value": {}},
+        {"op": "remove", "path": "/content/5"},
+        {"op": "replace", "path": "", "value": "not a document"},
+        {"op": "test", "path": "/type", "value": "paragraph"},
+    ],
+)
+async def test_patch_rejects_malformed_operations(client, document, operation):
+    response = await client.patch(
+        f"/documents/{document['id']}",
+        json={"base_version": 1, "operations": [operation]},
+    )
+    assert response.status_code == 422, response.text
+
+    response = await client.get(f"/documents/{document['id']}")
+    assert response.json()["version"] == 1
+    assert response.json()["content"] == CONTENT
+
+
+@pytest.mark.parametrize(
+    "parent",
+    [
+        {"organization_id": str(uuid.uuid4())},
+        {"organization_id": "not-a-uuid"},
+        {"project_id": str(uuid.uuid4())},
+    ],
+)
+async def test_create_with_unknown_parent(client, organization, parent):
+    response = await client.post(
+        "/documents/",
+        json={
+            "title": "Notes",
+            "content": CONTENT,
+            "organization_id": organization,
+            **parent,
+        },
+    )
+    assert response.status_code == 404
+
+
+async def test_create_in_another_organizations_project(client, organization):
+    response = await client.post(
+        "/projects/", json={"name": "Project", "organization_id": organization}
+    )
+    project_id = response.json()["id"]
+    response = await client.post(
+        "/organizations/",
+        json={"name": "Other", "slug": f"test-{uuid.uuid4().hex[:12]}"},
+    )
+    other = response.json()["id"]
+    try:
+        response = await client.post(
+            "/documents/",
+            json={
+                "title": "Notes",
+                "content": CONTENT,
+                "organization_id": other,
+                "project_id": project_id,
+            },
+        )
+        assert response.status_code == 404
+    finally:
+        await client.delete(f"/organizations/{other}")
+
+
+async def test_bulk_import_reports_unknown_parents(client, organization):
+    lines = [
+        {"title": "ok", "content": CONTENT, "organization_id": organization},
+        {"title": "no org", "content": CONTENT, "organization_id": str(uuid.uuid4())},
+        {
+            "title": "no project",
+            "content": CONTENT,
+            "organization_id": organization,
+            "project_id": str(uuid.uuid4()),
+        },
+    ]
+    response = await client.post(
+        "/documents/bulk", content="\n".join(json.dumps(line) for line in lines)
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["id"] is not None
+    assert "not found" in results[1]["error"]
+    assert "not found" in results[2]["error"]
+    assert response.json()["stats"]["created"] == 1
+
+
+async def test_history(client, document):
+    response = await client.get(f"/documents/{document['id']}/history")
+    assert response.status_code == 200
+    assert [version["version"] for version in response.json()] == [1]
+
+    response = await client.get(
+        f"/documents/{document['id']}/history", params={"before_version": 1}
+    )
+    assert response.json() == []
+
+
+async def test_history_of_unknown_document(client):
+    response = await client.get(f"/documents/{uuid.uuid4()}/history")
+    assert response.status_code == 404
@@ -0,0 +1,120 @@
+"""
+Tests for the JSON Patch engine.
+"""
+
+import pytest
+
+from app.services.json_patch import JsonPatchError, apply_patch, make_diff
+
+
+def _doc():
+    return {
+        "type": "doc",
+        "content": [
+            {"type": "paragraph", "content": [{"type": "text", "text": "one"}]},
+            {"type": "paragraph", "content": [{"type": "text", "text": "two"}]},
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "new",
+    [
+        {"type": "doc", "content": []},
+        {"type": "doc", "content": [{"type": "paragraph"}]},
+        {
+            "type": "doc",
+            "attrs": {"a/b": 1, "c~d": 2},
+            "content": _doc()["content"] + [{"type": "horizontal_rule"}],
+        },
+        {"type": "doc", "content": list(reversed(_doc()["content"]))},
+    ],
+)
+def test_diff_round_trips(new):
+    old = _doc()
+    assert apply_patch(old, make_diff(old, new)) == new
+    assert old == _doc()  # not modified without in_place
+
+
+def test_diff_inserting_one_block_is_one_operation():
+    old = _doc()
+    new = _doc()
+    new["content"].insert(1, {"type": "horizontal_rule"})
+    assert make_diff(old, new) == [
+        {"op": "add", "path": "/content/1", "value": {"type": "horizontal_rule"}}
+    ]
+
+
+def test_operations():
+    doc = apply_patch(
+        _doc(),
+        [
+            {"op": "add", "path": "/content/-", "value": {"type": "horizontal_rule"}},
+            {"op": "replace", "path": "/content/0/content/0/text", "value": "uno"},
+            {"op": "copy", "from": "/content/0", "path": "/content/1"},
+            {"op": "move", "from": "/content/3", "path": "/content/0"},
+            {"op": "remove", "path": "/content/1"},
+            {"op": "test", "path": "/content/0/type", "value": "horizontal_rule"},
+            {"op": "add", "path": "/attrs", "value": None},
+        ],
+    )
+    assert [block["type"] for block in doc["content"]] == [
+        "horizontal_rule",
+        "paragraph",
+        "paragraph",
+    ]
+    assert doc["content"][1]["content"][0]["text"] == "uno"
+    assert doc["content"][2]["content"][0]["text"] == "two"
+    assert doc["attrs"] is None
+
+
+def test_in_place():
+    doc = _doc()
+    result = apply_patch(doc, [{"op": "remove", "path": "/content/0"}], in_place=True)
+    assert result is doc
+    assert len(doc["content"]) == 1
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        {"op": "add", "path": "/content/0"},
+        {"op": "replace", "path": "/type"},
+        {"op": "test", "path": "/type"},
+        {"op": "move", "path": "/content/0"},
+        {"op": "copy", "path": "/content/0"},
+        {"op": "remove"},
+        {"op": "frobnicate", "path": "/type"},
+    ],
+)
+def test_malformed_operations(operation):
+    with pytest.raises(JsonPatchError):
+        apply_patch(_doc(), [operation])
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        {"op": "add", "path": "/content/abc", "value": 1},
+        {"op": "add", "path": "/content/3", "value": 1},
+        {"op": "add", "path": "/content/-1", "value": 1},
+        {"op": "add", "path": "/content/01", "value": 1},
+        {"op": "remove", "path": "/content/abc"},
+        {"op": "remove", "path": "/content/2"},
+        {"op": "replace", "path": "/content/abc", "value": 1},
+        {"op": "replace", "path": "/content/abc/type", "value": 1},
+        {"op": "copy", "from": "/content/x", "path": "/content/0"},
+        {"op": "move", "from": "/content/-", "path": "/content/0"},
+        {"op": "remove", "path": "/missing"},
+        {"op": "remove", "path": "/type/x"},
+        {"op": "add", "path": "/type/x", "value": 1},
+        {"op": "remove", "path": ""},
+        {"op": "add", "path": "content", "value": 1},
+        {"op": "test", "path": "/type", "value": "paragraph"},
+    ],
+)
+def test_operations_that_do_not_apply(operation):
+    doc = _doc()
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, [operation])
+    assert doc == _doc()
@@ -0,0 +1,25 @@
+"""
+Tests for the project endpoints.
+"""
+
+import uuid
+
+import pytest
+
+
+async def test_create_project(client, organization):
+    response = await client.post(
+        "/projects/", json={"name": "Project", "organization_id": organization}
+    )
+    assert response.status_code == 200
+    project = response.json()
+    assert project["organization_id"] == organization
+    assert project["created_by"] is None
+
+
+@pytest.mark.parametrize("organization_id", [str(uuid.uuid4()), "not-a-uuid"])
+async def test_create_project_in_unknown_organization(client, organization_id):
+    response = await client.post(
+        "/projects/", json={"name": "Project", "organization_id": organization_id}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,71 @@
+"""
+Tests for semantic search over an organization's documents.
+"""
+
+import asyncio
+import functools
+import threading
+
+from app.core.database import AsyncSessionLocal
+from app.services import semantic_search
+from app.services.semantic_search import SemanticSearchService
+from app.services.vector_index import IVFIndex
+
+TOPICS = [
+    "quarterly budget forecast and spending plan",
+    "database migration rollback procedure",
+    "onboarding checklist for new engineers",
+    "incident postmortem for the payment outage",
+    "marketing launch campaign timeline",
+    "security review of the login service",
+]
+
+
+async def test_index_trains_in_the_background(client, organization, monkeypatch):
+    monkeypatch.setattr(
+        semantic_search,
+        "IVFIndex",
+        functools.partial(IVFIndex, min_train_size=8),
+    )
+    fit = IVFIndex._fit
+    fitted_in = []
+
+    def recording_fit(self, vectors):
+        fitted_in.append(threading.get_ident())
+        return fit(self, vectors)
+
+    monkeypatch.setattr(IVFIndex, "_fit", recording_fit)
+    ids = {}
+    for n in range(3):
+        for topic in TOPICS:
+            response = await client.post(
+                "/documents/",
+                json={
+                    "title": f"{topic} {n}",
+                    "content": {
+                        "type": "doc",
+                        "content": [
+                            {
+                                "type": "paragraph",
+                                "content": [{"type": "text", "text": f"{topic} {n}"}],
+                            }
+                        ],
+                    },
+                    "organization_id": organization,
+                },
+            )
+            ids.setdefault(topic, set()).add(response.json()["id"])
+
+    service = SemanticSearchService()
+    async with AsyncSessionLocal() as db:
+        hits = await service.search(db, organization, "database migration rollback")
+        assert hits[0]["id"] in ids["database migration rollback procedure"]
+        await asyncio.gather(*service._training)
+        index = service._indexes[organization].index
+        assert index._centroids is not None
+        # Trained off the event loop's thread
+        assert fitted_in and threading.get_ident() not in fitted_in
+        assert not index.needs_training
+
+        hits = await service.search(db, organization, "payment outage postmortem")
+        assert hits[0]["id"] in ids["incident postmortem for the payment outage"]
@@ -0,0 +1,100 @@
+"""
+Tests for the IVF vector index.
+"""
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import IVFIndex
+
+DIM = 16
+
+
+def _vectors(count, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, DIM))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def _index(count, min_train_size=64):
+    index = IVFIndex(DIM, nprobe=2, min_train_size=min_train_size)
+    index.add_many([f"v{i}" for i in range(count)], _vectors(count))
+    return index
+
+
+def _assert_consistent(index):
+    """Every vector sits in its nearest centroid's list and finds itself."""
+    count = len(index)
+    vectors = index._vectors[:count]
+    assert (index._lists[:count] == index._assign(vectors)).all()
+    for item_id, position in index._positions.items():
+        assert index.search(vectors[position], 1)[0][0] == item_id
+
+
+def test_exhaustive_below_training_size():
+    index = _index(20)
+    assert not index.needs_training
+    query = _vectors(20)[7]
+    (best, score), *_ = index.search(query, 3)
+    assert best == "v7"
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_adding_does_not_train():
+    index = _index(100)
+    assert index.needs_training
+    assert index._centroids is None
+    index.train()
+    assert not index.needs_training
+    assert index._centroids is not None
+    _assert_consistent(index)
+
+
+def test_replace_and_remove():
+    index = _index(100)
+    index.train()
+    replacement = _vectors(1, seed=9)[0]
+    index.add("v3", replacement)
+    index.remove("v5")
+    index.remove("missing")
+    assert len(index) == 99
+    assert "v5" not in index
+    assert index.search(replacement, 1)[0][0] == "v3"
+    _assert_consistent(index)
+
+
+def test_changes_during_training_are_reassigned():
+    index = _index(100)
+    fit = index.start_training()
+    assert fit is not None
+    assert index.start_training() is None  # one training at a time
+
+    # Written while the snapshot is being fitted
+    extra = _vectors(50, seed=1)
+    index.add_many([f"new{i}" for i in range(50)], extra)
+    index.remove("v0")  # moves the last vector into position 0
+    index.add("v10", _vectors(1, seed=2)[0])
+    assert index.search(extra[3], 1)[0][0] == "new3"
+
+    index.finish_training(fit())
+    assert len(index) == 149
+    _assert_consistent(index)
+
+
+def test_failed_training_can_be_retried():
+    index = _index(100)
+    index.start_training()
+    index.finish_training(None)
+    assert index._centroids is None
+    assert index.needs_training
+    index.train()
+    _assert_consistent(index)
+
+
+def test_retrains_after_doubling():
+    index = _index(64)
+    index.train()
+    index.add_many([f"more{i}" for i in range(63)], _vectors(63, seed=3))
+    assert not index.needs_training
+    index.add("one-more", _vectors(1, seed=4)[0])
+    assert index.needs_training